@@ -0,0 +1,191 @@
+import asyncio
+import math
+import time
+from collections import deque
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from .profiling import METRIC_PREFIX, incr, stage
+
+# Admission control for the API, as two ASGI middlewares:
+#   BodySizeLimit     - rejects bodies over a size limit with 413, from the
+#                       Content-Length header when there is one, otherwise as
+#                       soon as the streamed body passes the limit (before it
+#                       is buffered)
+#   ConcurrencyLimit  - lets at most ``max_concurrent`` requests to the given
+#                       paths run at once and queues up to ``max_queue`` more;
+#                       a full queue gets 429 and a request that waited
+#                       ``queue_timeout`` seconds gets 503, both with Retry-After
+# A request holds its slot while its upload is read, so at most
+# max_concurrent bodies are buffered at a time. Queue waits are timed as the
+# "admission_wait" stage and also returned in the X-Queue-Wait header;
+# rejections are counted as admission_rejected_<status>.
+
+
+class RequestTooLarge(HTTPException):
+    def __init__(self, max_bytes):
+        super().__init__(status_code=413, detail=f"Request body larger than {max_bytes} bytes.")
+
+
+def _reject(status, detail, retry_after=None):
+    incr(f"admission_rejected_{status}")
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return JSONResponse({"detail": detail}, status_code=status, headers=headers)
+
+
+class BodySizeLimit:
+    def __init__(self, app, max_bytes):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    await _reject(413, f"Request body larger than {self.max_bytes} bytes.")(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise RequestTooLarge(self.max_bytes)
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except RequestTooLarge as e:
+            if started:
+                raise
+            await _reject(413, e.detail)(scope, receive, send)
+
+
+class Admission:
+    """Slots for ``max_concurrent`` requests and a FIFO queue of ``max_queue`` waiters.
+
+    Only used from the event loop thread, so it needs no lock.
+    """
+
+    def __init__(self, max_concurrent, max_queue=0, queue_timeout=30.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+        # Moving average of the time a request holds its slot, for Retry-After
+        self._service_seconds = 1.0
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def retry_after(self):
+        """Seconds until a slot is likely to be free for a new request."""
+        estimate = self._service_seconds * (self.queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(estimate))
+
+    async def acquire(self):
+        """Take a slot, waiting in the queue if needed. Returns the seconds waited.
+
+        Raises asyncio.QueueFull when the queue is full and
+        asyncio.TimeoutError when no slot came free within ``queue_timeout``.
+        """
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            return 0.0
+        if self.queued >= self.max_queue:
+            raise asyncio.QueueFull
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            with stage("admission_wait"):
+                await asyncio.wait_for(waiter, self.queue_timeout or None)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot was handed over as we gave up
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return time.perf_counter() - start
+
+    def release(self):
+        # Hand the slot to the first live waiter, or free it
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def observe(self, seconds):
+        self._service_seconds = 0.8 * self._service_seconds + 0.2 * seconds
+
+    def status(self):
+        return {
+            "in_flight": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+    def prometheus_text(self):
+        lines = []
+        for name, value in self.status().items():
+            metric = f"{METRIC_PREFIX}_admission_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class ConcurrencyLimit:
+    def __init__(self, app, admission, paths):
+        self.app = app
+        self.admission = admission
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths or not self.admission.max_concurrent:
+            await self.app(scope, receive, send)
+            return
+        admission = self.admission
+        try:
+            waited = await admission.acquire()
+        except asyncio.QueueFull:
+            response = _reject(429, "Too many evaluations queued, retry later.", admission.retry_after())
+            await response(scope, receive, send)
+            return
+        except asyncio.TimeoutError:
+            response = _reject(503, "No evaluation slot became free in time, retry later.", admission.retry_after())
+            await response(scope, receive, send)
+            return
+
+        async def send_with_wait(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-queue-wait", f"{waited:.3f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_wait)
+        finally:
+            admission.observe(time.perf_counter() - started)
+            admission.release()
@@ -0,0 +1,291 @@
+import argparse
+import csv
+import json
+import os
+
+import numpy as np
+
+from .result_store import ResultStore
+
+# Corpus-level compliance analytics. Question results are held as integer
+# coded NumPy columns (one row per question of an evaluation), so pass rates,
+# status distributions and cross-tabs over millions of question results are
+# a handful of bincounts rather than Python loops.
+
+FIELD_STATUSES = ["Present", "Not Present"]
+COMPLIANCE_STATUSES = ["Compliant", "Non-compliant", "Missing value", "Not Applicable"]
+DIMENSIONS = ("principle", "question", "mapping", "fip_version")
+
+COLUMNS = ("evaluation", "principle", "question", "mapping", "fip_version", "field_status", "compliance")
+_DTYPES = {
+    "evaluation": np.int32,
+    "principle": np.int16,
+    "question": np.int32,
+    "mapping": np.int16,
+    "fip_version": np.int16,
+    "field_status": np.int8,
+    "compliance": np.int8,
+}
+
+
+class _Encoder:
+    """Assigns consecutive integer codes to category labels."""
+
+    def __init__(self, labels=()):
+        self.labels = list(labels)
+        self.codes = {label: i for i, label in enumerate(self.labels)}
+
+    def __call__(self, label):
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+class CorpusColumns:
+    """Integer coded question results plus the labels of every code."""
+
+    def __init__(self, columns, categories):
+        self.columns = columns
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.columns["evaluation"])
+
+    def codes(self, dimension, label):
+        return self.categories[dimension].index(label)
+
+    def select(self, **filters):
+        """Rows whose dimension labels equal the given values, e.g. ``mapping="fip_madmp_CLARIN_FIP.json"``."""
+        mask = np.ones(len(self), dtype=bool)
+        for dimension, label in filters.items():
+            if label is None:
+                continue
+            if label not in self.categories[dimension]:
+                mask[:] = False
+                break
+            mask &= self.columns[dimension] == self.codes(dimension, label)
+        return CorpusColumns({k: v[mask] for k, v in self.columns.items()}, self.categories)
+
+
+def _build(rows):
+    """Encode ``(evaluation, principle, question, mapping, fip_version, field_status, compliance)`` rows."""
+    encoders = {
+        "principle": _Encoder(),
+        "question": _Encoder(),
+        "mapping": _Encoder(),
+        "fip_version": _Encoder(),
+        "field_status": _Encoder(FIELD_STATUSES),
+        "compliance": _Encoder(COMPLIANCE_STATUSES),
+    }
+    evaluations = _Encoder()
+    data = {name: [] for name in COLUMNS}
+    for row in rows:
+        data["evaluation"].append(evaluations(row[0]))
+        for name, value in zip(COLUMNS[1:], row[1:]):
+            data[name].append(encoders[name](value or ""))
+    columns = {name: np.array(values, dtype=_DTYPES[name]) for name, values in data.items()}
+    categories = {name: encoder.labels for name, encoder in encoders.items()}
+    categories["evaluation"] = evaluations.labels
+    return CorpusColumns(columns, categories)
+
+
+def from_results(evaluations):
+    """Columns from in-memory evaluations: an iterable of ``(mapping, fip_version, results)``
+    where ``results`` is the output of ``evaluate_dmp_against_fip``."""
+    def rows():
+        for idx, (mapping, fip_version, results) in enumerate(evaluations):
+            for r in results:
+                yield (
+                    idx, r.get("FAIR_principle"), r["FIP_question"], os.path.basename(mapping),
+                    fip_version, r["field_status"], r["compliance_status"],
+                )
+    return _build(rows())
+
+
+def from_store(store, mapping=None, since=None):
+    """Columns for the question results kept in a ``ResultStore``."""
+    return _build(store.question_rows(mapping=mapping, since=since))
+
+
+def _group_counts(cols, by):
+    n = len(cols.categories[by])
+    group = cols.columns[by]
+    total = np.bincount(group, minlength=n)
+    present = np.bincount(group, weights=cols.columns["field_status"] == 0, minlength=n)
+    compliant = np.bincount(group, weights=cols.columns["compliance"] == 0, minlength=n)
+    return total, present.astype(np.int64), compliant.astype(np.int64)
+
+
+def pass_rates(cols, by="principle"):
+    """Per group: question results, present and compliant counts and their rates.
+
+    The pass rate is compliant/total, as in ``summarize_results``.
+    """
+    total, present, compliant = _group_counts(cols, by)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        present_rate = np.where(total > 0, present / total, 0.0)
+        pass_rate = np.where(total > 0, compliant / total, 0.0)
+    return [
+        {
+            by: label,
+            "total": int(total[i]),
+            "present": int(present[i]),
+            "compliant": int(compliant[i]),
+            "present_rate": round(float(present_rate[i]), 4),
+            "pass_rate": round(float(pass_rate[i]), 4),
+        }
+        for i, label in enumerate(cols.categories[by])
+        if total[i]
+    ]
+
+
+def crosstab(cols, rows="principle", columns="mapping", statistic="pass_rate"):
+    """Matrix of ``statistic`` (``count``, ``compliant`` or ``pass_rate``) for each
+    ``rows`` x ``columns`` pair; returns ``(row_labels, column_labels, matrix)``.
+    Against the status columns (``compliance``, ``field_status``) it always counts."""
+    n_rows, n_cols = len(cols.categories[rows]), len(cols.categories[columns])
+    if columns in ("compliance", "field_status"):
+        statistic = "count"
+    cell = cols.columns[rows].astype(np.int64) * n_cols + cols.columns[columns]
+    counts = np.bincount(cell, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+    if statistic == "count":
+        matrix = counts
+    else:
+        compliant = np.bincount(
+            cell, weights=cols.columns["compliance"] == 0, minlength=n_rows * n_cols,
+        ).reshape(n_rows, n_cols)
+        if statistic == "compliant":
+            matrix = compliant.astype(np.int64)
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                matrix = np.where(counts > 0, compliant / counts, np.nan)
+    return list(cols.categories[rows]), list(cols.categories[columns]), matrix
+
+
+def status_distribution(cols, by="principle"):
+    """Count of each compliance status per group."""
+    labels, statuses, matrix = crosstab(cols, by, "compliance", "count")
+    return [
+        {by: label, **{status: int(matrix[i, j]) for j, status in enumerate(statuses)}}
+        for i, label in enumerate(labels)
+        if matrix[i].any()
+    ]
+
+
+def evaluation_scores(cols):
+    """Pass rate of each evaluation, in the order of ``categories["evaluation"]``."""
+    n = len(cols.categories["evaluation"])
+    total = np.bincount(cols.columns["evaluation"], minlength=n)
+    compliant = np.bincount(cols.columns["evaluation"], weights=cols.columns["compliance"] == 0, minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, compliant / total, 0.0)
+
+
+def save_table(rows, path):
+    """Write a list of dicts (e.g. from ``pass_rates``) as CSV."""
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        if not rows:
+            return
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _cell(value):
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 4)
+    return int(value)
+
+
+def save_crosstab(table, path):
+    """Write a ``crosstab`` result as CSV, one row per row label."""
+    row_labels, column_labels, matrix = table
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow([""] + column_labels)
+        for label, values in zip(row_labels, matrix):
+            writer.writerow([label] + ["" if _cell(v) is None else _cell(v) for v in values])
+
+
+def save_columns(cols, directory):
+    """Store the columns as one ``.npy`` file each plus ``categories.json``."""
+    os.makedirs(directory, exist_ok=True)
+    for name, values in cols.columns.items():
+        np.save(os.path.join(directory, f"{name}.npy"), values)
+    with open(os.path.join(directory, "categories.json"), "w", encoding="utf-8") as fh:
+        json.dump(cols.categories, fh, ensure_ascii=False)
+
+
+def load_columns(directory, mmap=True):
+    """Load columns written by ``save_columns`` (memory mapped by default)."""
+    with open(os.path.join(directory, "categories.json"), "r", encoding="utf-8") as fh:
+        categories = json.load(fh)
+    columns = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+        for name in COLUMNS
+    }
+    return CorpusColumns(columns, categories)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus-level compliance analytics over stored evaluations")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="SQLite result store (see Evaluator/result_store.py)")
+    source.add_argument("--columns", help="Directory written by the export command")
+    parser.add_argument("--mapping", help="Only evaluations under this mapping file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rates = sub.add_parser("pass-rates", help="Present and pass rates per group")
+    rates.add_argument("--by", choices=DIMENSIONS, default="principle")
+    rates.add_argument("--csv", help="Write the table to this CSV file")
+
+    dist = sub.add_parser("distribution", help="Compliance status counts per group")
+    dist.add_argument("--by", choices=DIMENSIONS, default="principle")
+    dist.add_argument("--csv", help="Write the table to this CSV file")
+
+    tab = sub.add_parser("crosstab", help="Cross-tab of two dimensions")
+    tab.add_argument("--rows", choices=DIMENSIONS, default="principle")
+    tab.add_argument("--cols", choices=DIMENSIONS, default="mapping")
+    tab.add_argument("--statistic", choices=["pass_rate", "compliant", "count"], default="pass_rate")
+    tab.add_argument("--csv", help="Write the cross-tab to this CSV file")
+
+    export = sub.add_parser("export", help="Save the columns as .npy files for fast reloading")
+    export.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.db:
+        store = ResultStore(args.db)
+        cols = from_store(store, mapping=args.mapping)
+        store.close()
+    else:
+        cols = load_columns(args.columns).select(mapping=args.mapping)
+
+    if args.command == "export":
+        save_columns(cols, args.directory)
+        print(f"{len(cols)} question results saved to: {args.directory}")
+        return
+    if args.command == "crosstab":
+        table = crosstab(cols, args.rows, args.cols, args.statistic)
+        if args.csv:
+            save_crosstab(table, args.csv)
+            print(f"Cross-tab saved to: {args.csv}")
+        else:
+            row_labels, column_labels, matrix = table
+            print(json.dumps({
+                label: {column: _cell(v) for column, v in zip(column_labels, values)}
+                for label, values in zip(row_labels, matrix)
+            }, indent=2, ensure_ascii=False))
+        return
+
+    rows = pass_rates(cols, args.by) if args.command == "pass-rates" else status_distribution(cols, args.by)
+    if args.csv:
+        save_table(rows, args.csv)
+        print(f"Table saved to: {args.csv}")
+    else:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
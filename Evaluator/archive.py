@@ -0,0 +1,270 @@
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no flock: one writer per archive at a time
+    fcntl = None
+
+from .serialization import atomic_open
+
+# Sharded, append-only archive of evaluation artifacts, used instead of
+# loose files per maDMP when a corpus is evaluated into one --output:
+#   archive.json                  - shard count and chunk size, fixed at creation
+#   shard-<NNNN>-<chunk>.tar      - the artifacts of each evaluation, as a
+#                                   record of consecutive tar members named
+#                                   like the loose files
+#   index.jsonl                   - one line per record: dmp_id, chunk, offset
+#                                   and length, for random access by maDMP
+# A maDMP always goes to shard crc32(dmp_id) % shards. Once a chunk passes
+# chunk_bytes the next record starts a new one, so finished chunks never
+# change again and sync once. Chunks are plain tar files (left open for
+# appends, which tar and tarfile both read), so `tar xf` restores the file
+# layout. Re-evaluating a maDMP appends a new record and the last index
+# entry wins. Appends take an flock on the shard and on the index, so
+# several processes can write one archive; the index line is written after
+# the data and under the shard lock, so a crash can leave an unindexed record
+# (see ``reindex``) but never an entry without data.
+
+MANIFEST_NAME = "archive.json"
+INDEX_NAME = "index.jsonl"
+DEFAULT_SHARDS = 16
+DEFAULT_CHUNK_BYTES = 256 * 1024 * 1024
+
+_CHUNK = re.compile(r"^shard-(\d{4})-(\d{6})\.tar$")
+
+
+def _chunk_name(shard, number):
+    return f"shard-{shard:04d}-{number:06d}.tar"
+
+
+@contextmanager
+def _locked(path):
+    with open(path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield fh
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _member(name, data, mtime, header=None):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    info.mode = 0o644
+    if header is not None:
+        # "comment" is a standard pax keyword that readers ignore
+        info.pax_headers = {"comment": json.dumps(header, ensure_ascii=False)}
+    return info.tobuf(format=tarfile.PAX_FORMAT, encoding="utf-8") + data + b"\0" * (-len(data) % tarfile.BLOCKSIZE)
+
+
+def _record_header(member):
+    comment = member.pax_headers.get("comment")
+    if not comment:
+        return None
+    try:
+        header = json.loads(comment)
+    except ValueError:
+        return None
+    return header if isinstance(header, dict) and "dmp_id" in header else None
+
+
+class ArtifactArchive:
+    """Archive of evaluation artifacts in ``directory`` (created if needed).
+
+    ``shards`` and ``chunk_bytes`` only apply when the archive is created;
+    an existing archive keeps its own.
+    """
+
+    def __init__(self, directory, shards=DEFAULT_SHARDS, chunk_bytes=DEFAULT_CHUNK_BYTES):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        with _locked(manifest_path + ".lock"):
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r", encoding="utf-8") as fh:
+                    manifest = json.load(fh)
+            else:
+                manifest = {"format": 1, "shards": shards, "chunk_bytes": chunk_bytes}
+                with atomic_open(manifest_path, "w", encoding="utf-8") as fh:
+                    json.dump(manifest, fh, indent=2)
+        self.shards = manifest["shards"]
+        self.chunk_bytes = manifest["chunk_bytes"]
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self._index = {}
+        self._index_read = 0
+
+    def shard_of(self, dmp_id):
+        return zlib.crc32(dmp_id.encode("utf-8")) % self.shards
+
+    def _current_chunk(self, shard):
+        numbers = [
+            int(m.group(2)) for m in map(_CHUNK.match, os.listdir(self.directory))
+            if m and int(m.group(1)) == shard
+        ]
+        number = max(numbers, default=0)
+        path = os.path.join(self.directory, _chunk_name(shard, number))
+        if os.path.exists(path) and os.path.getsize(path) >= self.chunk_bytes:
+            number += 1
+        return _chunk_name(shard, number)
+
+    def append(self, dmp_id, artifacts):
+        """Append the ``{file name: bytes or str}`` artifacts of ``dmp_id`` as one record.
+
+        Returns the index entry of the record.
+        """
+        mtime = int(time.time())
+        parts = []
+        for i, (name, data) in enumerate(artifacts.items()):
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            header = {"dmp_id": dmp_id, "artifacts": len(artifacts)} if i == 0 else None
+            parts.append(_member(name, data, mtime, header))
+        record = b"".join(parts)
+
+        shard = self.shard_of(dmp_id)
+        with _locked(os.path.join(self.directory, f"shard-{shard:04d}.lock")):
+            chunk = self._current_chunk(shard)
+            with open(os.path.join(self.directory, chunk), "ab") as fh:
+                offset = fh.seek(0, os.SEEK_END)
+                fh.write(record)
+            entry = {
+                "dmp_id": dmp_id, "chunk": chunk, "offset": offset, "length": len(record),
+                "artifacts": list(artifacts), "created": mtime,
+            }
+            # Still under the shard lock, so index order is data order for each maDMP
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            with _locked(self.index_path + ".lock"), open(self.index_path, "ab") as fh:
+                fh.write(line)
+        return entry
+
+    def index(self):
+        """{dmp_id: latest index entry}; only lines added since the last call are read."""
+        if not os.path.exists(self.index_path):
+            return self._index
+        with open(self.index_path, "rb") as fh:
+            fh.seek(self._index_read)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # being written
+                self._index_read += len(line)
+                entry = json.loads(line)
+                self._index[entry["dmp_id"]] = entry
+        return self._index
+
+    def get(self, dmp_id):
+        """{file name: bytes} of the latest record of ``dmp_id``; KeyError if there is none."""
+        entry = self.index()[dmp_id]
+        with open(os.path.join(self.directory, entry["chunk"]), "rb") as fh:
+            fh.seek(entry["offset"])
+            data = fh.read(entry["length"])
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar:
+            return {member.name: tar.extractfile(member).read() for member in tar}
+
+    def extract(self, output_dir, dmp_ids=None):
+        """Write the latest artifacts of ``dmp_ids`` (default: all) as loose files; returns the count."""
+        os.makedirs(output_dir, exist_ok=True)
+        written = 0
+        for dmp_id in dmp_ids if dmp_ids is not None else sorted(self.index()):
+            for name, data in self.get(dmp_id).items():
+                with atomic_open(os.path.join(output_dir, os.path.basename(name)), "wb") as fh:
+                    fh.write(data)
+                written += 1
+        return written
+
+    def reindex(self):
+        """Rebuild index.jsonl from the chunks; returns the number of records."""
+        entries = []
+        chunks = sorted(name for name in os.listdir(self.directory) if _CHUNK.match(name))
+        for chunk in chunks:
+            current = None
+            with tarfile.open(os.path.join(self.directory, chunk), mode="r:") as tar:
+                for member in tar:
+                    header = _record_header(member)
+                    if header is not None:
+                        current = {
+                            "dmp_id": header["dmp_id"], "chunk": chunk, "offset": member.offset,
+                            "length": 0, "artifacts": [], "created": int(member.mtime),
+                        }
+                        entries.append(current)
+                    if current is not None:
+                        # Records are contiguous: each one ends with the padded data of its last member
+                        end = member.offset_data + member.size + (-member.size % tarfile.BLOCKSIZE)
+                        current["artifacts"].append(member.name)
+                        current["length"] = end - current["offset"]
+        with _locked(self.index_path + ".lock"), atomic_open(self.index_path, "w", encoding="utf-8") as fh:
+            for entry in entries:
+                fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._index, self._index_read = {}, 0
+        return len(entries)
+
+    def stats(self):
+        chunks = [name for name in os.listdir(self.directory) if _CHUNK.match(name)]
+        return {
+            "maDMPs": len(self.index()),
+            "chunks": len(chunks),
+            "bytes": sum(os.path.getsize(os.path.join(self.directory, name)) for name in chunks),
+            "shards": self.shards,
+            "chunk_bytes": self.chunk_bytes,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect an evaluation artifact archive")
+    parser.add_argument("archive", help="Archive directory (the --output of evaluate_dmp.py --output-layout archive)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List the archived maDMPs and their artifacts")
+    show = sub.add_parser("show", help="Print an artifact of a maDMP")
+    show.add_argument("dmp_id")
+    show.add_argument("artifact", nargs="?", help="File name (default: list the artifacts)")
+    extract = sub.add_parser("extract", help="Write the latest artifacts as loose files")
+    extract.add_argument("output", help="Output folder")
+    extract.add_argument("dmp_ids", nargs="*", help="maDMPs to extract (default: all)")
+    sub.add_parser("reindex", help="Rebuild the index from the chunks")
+    sub.add_parser("stats", help="Print the size of the archive")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.archive, MANIFEST_NAME)):
+        parser.error(f"{args.archive} is not an artifact archive")
+    archive = ArtifactArchive(args.archive)
+
+    if args.command == "list":
+        for dmp_id, entry in sorted(archive.index().items()):
+            print(f"{dmp_id}\t{entry['chunk']}@{entry['offset']}\t{', '.join(entry['artifacts'])}")
+    elif args.command == "show":
+        try:
+            artifacts = archive.get(args.dmp_id)
+        except KeyError:
+            parser.error(f"No maDMP '{args.dmp_id}' in {args.archive}")
+        if args.artifact is None:
+            for name, data in artifacts.items():
+                print(f"{name}\t{len(data)} bytes")
+        elif args.artifact in artifacts:
+            sys.stdout.buffer.write(artifacts[args.artifact])
+        else:
+            parser.error(f"No artifact '{args.artifact}' for {args.dmp_id}: {', '.join(artifacts)}")
+    elif args.command == "extract":
+        unknown = [d for d in args.dmp_ids if d not in archive.index()]
+        if unknown:
+            parser.error(f"Not in the archive: {', '.join(unknown)}")
+        written = archive.extract(args.output, args.dmp_ids or None)
+        print(f"Extracted {written} files to: {args.output}")
+    elif args.command == "reindex":
+        print(f"Indexed {archive.reindex()} records")
+    else:
+        print(json.dumps(archive.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
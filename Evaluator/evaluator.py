@@ -1,6 +1,10 @@
-import json
 import csv
-from .validation_rules import is_allowed_value
+from .validation_rules import is_allowed_value, build_matchers
+from .serialization import load
+from .projection import project_results, write_compliance_table, write_recommendations
+from .records import (
+    QuestionResult, PRESENT, NOT_PRESENT, COMPLIANT, NON_COMPLIANT, MISSING_VALUE, NOT_APPLICABLE,
+)
 
 def _collect_values(data, path_parts):
     """Collect all values for the given path parts."""
@@ -24,75 +28,102 @@ def _collect_values(data, path_parts):
     return results
 
 
-def load_dmp(file_path):
-    with open(file_path, 'r') as file:
-        dmp = json.load(file)
+def _collect_prefixed(data, path_parts, cache):
+    """Same as ``_collect_values`` but reuses values already collected for a shared path prefix."""
+    if path_parts in cache:
+        return cache[path_parts]
+    if not path_parts:
+        values = [data]
+    else:
+        values = []
+        for parent in _collect_prefixed(data, path_parts[:-1], cache):
+            values.extend(_collect_values(parent, path_parts[-1:]))
+    cache[path_parts] = values
+    return values
+
+
+def compile_questions(mapping_dict):
+    """Precompute the per-question state used by ``evaluate_dmp_against_fip``.
+
+    Returns one ``(question, field_path, path_parts, allowed_values, allowed_set, matchers)``
+    tuple per mapped question, in mapping order.
+    """
+    plan = []
+    for question, details in mapping_dict.items():
+        field_path = details.get("DCS_field") or details.get("maDMP_field", "")
+        allowed_values = details.get("Allowed_values", [])
+        path_parts = tuple(field_path.split('.')) if field_path else ()
+        allowed_set = frozenset(v for v in allowed_values if isinstance(v, str)) if allowed_values else frozenset()
+        plan.append((question, field_path, path_parts, allowed_values, allowed_set, build_matchers(allowed_values)))
+    return plan
+
+
+def unwrap_dmp(dmp):
+    """Return the plan object of a parsed maDMP document."""
     if "dmp" in dmp:
         dmp = dmp["dmp"]
     return dmp
 
-def evaluate_dmp_against_fip(dmp, mapping_dict):
+
+def load_dmp(file_path):
+    return unwrap_dmp(load(file_path))
+
+def evaluate_dmp_against_fip(dmp, mapping_dict, plan=None):
+    if plan is None:
+        plan = compile_questions(mapping_dict)
+    path_cache = {}
     results = []
-    for question, details in mapping_dict.items():
-        field_path = details.get("DCS_field") or details.get("maDMP_field", "")
-        allowed_values = details.get("Allowed_values", [])
+    for question, field_path, path_parts, allowed_values, allowed_set, matchers in plan:
+        details = mapping_dict[question]
         mapping_status = details.get("Mapping_status", "Unmapped")
         ####
         fair_principle = details.get("FAIR_principle")
 
-        # Default values
-        field_status = "Not Present"
-        compliance_status = "Not Applicable"
-        field_value = None
-
         if not field_path:
-            results.append({
-                "FIP_question": question,
-                "DCS_field": None,
-                "field_value": None,
-                "allowed_values": allowed_values,
-                "mapping_status": mapping_status,
-                #####
-                "FAIR_principle": fair_principle,
-                "field_status": field_status,
-                "compliance_status": compliance_status
-            })
+            results.append(QuestionResult(
+                question, None, None, allowed_values, mapping_status,
+                fair_principle, NOT_PRESENT, NOT_APPLICABLE,
+            ))
             continue
 
+        # Default values
+        field_status = NOT_PRESENT
+        compliance_status = NOT_APPLICABLE
+        field_value = None
+
         # Extract all matching values
-        values = _collect_values(dmp, field_path.split('.')) if field_path else []
+        values = _collect_prefixed(dmp, path_parts, path_cache)
 
         if values:
-            field_status = "Present"
+            field_status = PRESENT
             field_value = values
             if allowed_values:
                 compliance_list = [
-                    "Compliant" if is_allowed_value(v, allowed_values) else "Non-compliant"
+                    COMPLIANT if _is_allowed(v, allowed_values, allowed_set, matchers) else NON_COMPLIANT
                     for v in values
                 ]
-                compliance_status = "Compliant" if all(cs == "Compliant" for cs in compliance_list) else "Non-compliant"
+                compliance_status = COMPLIANT if all(cs is COMPLIANT for cs in compliance_list) else NON_COMPLIANT
             else:
                 compliance_list = []
         else:
             compliance_list = []
             if allowed_values:
-                compliance_status = "Missing value"
-
-        results.append({
-            "FIP_question": question,
-            "DCS_field": field_path,
-            "field_value": field_value,
-            "allowed_values": allowed_values,
-            "mapping_status": mapping_status,
-            #####
-            "FAIR_principle": fair_principle,
-            "field_status": field_status,
-            "compliance_status": compliance_status,
-            "compliance_list": compliance_list
-        })
+                compliance_status = MISSING_VALUE
+
+        results.append(QuestionResult(
+            question, field_path, field_value, allowed_values, mapping_status,
+            fair_principle, field_status, compliance_status, compliance_list,
+        ))
 
     return results
 
+
+def _is_allowed(value, allowed_values, allowed_set, matchers):
+    # Exact allowed values need no identifier detection
+    if isinstance(value, str) and value in allowed_set:
+        return True
+    return is_allowed_value(value, allowed_values, matchers)
+
 def summarize_results(results):
     present = sum(1 for r in results if r["field_status"] == "Present")
     compliant = 0
@@ -120,46 +151,7 @@ def save_evaluation_results(results, output_path):
             ])
 
 def save_recommendations(results, output_path):
-    recommendations = []
-    for r in results:
-        if r["field_status"] != "Present" or r["compliance_status"] == "Non-compliant":
-            recommendations.append(
-                f"- Improve or add metadata for: {r['FIP_question']} (Field: {r['DCS_field']}, "
-                f"Compliance: {r['compliance_status']})"
-            )
-    if not recommendations:
-        recommendations.append("All mapped fields are present and compliant!")
-
-    with open(output_path, mode='w', encoding='utf-8') as file:
-        for line in recommendations:
-            file.write(line + "\n")
+    write_recommendations(project_results(results, ("recommendations",))["recommendations"], output_path)
 
 def save_compliance_table(results, output_path):
-    with open(output_path, mode='w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(["FIP Question", "DCS Field", "maDMP Value", "Allowed Values", "Compliant"])
-        for r in results:
-            allowed_values = r["allowed_values"]
-            if isinstance(allowed_values, list):
-                allowed_str = ", ".join(allowed_values)
-            else:
-                allowed_str = allowed_values
-
-            comp = r.get("compliance_list") or r.get("compliance_status")
-            if not allowed_values:
-                compliant = "No choice made by community"
-            else:
-                if isinstance(comp, list):
-                    entries = ["Yes" if c == "Compliant" else "No" for c in comp]
-                    compliant = f"[{', '.join(entries)}]"
-                else:
-                    compliant = "Yes" if comp == "Compliant" else "No"
-
-
-            writer.writerow([
-                r["FIP_question"],
-                r["DCS_field"],
-                json.dumps(r["field_value"], ensure_ascii=False),
-                allowed_str,
-                compliant
-            ])
+    write_compliance_table(project_results(results, ("compliance",))["compliance"], output_path)
@@ -1,5 +1,28 @@
-import validators
-import requests
+import time
+
+from . import network
+from .lazy import lazy_import
+from .profiling import incr
+from .url_inventory import UrlInventory, DATASET_ID, HOST_URL, LICENSE_URL
+
+# Imported on first use, so runs that never reach these checks do not pay for it
+requests = lazy_import("requests")
+
+# HEAD statuses are remembered in this process for URL_STATUS_TTL seconds (0,
+# the default: not remembered), so a long-running process such as
+# evaluate_dmp.py --watch only checks the URLs that are new after an edit
+URL_STATUS_TTL = 0.0
+_url_statuses = {}
+
+
+# How each kind of URL is named in the issues
+_URL_LABELS = {DATASET_ID: "Dataset identifier", HOST_URL: "Host URL", LICENSE_URL: "License URL"}
+
+
+def remember_url_statuses(ttl):
+    global URL_STATUS_TTL
+    URL_STATUS_TTL = ttl
+    _url_statuses.clear()
 
 # Ask Tomasz if I should include more than these
 def is_known_open_license(name):
@@ -119,32 +142,16 @@ def check_completeness(dmp):
 
 
 ########################
-def check_accuracy(dmp):
+def check_accuracy(dmp, urls=None):
     # Fields correctly filled
     issues = []
-    datasets = dmp.get("dataset", [])
-
-    for ds in datasets:
-        title = ds.get("title", "Unknown dataset")
-
-        # Check dataset identifier format
-        dataset_id = ds.get("dataset_id", {}).get("identifier", "")
-        if dataset_id and not validators.url(dataset_id):
-            issues.append(f"[{title}] Invalid dataset identifier format: {dataset_id}")
-
-        for dist in ds.get("distribution", []):
-            # Check host URL
-            host = dist.get("host", {})
-            if host:
-                url = host.get("url", "")
-                if url and not validators.url(url):
-                    issues.append(f"[{title}] Invalid host URL format: {url}")
+    if urls is None:
+        urls = UrlInventory(dmp)
 
-            licenses = dist.get("license", [])
-            for lic in licenses:
-                lic_url = lic.get("license_ref", "")
-                if lic_url and not validators.url(lic_url):
-                    issues.append(f"[{title}] Invalid license URL format: {lic_url}")
+    for kind, title, url in urls.occurrences:
+        if not urls.is_valid(url):
+            label = _URL_LABELS[kind]
+            issues.append(f"[{title}] Invalid {label[0].lower() + label[1:]} format: {url}")
 
     # score = 1 if not issues else max(0, 1 - 0.2 * len(issues))
     # return round(score, 2), issues
@@ -152,54 +159,61 @@ def check_accuracy(dmp):
   
     return issues
 
+def _head_status(url):
+    """HTTP status of ``url``, or None when the network policy skips the request."""
+    policy = network.get_policy()
+    if policy == network.ONLINE:
+        if URL_STATUS_TTL:
+            remembered = _url_statuses.get(url)
+            if remembered is not None and time.monotonic() - remembered[1] < URL_STATUS_TTL:
+                incr("url_status_hits")
+                return remembered[0]
+        incr("http_requests")
+        status = requests.head(url, allow_redirects=True, timeout=5).status_code
+        network.url_status_put(url, status)
+        if URL_STATUS_TTL:
+            _url_statuses[url] = (status, time.monotonic())
+        return status
+    if policy == network.CACHED_ONLY:
+        status = network.url_status_get(url)
+        if status is not None:
+            return status
+    network.skip(network.URL_AVAILABILITY)
+    return None
+
 ########################
-def check_availability(dmp):
+def check_availability(dmp, urls=None):
     # are they accesible
-    """Check that identifiers and URLs can be resolved online."""
-    issues = []
-    datasets = dmp.get("dataset", [])
-
-    for ds in datasets:
-        title = ds.get("title", "Unknown dataset")
-
-        dataset_id = ds.get("dataset_id", {}).get("identifier", "")
-        if dataset_id and validators.url(dataset_id):
-            try:
-                r = requests.head(dataset_id, allow_redirects=True, timeout=5)
-                if r.status_code != 200:
-                    issues.append(
-                        f"[{title}] Dataset identifier not resolvable (status {r.status_code}): {dataset_id}"
-                    )
-            except Exception as e:
-                issues.append(f"[{title}] Dataset identifier check error: {str(e)}")
+    """Check that identifiers and URLs can be resolved online.
 
-        for dist in ds.get("distribution", []):
-            host = dist.get("host", {})
-            if host:
-                url = host.get("url", "")
-                if url and validators.url(url):
-                    try:
-                        r = requests.head(url, allow_redirects=True, timeout=5)
-                        if r.status_code != 200:
-                            issues.append(
-                                f"[{title}] Host URL not resolvable (status {r.status_code}): {url}"
-                            )
-                    except Exception as e:
-                        issues.append(f"[{title}] Host URL check error: {str(e)}")
-
-            # Check license URL
-            licenses = dist.get("license", [])
-            for lic in licenses:
-                lic_url = lic.get("license_ref", "")
-                if lic_url and validators.url(lic_url):
-                    try:
-                        r = requests.head(lic_url, allow_redirects=True, timeout=5)
-                        if r.status_code != 200:
-                            issues.append(
-                                f"[{title}] License URL not resolvable (status {r.status_code}): {lic_url}"
-                            )
-                    except Exception as e:
-                        issues.append(f"[{title}] License URL check error: {str(e)}")
+    A URL that occurs several times is requested once.
+    """
+    issues = []
+    if urls is None:
+        urls = UrlInventory(dmp)
+    checked = {}
+
+    for kind, title, url in urls.occurrences:
+        if not urls.is_valid(url):
+            continue
+        label = _URL_LABELS[kind]
+        try:
+            if url in checked:
+                status, error = checked[url]
+            else:
+                try:
+                    status, error = _head_status(url), None
+                except Exception as e:
+                    status, error = None, e
+                # Skipped URLs are asked again, so each occurrence is counted as skipped
+                if status is not None or error is not None:
+                    checked[url] = (status, error)
+            if error is not None:
+                raise error
+            if status is not None and status != 200:
+                issues.append(f"[{title}] {label} not resolvable (status {status}): {url}")
+        except Exception as e:
+            issues.append(f"[{title}] {label} check error: {str(e)}")
 
     # score = 1 if not issues else max(0, 1 - 0.2 * len(issues))
     return issues
@@ -252,8 +266,12 @@ def run_goals_scoring(dmp):
     cs, cs_issues = check_consistency(dmp)
     """
     c_issues = check_completeness(dmp)
-    a_issues = check_accuracy(dmp)
-    av_issues = check_availability(dmp)
+    # Extracted and validated once for the accuracy and availability checks
+    urls = UrlInventory(dmp)
+    a_issues = check_accuracy(dmp, urls)
+    skipped_before = network.skip_count(network.URL_AVAILABILITY)
+    av_issues = check_availability(dmp, urls)
+    av_skipped = network.skip_count(network.URL_AVAILABILITY) - skipped_before
     cs_issues = check_consistency(dmp)
     # g, g_issues = check_guidance_compliance(dmp)
 
@@ -269,6 +287,9 @@ def run_goals_scoring(dmp):
     results["completeness"] = {"issues": c_issues}
     results["accuracy"] = {"issues": a_issues}
     results["availability"] = {"issues": av_issues}
+    if av_skipped:
+        # URLs not checked under the network policy
+        results["availability"]["skipped"] = {"network_policy": network.get_policy(), "urls": av_skipped}
     results["consistency"] = {"issues": cs_issues}
 
     return results
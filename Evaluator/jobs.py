@@ -0,0 +1,261 @@
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+from .serialization import COMPACT, dump
+
+# Background jobs for long evaluations.
+# A job is a JSON-serialisable payload handed to a runner function by a pool
+# of worker threads. Queues are pluggable:
+#   "memory"      - in-process queue (default)
+#   "spool:<dir>" - filesystem spool, a local stand-in for a broker that
+#                   several processes can share
+# Job records (status, timings, result) are persisted as JSON files.
+# A spool keeps a claimed payload until its job is finished; payloads left
+# by a process that died are requeued when a JobManager starts on the spool.
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class MemoryQueue:
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, job_id, payload):
+        self._queue.put((job_id, payload))
+
+    def get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def done(self, job_id):
+        pass
+
+    def recover(self):
+        return []
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # e.g. owned by another user
+    return True
+
+
+class SpoolQueue:
+    """Queue backed by a directory: ``pending/`` holds queued payloads and a
+    worker claims one by atomically renaming it into ``claimed/``, prefixed
+    with its process id. The payload stays there until ``done()``."""
+
+    def __init__(self, directory, poll_interval=0.2):
+        self.pending = os.path.join(directory, "pending")
+        self.claimed = os.path.join(directory, "claimed")
+        self.poll_interval = poll_interval
+        os.makedirs(self.pending, exist_ok=True)
+        os.makedirs(self.claimed, exist_ok=True)
+        self._claimed_paths = {}
+        self._lock = threading.Lock()
+
+    def put(self, job_id, payload):
+        # Names sort by submission time so jobs are claimed in FIFO order
+        name = f"{time.time_ns():020d}_{job_id}.json"
+        tmp_path = os.path.join(self.pending, f".{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+        os.replace(tmp_path, os.path.join(self.pending, name))
+
+    def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            for name in sorted(os.listdir(self.pending)):
+                if name.startswith("."):
+                    continue
+                claimed_path = os.path.join(self.claimed, f"{os.getpid()}.{name}")
+                try:
+                    os.rename(os.path.join(self.pending, name), claimed_path)
+                    with open(claimed_path, "r", encoding="utf-8") as fh:
+                        payload = json.load(fh)
+                except OSError:
+                    continue  # claimed by another worker, or requeued meanwhile
+                job_id = name[:-5].split("_", 1)[1]
+                with self._lock:
+                    self._claimed_paths[job_id] = claimed_path
+                return job_id, payload
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def done(self, job_id):
+        """Drop the payload of a finished job."""
+        with self._lock:
+            claimed_path = self._claimed_paths.pop(job_id, None)
+        if claimed_path is not None:
+            try:
+                os.remove(claimed_path)
+            except FileNotFoundError:
+                pass
+
+    def recover(self):
+        """Requeue the payloads claimed by processes that no longer run; returns their job ids."""
+        job_ids = []
+        for claimed_name in sorted(os.listdir(self.claimed)):
+            pid, _, name = claimed_name.partition(".")
+            if not pid.isdigit() or int(pid) == os.getpid() or _process_alive(int(pid)):
+                continue
+            try:
+                os.rename(os.path.join(self.claimed, claimed_name), os.path.join(self.pending, name))
+            except OSError:
+                continue  # recovered by another process
+            job_ids.append(name[:-5].split("_", 1)[1])
+        return job_ids
+
+    def qsize(self):
+        return sum(1 for name in os.listdir(self.pending) if not name.startswith("."))
+
+
+def make_queue(spec):
+    """Create a queue from a spec string: ``memory`` or ``spool:<directory>``."""
+    if not spec or spec == "memory":
+        return MemoryQueue()
+    if spec.startswith("spool:"):
+        return SpoolQueue(spec[len("spool:"):])
+    raise ValueError(f"Unknown job queue '{spec}', expected 'memory' or 'spool:<directory>'")
+
+
+class JobManager:
+    """Run ``runner(payload)`` for submitted jobs on ``concurrency`` worker threads."""
+
+    def __init__(self, runner, job_queue=None, results_dir="job_results", concurrency=2):
+        self.runner = runner
+        self.queue = job_queue if job_queue is not None else MemoryQueue()
+        self.results_dir = results_dir
+        self.concurrency = concurrency
+        self._records = {}
+        self._changed = threading.Condition()
+        self._workers = []
+        self._stopping = threading.Event()
+
+    def _record_path(self, job_id):
+        return os.path.join(self.results_dir, f"{job_id}.json")
+
+    def _save(self, record):
+        os.makedirs(self.results_dir, exist_ok=True)
+        dump(record, self._record_path(record["job_id"]), COMPACT)
+        with self._changed:
+            if record["status"] in (DONE, FAILED):
+                # Finished records, results included, are served from their file
+                self._records.pop(record["job_id"], None)
+            else:
+                self._records[record["job_id"]] = dict(record)
+            self._changed.notify_all()
+
+    def start(self):
+        with self._changed:
+            if self._workers:
+                return
+            self._stopping.clear()
+            for job_id in self.queue.recover():
+                record = self.status(job_id)
+                if record is not None:
+                    self._save(dict(record, status=QUEUED, started=None))
+            for i in range(self.concurrency):
+                worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, payload, meta=None):
+        """Queue ``payload`` and return the new job record."""
+        self.start()
+        record = {
+            "job_id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "meta": meta or {},
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "error": None,
+            "result": None,
+        }
+        self._save(record)
+        self.queue.put(record["job_id"], payload)
+        return record
+
+    def status(self, job_id):
+        """Return the job record, from memory or from the persisted results."""
+        with self._changed:
+            record = self._records.get(job_id)
+        if record is not None and record["status"] in (DONE, FAILED):
+            return record
+        try:
+            with open(self._record_path(job_id), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return record
+
+    def wait(self, job_id, timeout):
+        """Long-poll: block until the job finishes or ``timeout`` seconds pass."""
+        deadline = time.monotonic() + timeout
+        record = self.status(job_id)
+        while record is not None and record["status"] not in (DONE, FAILED):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._changed:
+                # Short waits so jobs finished by other processes sharing a spool are noticed
+                self._changed.wait(min(remaining, 0.5))
+            record = self.status(job_id)
+        return record
+
+    def _work(self):
+        while not self._stopping.is_set():
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                continue
+            job_id, payload = item
+            record = dict(self.status(job_id) or {
+                "job_id": job_id, "meta": {}, "submitted": None, "error": None, "result": None,
+            })
+            try:
+                record.update(status=RUNNING, started=time.time())
+                self._save(record)
+                try:
+                    result = self.runner(payload)
+                except Exception as e:
+                    record.update(status=FAILED, error=f"{e}", traceback=traceback.format_exc())
+                else:
+                    record.update(status=DONE, result=result)
+                record["finished"] = time.time()
+                self._save(record)
+            except Exception as e:
+                # e.g. an unwritable results_dir or a result that cannot be encoded
+                record.update(status=FAILED, result=None, finished=time.time(),
+                              error=f"Could not save the job record: {e}", traceback=traceback.format_exc())
+                try:
+                    self._save(record)
+                except Exception:
+                    with self._changed:
+                        self._records[job_id] = dict(record)
+                        self._changed.notify_all()
+            finally:
+                self.queue.done(job_id)
@@ -0,0 +1,33 @@
+import importlib
+import threading
+
+# Deferred imports for heavy dependencies (requests, validators) that only
+# some stages need. ``requests = lazy_import("requests")`` keeps a module
+# attribute that tests and benchmarks can patch, while the real import
+# happens on first attribute access.
+
+
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return a stand-in for module ``name`` that imports it on first use."""
+    return _LazyModule(name)
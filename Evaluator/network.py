@@ -0,0 +1,168 @@
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from .serialization import dump, load
+
+# Network policy for the checks that reach external services: the SPDX
+# license list (validation_rules), URL availability HEAD requests
+# (goals_checks) and nanopublication fetches (scripts/nanopub_to_mapping).
+#   online      - use the network; SPDX lists and nanopubs are also written to the
+#                 cache, one file each, and URL statuses to one SQLite table
+#   cached-only - never use the network, answer from the cache where possible
+#                 (URL statuses only while younger than URL_STATUS_MAX_AGE)
+#   offline     - never use the network or the cache, so results only depend on the inputs
+# A check that cannot run under the policy is skipped and counted in the
+# current scope (see network_policy()); callers report the counts with the
+# results. The default comes from DMP_EVAL_NETWORK or set_default_policy().
+
+ONLINE = "online"
+CACHED_ONLY = "cached-only"
+OFFLINE = "offline"
+POLICIES = (ONLINE, CACHED_ONLY, OFFLINE)
+
+# Names under which skipped checks are counted
+SPDX_LICENSE_CHECK = "spdx_license_check"
+URL_AVAILABILITY = "url_availability"
+NANOPUB_FETCH = "nanopub_fetch"
+
+CACHE_DIRECTORY = os.environ.get(
+    "DMP_EVAL_NETWORK_CACHE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FIP_Mapping", ".cache", "network"),
+)
+
+# Cached URL statuses older than this many seconds are neither used nor kept
+URL_STATUS_MAX_AGE = float(os.environ.get("DMP_EVAL_URL_STATUS_MAX_AGE", 7 * 86400))
+
+_default_policy = os.environ.get("DMP_EVAL_NETWORK", ONLINE)
+_policy = contextvars.ContextVar("network_policy", default=None)
+_skipped = contextvars.ContextVar("network_skipped", default=None)
+_skip_lock = threading.Lock()
+
+
+def _check(policy):
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown network policy '{policy}', expected one of {', '.join(POLICIES)}")
+    return policy
+
+
+def set_default_policy(policy):
+    global _default_policy
+    _default_policy = _check(policy)
+
+
+def get_default_policy():
+    return _default_policy
+
+
+def get_policy():
+    """The policy of the current scope, or the default one."""
+    return _policy.get() or _default_policy
+
+
+@contextmanager
+def network_policy(policy=None):
+    """Run the enclosed block under ``policy`` (default: the default policy).
+
+    Yields a Counter of the checks skipped inside the block. Worker threads
+    started in the block must run in a copy of the caller's context
+    (``contextvars.copy_context()``) to share the policy and the counter.
+    """
+    skipped = Counter()
+    policy_token = _policy.set(_check(policy or _default_policy))
+    skipped_token = _skipped.set(skipped)
+    try:
+        yield skipped
+    finally:
+        _skipped.reset(skipped_token)
+        _policy.reset(policy_token)
+
+
+def skip(check):
+    """Count ``check`` as skipped in the current scope."""
+    skipped = _skipped.get()
+    if skipped is None:
+        skipped = Counter()
+        _skipped.set(skipped)
+    with _skip_lock:
+        skipped[check] += 1
+
+
+def skip_count(check):
+    skipped = _skipped.get()
+    return skipped[check] if skipped is not None else 0
+
+
+def skipped_checks():
+    """{check: times skipped} for the current scope."""
+    return dict(_skipped.get() or {})
+
+
+def _cache_path(kind, key):
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIRECTORY, kind, f"{digest}.json")
+
+
+def cache_get(kind, key):
+    """Cached response for ``key``, or None."""
+    try:
+        return load(_cache_path(kind, key))
+    except (OSError, ValueError):
+        return None
+
+
+def cache_put(kind, key, value):
+    path = _cache_path(kind, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        dump(value, path)
+    except OSError:
+        pass  # the cache is best effort
+
+
+# Connection to <cache>/url_status.sqlite, shared by the threads of a process
+_url_status_db = None
+_url_status_lock = threading.Lock()
+
+
+def _url_status_connection():
+    global _url_status_db
+    if _url_status_db is None:
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(CACHE_DIRECTORY, "url_status.sqlite"), timeout=5,
+                               check_same_thread=False)
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS url_status"
+                         " (url TEXT PRIMARY KEY, status INTEGER NOT NULL, checked_at REAL NOT NULL)")
+            # Expired statuses are dropped, so the table holds recently checked URLs only
+            conn.execute("DELETE FROM url_status WHERE checked_at < ?", (time.time() - URL_STATUS_MAX_AGE,))
+        _url_status_db = conn
+    return _url_status_db
+
+
+def url_status_get(url):
+    """Cached HTTP status of ``url`` if checked within URL_STATUS_MAX_AGE, else None."""
+    try:
+        with _url_status_lock:
+            row = _url_status_connection().execute(
+                "SELECT status FROM url_status WHERE url = ? AND checked_at >= ?",
+                (url, time.time() - URL_STATUS_MAX_AGE),
+            ).fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    return row[0] if row else None
+
+
+def url_status_put(url, status):
+    try:
+        with _url_status_lock:
+            conn = _url_status_connection()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO url_status VALUES (?, ?, ?)", (url, status, time.time()))
+    except (OSError, sqlite3.Error):
+        pass  # the cache is best effort
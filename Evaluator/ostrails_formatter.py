@@ -2,6 +2,9 @@ import json
 from datetime import datetime
 import os
 
+from .profiling import stage
+from .serialization import dump, dumps
+
 DEFAULT_VERSION = "1.0.0"
 DEFAULT_LICENSE = "https://creativecommons.org/publicdomain/zero/1.0/"
 DEFAULT_REPOSITORY = "https://github.com/bernardobap21/DMP-Evaluation"
@@ -23,8 +26,49 @@ BENCHMARK_TITLES = {
 }
 
 
-def export_fip_results(results, dmp_id, dmp_title, output_dir, metric_version=DEFAULT_VERSION):
-    
+def build_static_nodes(results, metric_version=DEFAULT_VERSION):
+    """Build the Metric and Test nodes, which only depend on the mapping, for each result.
+
+    Returns a list of ``(metric_node, test_node)`` pairs aligned with ``results``.
+    """
+    nodes = []
+    for res in results:
+        metric_uri = f"#{res['metric_id']}"
+        metric = {
+            "@id": metric_uri,
+            "@type": "dqv:Metric",
+            "dcterms:identifier": res["metric_id"],
+            "dcterms:title": res["metric_label"],
+            "dcterms:description": res["metric_label"],
+            "dcat:version": metric_version,
+        }
+
+        test_uri = f"#{res['test_id']}"
+        allowed_vals = res.get("benchmark", [])
+        if not isinstance(allowed_vals, list):
+            allowed_vals = [allowed_vals] if allowed_vals else []
+
+        description = (
+            f"DCS field: {res['subject']}; allowed_value from the community: "
+            f"{json.dumps(allowed_vals, ensure_ascii=False)}"
+        )
+        test_node = {
+            "@id": test_uri,
+            "@type": ["ftr:Test", "dcat:DataService", "prov:Agent"],
+            "dcterms:identifier": res["test_id"],
+            "dcterms:title": res["metric_label"],
+            "dcterms:description": description,
+            "dcterms:license": DEFAULT_LICENSE,
+            "dcat:version": metric_version,
+            "sio:is-implementation-of": metric_uri,
+            "ftr:testMetric": metric_uri,
+        }
+        nodes.append((metric, test_node))
+    return nodes
+
+
+def build_fip_document(results, dmp_id, dmp_title, metric_version=DEFAULT_VERSION, static_nodes=None):
+    """Build the OSTrails JSON-LD document (``@context`` and ``@graph``) for the results."""
     graph = []
 
     dmp_entity_id = "#input_dmp"
@@ -91,16 +135,11 @@ def export_fip_results(results, dmp_id, dmp_title, output_dir, metric_version=DE
     benchmarks = {}
     ###
 
-    for res in results:
-        metric_uri = f"#{res['metric_id']}"
-        metric = {
-            "@id": metric_uri,
-            "@type": "dqv:Metric",
-            "dcterms:identifier": res["metric_id"],
-            "dcterms:title": res["metric_label"],
-            "dcterms:description": res["metric_label"],
-            "dcat:version": metric_version,
-        }
+    if static_nodes is None or len(static_nodes) != len(results):
+        static_nodes = build_static_nodes(results, metric_version)
+
+    for res, (metric, test_node) in zip(results, static_nodes):
+        metric_uri = metric["@id"]
         graph.append(metric)
 
         #####
@@ -122,26 +161,7 @@ def export_fip_results(results, dmp_id, dmp_title, output_dir, metric_version=DE
                 benchmarks[principle]["ftr:hasAssociatedMetric"].append(metric_uri)
         ####
 
-        test_uri = f"#{res['test_id']}"
-        allowed_vals = res.get("benchmark", [])
-        if not isinstance(allowed_vals, list):
-            allowed_vals = [allowed_vals] if allowed_vals else []
-
-        description = (
-            f"DCS field: {res['subject']}; allowed_value from the community: "
-            f"{json.dumps(allowed_vals, ensure_ascii=False)}"
-        )
-        test_node = {
-            "@id": test_uri,
-            "@type": ["ftr:Test", "dcat:DataService", "prov:Agent"],
-            "dcterms:identifier": res["test_id"],
-            "dcterms:title": res["metric_label"],
-            "dcterms:description": description,
-            "dcterms:license": DEFAULT_LICENSE,
-            "dcat:version": metric_version,
-            "sio:is-implementation-of": metric_uri,
-            "ftr:testMetric": metric_uri,
-        }
+        test_uri = test_node["@id"]
         graph.append(test_node)
 
         """"
@@ -210,10 +230,52 @@ def export_fip_results(results, dmp_id, dmp_title, output_dir, metric_version=DE
         "@graph": graph,
         
     }
+    return out
+
+
+# Nodes that only depend on the mapping (and are the same in every evaluation with it)
+MAPPING_NODE_TYPES = {"dqv:Metric", "ftr:Test", "ftr:Benchmark", "ftr:Algorithm", "vcard:Organization"}
+
+
+def compact_fip_document(document):
+    """The document without the nodes that only depend on the mapping.
+
+    The remaining nodes (input maDMP, results, result set and execution
+    activity) still refer to the metrics and tests by ``@id``.
+    """
+    def mapping_node(node):
+        types = node.get("@type", [])
+        types = types if isinstance(types, list) else [types]
+        return any(t in MAPPING_NODE_TYPES for t in types)
+
+    return {
+        "@context": document["@context"],
+        "@graph": [node for node in document["@graph"] if not mapping_node(node)],
+    }
+
+
+def export_fip_results(results, dmp_id, dmp_title, output_dir, metric_version=DEFAULT_VERSION, static_nodes=None,
+                       json_format=None, triple_store=None, mapping="", artifacts=None):
+    """Write the JSON-LD results file; with ``triple_store`` (an
+    ``Evaluator.triple_store.TripleStore``) the document is also stored as
+    the named graph of (``dmp_id``, ``mapping``). With ``artifacts`` (a dict)
+    the serialized document is put in it under the file name instead, and
+    the file name is returned."""
+    with stage("ostrails_build"):
+        out = build_fip_document(results, dmp_id, dmp_title, metric_version, static_nodes)
+
+    with stage("jsonld_write"):
+        file_name = f"{dmp_id}_ostrails_results.jsonld"
+        if artifacts is not None:
+            artifacts[file_name] = dumps(out, json_format)
+            output_path = file_name
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+            output_path = os.path.join(output_dir, file_name)
+            dump(out, output_path, json_format)
 
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, f"{dmp_id}_ostrails_results.jsonld")
-    with open(output_path, "w", encoding="utf-8") as fh:
-        json.dump(out, fh, indent=2)
+    if triple_store is not None:
+        with stage("triple_store"):
+            triple_store.add_document(dmp_id, out, os.path.basename(mapping))
 
     return output_path
@@ -0,0 +1,250 @@
+import argparse
+import glob
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+
+from .profiling import incr
+from .serialization import COMPACT, atomic_open, dumps, loads
+
+# Packed corpus: the maDMPs of a corpus in one ``.dmppack`` file, so runs
+# that read the same corpus again (batch re-scoring, one pass per mapping)
+# do not open and parse thousands of small files each time:
+#   header   - magic, format version, offset and length of the index
+#   records  - one per maDMP, as compact JSON ("json") or pickled, i.e.
+#              already parsed ("pickle"), back to back
+#   index    - JSON at the end: encoding, inputs and, per maDMP id (the file
+#              name without extension), offset, length, source, size, mtime
+# Readers mmap the pack and decode a record straight from a memoryview of
+# the mapping, without reading the rest of the file. Packing again updates
+# the pack: records of files whose size and mtime are unchanged are copied
+# over as bytes, only new and changed files are parsed, and removed files
+# are dropped. The new pack replaces the old one atomically, so a reader
+# that has the old one mapped keeps a consistent view.
+
+PACK_MAGIC = b"DMPK"
+PACK_VERSION = 1
+PACK_EXTENSION = ".dmppack"
+_HEADER = struct.Struct("<4sHxxQQ")
+
+JSON = "json"
+PICKLE = "pickle"
+ENCODINGS = (JSON, PICKLE)
+
+# Packs opened by this process, keyed by absolute path
+_OPENED = {}
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class PackedCorpus:
+    """Read access to a pack; ``get(dmp_id)`` returns the parsed maDMP."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fh:
+            self.signature = _signature(path)
+            size = os.fstat(fh.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{path} is not a maDMP pack")
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_offset, index_length = _HEADER.unpack_from(self._map)
+        if magic != PACK_MAGIC or version != PACK_VERSION or index_offset + index_length > size:
+            self._map.close()
+            raise ValueError(f"{path} is not a maDMP pack of format version {PACK_VERSION}")
+        self._view = memoryview(self._map)
+        index = loads(self._view[index_offset:index_offset + index_length])
+        self.encoding = index["encoding"]
+        self.inputs = index["inputs"]
+        self.entries = index["records"]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, dmp_id):
+        return dmp_id in self.entries
+
+    def ids(self):
+        return list(self.entries)
+
+    def raw(self, dmp_id):
+        """The encoded record of ``dmp_id`` as a memoryview of the mapped file; KeyError if absent."""
+        entry = self.entries[dmp_id]
+        return self._view[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def get(self, dmp_id):
+        """The maDMP document stored as ``dmp_id`` (as in its file, not unwrapped)."""
+        incr("pack_reads")
+        data = self.raw(dmp_id)
+        if self.encoding == PICKLE:
+            return pickle.loads(data)
+        return loads(data)
+
+    def close(self):
+        # Views handed out by raw() keep the mapping alive until they are released
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_pack(path):
+    """The pack at ``path``, shared within the process and reopened when the file was replaced."""
+    key = os.path.abspath(path)
+    pack = _OPENED.get(key)
+    if pack is not None:
+        if pack.signature == _signature(path):
+            return pack
+        pack.close()
+    pack = _OPENED[key] = PackedCorpus(path)
+    return pack
+
+
+def input_files(paths):
+    """maDMP files of ``paths``: files, globs or directories (their ``*.json``)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.json"))))
+        else:
+            files.extend(sorted(glob.glob(path)) or [path])
+    return files
+
+
+def _encode(document, encoding):
+    if encoding == PICKLE:
+        return pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL)
+    return dumps(document, COMPACT)
+
+
+def build_pack(pack_path, inputs=None, encoding=None):
+    """Pack the maDMPs of ``inputs`` (default: the inputs the pack was built from) into ``pack_path``.
+
+    ``encoding`` defaults to that of the existing pack, else JSON. Returns
+    {"added", "updated", "unchanged", "removed"} counts and the "invalid" files.
+    """
+    previous = None
+    if os.path.exists(pack_path):
+        try:
+            previous = PackedCorpus(pack_path)
+        except ValueError:
+            previous = None
+    if inputs is None:
+        if previous is None:
+            raise ValueError(f"No inputs given and no pack at {pack_path} to update")
+        inputs = previous.inputs
+    inputs = [os.path.abspath(p) for p in inputs]
+    if encoding is None:
+        encoding = previous.encoding if previous is not None else JSON
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown pack encoding '{encoding}', expected one of {', '.join(ENCODINGS)}")
+    reuse = previous is not None and previous.encoding == encoding
+
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "invalid": []}
+    records = {}
+    try:
+        with atomic_open(pack_path, "wb") as fh:
+            fh.write(b"\0" * _HEADER.size)
+            offset = _HEADER.size
+            for path in input_files(inputs):
+                dmp_id = os.path.splitext(os.path.basename(path))[0]
+                if dmp_id in records:
+                    raise ValueError(f"Two maDMPs named '{dmp_id}': {records[dmp_id]['source']} and {path}")
+                old = previous.entries.get(dmp_id) if previous is not None else None
+                try:
+                    stat = os.stat(path)
+                    unchanged = (reuse and old is not None and old["source"] == path
+                                 and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns)
+                    if unchanged:
+                        data = previous.raw(dmp_id)
+                    else:
+                        with open(path, "rb") as src:
+                            data = _encode(loads(src.read()), encoding)
+                except FileNotFoundError:
+                    continue  # deleted since it was listed: counted as removed
+                except (OSError, ValueError) as e:
+                    stats["invalid"].append(f"{path}: {e}")
+                    continue
+                stats["unchanged" if unchanged else "updated" if old is not None else "added"] += 1
+                fh.write(data)
+                records[dmp_id] = {
+                    "offset": offset, "length": len(data), "source": path,
+                    "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                }
+                offset += len(data)
+                if isinstance(data, memoryview):
+                    data.release()
+            index = json.dumps({"encoding": encoding, "inputs": inputs, "records": records},
+                               ensure_ascii=False).encode("utf-8")
+            fh.write(index)
+            fh.seek(0)
+            fh.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, offset, len(index)))
+    finally:
+        if previous is not None:
+            previous.close()
+    if previous is not None:
+        stats["removed"] = len(set(previous.entries) - set(records))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack a corpus of maDMPs into one memory-mapped file")
+    parser.add_argument("pack", help=f"Pack file (e.g. corpus{PACK_EXTENSION})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Create or update the pack")
+    build.add_argument("--input", nargs="+", help="maDMP files, globs or directories (default: those of the pack)")
+    build.add_argument("--encoding", choices=ENCODINGS, default=None,
+                       help="json: compact JSON records; pickle: pre-parsed records (default: json, or that of the pack)")
+    sub.add_parser("list", help="List the packed maDMPs")
+    show = sub.add_parser("show", help="Print a packed maDMP as JSON")
+    show.add_argument("dmp_id")
+    sub.add_parser("stats", help="Print the size of the pack")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        try:
+            stats = build_pack(args.pack, args.input, args.encoding)
+        except ValueError as e:
+            parser.error(str(e))
+        for error in stats.pop("invalid"):
+            print(f"Skipped invalid maDMP {error}", file=sys.stderr)
+        print(", ".join(f"{count} {what}" for what, count in stats.items()))
+        return 0
+
+    try:
+        pack = PackedCorpus(args.pack)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    with pack:
+        if args.command == "list":
+            for dmp_id, entry in pack.entries.items():
+                print(f"{dmp_id}\t{entry['length']}\t{entry['source']}")
+        elif args.command == "show":
+            if args.dmp_id not in pack:
+                parser.error(f"No maDMP '{args.dmp_id}' in {args.pack}")
+            sys.stdout.buffer.write(dumps(pack.get(args.dmp_id)) + b"\n")
+        else:
+            print(json.dumps({
+                "maDMPs": len(pack),
+                "encoding": pack.encoding,
+                "bytes": os.path.getsize(args.pack),
+                "source_bytes": sum(entry["size"] for entry in pack.entries.values()),
+            }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
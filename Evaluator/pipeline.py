@@ -0,0 +1,55 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Runs the stages of one evaluation as a small dependency graph on a thread
+# pool. A step starts as soon as the steps it depends on have finished and
+# gets their results as arguments, so the network-bound goals checks overlap
+# the CPU-bound FIP evaluation and each report is written as soon as its
+# inputs exist. Wall time then tends to the longest chain of steps rather
+# than the sum of all of them. Steps run in a copy of the caller's context,
+# so they see the caller's network policy.
+
+
+class Pipeline:
+    def __init__(self):
+        self._steps = {}
+
+    def add(self, name, func, after=()):
+        """Add step ``name`` running ``func(*results of after)``."""
+        if name in self._steps:
+            raise ValueError(f"Duplicate pipeline step '{name}'")
+        for dep in after:
+            if dep not in self._steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+        self._steps[name] = (func, tuple(after))
+        return self
+
+    def run(self, max_workers=None):
+        """Run every step and return {name: result}.
+
+        The first failing step's exception is raised once the steps already
+        running have finished; steps that depend on it are not started.
+        With ``max_workers=1`` the steps run in the calling thread, in the
+        order they were added.
+        """
+        results = {}
+        if max_workers == 1:
+            for name, (func, after) in self._steps.items():
+                results[name] = func(*[results[dep] for dep in after])
+            return results
+
+        pending = dict(self._steps)
+        running = {}
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=max_workers or len(pending) or 1,
+                                thread_name_prefix="pipeline") as pool:
+            while pending or running:
+                for name, (func, after) in list(pending.items()):
+                    if all(dep in results for dep in after):
+                        del pending[name]
+                        args = [results[dep] for dep in after]
+                        running[pool.submit(context.copy().run, func, *args)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Lightweight process-wide instrumentation: cumulative timers per pipeline
+# stage and plain event counters (regex calls, SPDX lookups, HTTP requests,
+# cache hits, ...). Counter increments are not locked; under heavy threading
+# a count may occasionally be lost, which is acceptable for metrics.
+
+_stage_lock = threading.Lock()
+_stage_seconds = {}
+_stage_calls = Counter()
+_counters = Counter()
+
+METRIC_PREFIX = "dmp_eval"
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block and add it to the totals of stage ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _stage_lock:
+            _stage_seconds[name] = _stage_seconds.get(name, 0.0) + elapsed
+            _stage_calls[name] += 1
+
+
+def incr(name, amount=1):
+    _counters[name] += amount
+
+
+def reset():
+    with _stage_lock:
+        _stage_seconds.clear()
+        _stage_calls.clear()
+    _counters.clear()
+
+
+def snapshot():
+    """Return {"stages": {name: {"calls", "seconds"}}, "counters": {name: count}}."""
+    with _stage_lock:
+        stages = {
+            name: {"calls": _stage_calls[name], "seconds": seconds}
+            for name, seconds in _stage_seconds.items()
+        }
+    return {"stages": stages, "counters": dict(_counters)}
+
+
+def format_breakdown(data=None):
+    """Human readable table of stage timings and counters."""
+    data = data or snapshot()
+    stages = data["stages"]
+    total = sum(s["seconds"] for s in stages.values())
+    lines = [f"{'Stage':<24}{'Calls':>8}{'Time (ms)':>12}{'Share':>9}"]
+    for name, s in stages.items():
+        share = s["seconds"] / total * 100 if total else 0.0
+        lines.append(f"{name:<24}{s['calls']:>8}{s['seconds'] * 1000:>12.2f}{share:>8.1f}%")
+    lines.append(f"{'total':<24}{'':>8}{total * 1000:>12.2f}")
+    if data["counters"]:
+        lines.append("")
+        lines.append(f"{'Counter':<24}{'Count':>8}")
+        for name, count in sorted(data["counters"].items()):
+            lines.append(f"{name:<24}{count:>8}")
+    return "\n".join(lines)
+
+
+def prometheus_text(data=None):
+    """Render the current metrics in the Prometheus text exposition format."""
+    data = data or snapshot()
+    lines = [
+        f"# HELP {METRIC_PREFIX}_stage_seconds_total Time spent in each evaluation stage.",
+        f"# TYPE {METRIC_PREFIX}_stage_seconds_total counter",
+    ]
+    for name, s in sorted(data["stages"].items()):
+        lines.append(f'{METRIC_PREFIX}_stage_seconds_total{{stage="{name}"}} {s["seconds"]:.6f}')
+    lines += [
+        f"# HELP {METRIC_PREFIX}_stage_calls_total Number of times each evaluation stage ran.",
+        f"# TYPE {METRIC_PREFIX}_stage_calls_total counter",
+    ]
+    for name, s in sorted(data["stages"].items()):
+        lines.append(f'{METRIC_PREFIX}_stage_calls_total{{stage="{name}"}} {s["calls"]}')
+    for name, count in sorted(data["counters"].items()):
+        metric = f"{METRIC_PREFIX}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {count}")
+    return "\n".join(lines) + "\n"
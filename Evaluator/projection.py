@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+
+from .serialization import atomic_open
+from .records import (
+    FtrRecord, PRESENT, COMPLIANT, NON_COMPLIANT, NOT_APPLICABLE, PASS, FAIL, INDETERMINATE,
+)
+
+# Output views of an evaluation (OSTrails test records, compliance table,
+# recommendations, summary counts), built from the results of
+# evaluate_dmp_against_fip in a single pass so the CLI and the API share one
+# definition of each view.
+
+VIEWS = ("ftr", "compliance", "recommendations", "summary")
+
+NO_CHOICE = "No choice made by community"
+ALL_COMPLIANT = "All mapped fields are present and compliant!"
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _ftr_status(r, comp):
+    # Questions that cannot be checked (no DCS field, or no allowed values) are indeterminate
+    if r["compliance_status"] == NOT_APPLICABLE or not r["allowed_values"]:
+        return INDETERMINATE
+    return PASS if r["field_status"] == PRESENT and comp == COMPLIANT else FAIL
+
+
+def _compliant_text(r):
+    allowed_values = r["allowed_values"]
+    if not allowed_values:
+        return NO_CHOICE
+    comp = r.get("compliance_list") or r["compliance_status"]
+    if isinstance(comp, list):
+        return f"[{', '.join('Yes' if c == COMPLIANT else 'No' for c in comp)}]"
+    return "Yes" if comp == COMPLIANT else "No"
+
+
+def project_results(results, views=VIEWS):
+    """Build the requested ``views`` of the evaluation ``results`` in one pass.
+
+    Returns a dict with a key per requested view:
+
+    * ``ftr`` - ``FtrRecord`` list for ``export_fip_results``
+    * ``compliance`` - ``(result, value_json, allowed_str, compliant)`` rows,
+      see ``write_compliance_table`` and ``compliance_json``
+    * ``recommendations`` - recommendation lines
+    * ``summary`` - ``(present, compliant, total)`` counts
+    """
+    want_ftr = "ftr" in views
+    want_compliance = "compliance" in views
+    want_recommendations = "recommendations" in views
+    ftr, compliance, recommendations = [], [], []
+    present = compliant = 0
+
+    for idx, r in enumerate(results, start=1):
+        field_value = r["field_value"]
+        field_status = r["field_status"]
+        compliance_status = r["compliance_status"]
+        if field_status == PRESENT:
+            present += 1
+        if compliance_status == COMPLIANT:
+            compliant += 1
+
+        value_json = _dumps(field_value) if want_ftr or want_compliance else None
+
+        if want_ftr:
+            comment = (
+                f"Field status: {field_status}; maDMP value: {value_json}; "
+                f"compliance: {compliance_status}"
+            )
+            values = field_value if isinstance(field_value, list) else [field_value]
+            comp_list = r.get("compliance_list") or compliance_status
+            if not isinstance(comp_list, list):
+                comp_list = [comp_list]
+            log_val = []
+            status_vals = []
+            for val, comp in zip(values, comp_list):
+                log_val.append(_dumps(val) if isinstance(val, (dict, list)) else str(val))
+                status_vals.append(_ftr_status(r, comp))
+            ftr.append(FtrRecord(idx, r, comment, log_val, status_vals))
+
+        if want_compliance:
+            allowed_values = r["allowed_values"]
+            allowed_str = ", ".join(allowed_values) if isinstance(allowed_values, list) else allowed_values
+            compliance.append((r, value_json, allowed_str, _compliant_text(r)))
+
+        if want_recommendations and (field_status != PRESENT or compliance_status == NON_COMPLIANT):
+            recommendations.append(
+                f"- Improve or add metadata for: {r['FIP_question']} (Field: {r['DCS_field']}, "
+                f"Compliance: {compliance_status})"
+            )
+
+    views_out = {}
+    if want_ftr:
+        views_out["ftr"] = ftr
+    if want_compliance:
+        views_out["compliance"] = compliance
+    if want_recommendations:
+        views_out["recommendations"] = recommendations or [ALL_COMPLIANT]
+    if "summary" in views:
+        views_out["summary"] = (present, compliant, len(results))
+    return views_out
+
+
+def build_ftr_records(results):
+    """OSTrails test records for ``export_fip_results``."""
+    return project_results(results, ("ftr",))["ftr"]
+
+
+def compliance_json(rows):
+    """Compliance table as returned by the API, from ``compliance`` rows."""
+    return [
+        {
+            "FIP Question": r["FIP_question"],
+            "DCS Field": r["DCS_field"],
+            "maDMP Value": r["field_value"],
+            "Accepted Values": allowed_str,
+            "Compliant": compliant,
+        }
+        for r, _, allowed_str, compliant in rows
+    ]
+
+
+def build_compliance_json(results):
+    return compliance_json(project_results(results, ("compliance",))["compliance"])
+
+
+def compliance_table_text(rows):
+    """The compliance table CSV, from ``compliance`` rows."""
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer)
+    writer.writerow(["FIP Question", "DCS Field", "maDMP Value", "Allowed Values", "Compliant"])
+    for r, value_json, allowed_str, compliant in rows:
+        writer.writerow([r["FIP_question"], r["DCS_field"], value_json, allowed_str, compliant])
+    return buffer.getvalue()
+
+
+def recommendations_text(lines):
+    return "".join(line + "\n" for line in lines)
+
+
+def write_compliance_table(rows, output_path):
+    with atomic_open(output_path, mode='w', newline='', encoding='utf-8') as file:
+        file.write(compliance_table_text(rows))
+
+
+def write_recommendations(lines, output_path):
+    with atomic_open(output_path, mode='w', encoding='utf-8') as file:
+        file.write(recommendations_text(lines))
@@ -0,0 +1,141 @@
+import sys
+from collections.abc import Mapping
+
+# Compact result records. Evaluations used to produce one dict per question
+# and then one dict per OSTrails test result; these classes keep the same
+# fields in __slots__ and still read like the old dicts (``r["field_status"]``,
+# ``r.get(...)``, ``dict(r)``), so existing callers keep working.
+
+# Status values, interned so every record shares the same string objects
+PRESENT = sys.intern("Present")
+NOT_PRESENT = sys.intern("Not Present")
+COMPLIANT = sys.intern("Compliant")
+NON_COMPLIANT = sys.intern("Non-compliant")
+MISSING_VALUE = sys.intern("Missing value")
+NOT_APPLICABLE = sys.intern("Not Applicable")
+
+PASS = sys.intern("pass")
+FAIL = sys.intern("fail")
+INDETERMINATE = sys.intern("indeterminate")
+
+
+class _Record(Mapping):
+    """Read-only mapping view over ``__slots__`` attributes.
+
+    ``_FIELDS`` lists ``(key, attribute)`` pairs in the order of the old dict;
+    keys listed in ``_OPTIONAL`` are left out while their value is None.
+    """
+
+    __slots__ = ()
+    _FIELDS = ()
+    _OPTIONAL = frozenset()
+
+    def _keys(self):
+        return [
+            key for key, attr in self._FIELDS
+            if key not in self._OPTIONAL or getattr(self, attr) is not None
+        ]
+
+    def __getitem__(self, key):
+        attr = self._ATTRS.get(key)
+        if attr is None:
+            raise KeyError(key)
+        value = getattr(self, attr)
+        if value is None and key in self._OPTIONAL:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def to_dict(self):
+        """The record in its original dict shape."""
+        return {key: self[key] for key in self._keys()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._ATTRS = dict(cls._FIELDS)
+
+
+class QuestionResult(_Record):
+    """Outcome of one FIP question for one maDMP (see ``evaluate_dmp_against_fip``)."""
+
+    __slots__ = (
+        "question", "dcs_field", "field_value", "allowed_values", "mapping_status",
+        "fair_principle", "field_status", "compliance_status", "compliance_list",
+    )
+    _FIELDS = (
+        ("FIP_question", "question"),
+        ("DCS_field", "dcs_field"),
+        ("field_value", "field_value"),
+        ("allowed_values", "allowed_values"),
+        ("mapping_status", "mapping_status"),
+        ("FAIR_principle", "fair_principle"),
+        ("field_status", "field_status"),
+        ("compliance_status", "compliance_status"),
+        ("compliance_list", "compliance_list"),
+    )
+    # Questions without a DCS field never had a compliance list
+    _OPTIONAL = frozenset({"compliance_list"})
+
+    def __init__(self, question, dcs_field, field_value, allowed_values, mapping_status,
+                 fair_principle, field_status, compliance_status, compliance_list=None):
+        self.question = question
+        self.dcs_field = dcs_field
+        self.field_value = field_value
+        self.allowed_values = allowed_values
+        self.mapping_status = mapping_status
+        self.fair_principle = fair_principle
+        self.field_status = field_status
+        self.compliance_status = compliance_status
+        self.compliance_list = compliance_list
+
+
+class FtrRecord(_Record):
+    """One OSTrails test result; question fields are read from the underlying ``QuestionResult``."""
+
+    __slots__ = ("metric_id", "test_id", "result", "comment", "log_value", "status")
+    _FIELDS = (
+        ("metric_id", "metric_id"),
+        ("metric_label", "metric_label"),
+        ("test_id", "test_id"),
+        ("benchmark", "benchmark"),
+        ("fair_principle", "fair_principle"),
+        ("comment", "comment"),
+        ("log_value", "log_value"),
+        ("subject", "subject"),
+        ("status", "status"),
+    )
+
+    def __init__(self, index, result, comment, log_value, status):
+        self.metric_id = f"FIP{str(index).zfill(2)}.Q{index}"
+        self.test_id = f"Test_{self.metric_id}"
+        self.result = result
+        self.comment = comment
+        self.log_value = log_value
+        self.status = status
+
+    @property
+    def metric_label(self):
+        return self.result["FIP_question"]
+
+    @property
+    def benchmark(self):
+        benchmark = self.result.get("allowed_values", [])
+        if benchmark and not isinstance(benchmark, list):
+            benchmark = [benchmark]
+        return benchmark
+
+    @property
+    def fair_principle(self):
+        return self.result.get("FAIR_principle")
+
+    @property
+    def subject(self):
+        return self.result["DCS_field"]
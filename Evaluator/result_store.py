@@ -0,0 +1,367 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Embedded store of evaluation outcomes (SQLite), so results can be queried
+# across a corpus without re-parsing the files in results/. Each evaluation
+# is keyed by DMP ID, content hash, mapping file and FIP version and keeps
+# its per-question statuses, per-value compliance, goal issues and timings.
+# ``file_id`` is the maDMP file name without extension, the key used by the
+# triple store, the artifact archive and the sharded result files.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    dmp_id TEXT NOT NULL,
+    file_id TEXT,
+    dmp_title TEXT,
+    content_hash TEXT NOT NULL,
+    mapping TEXT NOT NULL,
+    fip_version TEXT,
+    evaluated_at REAL NOT NULL,
+    present INTEGER NOT NULL,
+    compliant INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    timings TEXT
+);
+CREATE TABLE IF NOT EXISTS question_results (
+    evaluation_id INTEGER NOT NULL REFERENCES evaluations(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    principle TEXT,
+    dcs_field TEXT,
+    mapping_status TEXT,
+    field_status TEXT NOT NULL,
+    compliance_status TEXT NOT NULL,
+    PRIMARY KEY (evaluation_id, position)
+);
+CREATE TABLE IF NOT EXISTS value_results (
+    evaluation_id INTEGER NOT NULL REFERENCES evaluations(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    value_index INTEGER NOT NULL,
+    value TEXT,
+    compliance TEXT,
+    PRIMARY KEY (evaluation_id, position, value_index)
+);
+CREATE TABLE IF NOT EXISTS goal_issues (
+    evaluation_id INTEGER NOT NULL REFERENCES evaluations(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    issue TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_dmp ON evaluations(dmp_id, evaluated_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_hash ON evaluations(content_hash, mapping);
+CREATE INDEX IF NOT EXISTS idx_evaluations_mapping ON evaluations(mapping, evaluated_at);
+CREATE INDEX IF NOT EXISTS idx_questions_principle ON question_results(principle, compliance_status, evaluation_id);
+CREATE INDEX IF NOT EXISTS idx_goal_issues ON goal_issues(evaluation_id, category);
+"""
+# Applied after SCHEMA, once stores created before the column was added have it
+FILE_ID_INDEX = "CREATE INDEX IF NOT EXISTS idx_evaluations_file ON evaluations(file_id, evaluated_at)"
+
+# Compliance statuses counted as a failed question
+FAILING = ("Non-compliant", "Missing value")
+
+
+def content_hash(dmp):
+    """SHA-256 of the maDMP in canonical JSON form (sorted keys, no whitespace)."""
+    canonical = json.dumps(dmp, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def dmp_identifier(dmp, default):
+    """The maDMP's ``dmp_id.identifier``, or ``default`` when it has none."""
+    dmp_id = dmp.get("dmp_id")
+    if isinstance(dmp_id, dict) and dmp_id.get("identifier"):
+        return str(dmp_id["identifier"])
+    return default
+
+
+def make_record(dmp, results, mapping, fip_version=None, dmp_id=None, goals=None,
+                timings=None, evaluated_at=None):
+    """Bundle one evaluation for ``ResultStore.save``.
+
+    ``results`` is the output of ``evaluate_dmp_against_fip``, ``goals`` the
+    output of ``run_goals_scoring`` and ``timings`` a {stage: seconds} dict.
+    ``dmp_id`` is the file name without extension; it is stored as ``file_id``
+    and used as the DMP ID when the maDMP has no ``dmp_id.identifier``.
+    """
+    return {
+        "dmp_id": dmp_identifier(dmp, dmp_id or dmp.get("title", "")),
+        "file_id": dmp_id,
+        "dmp_title": dmp.get("title"),
+        "content_hash": content_hash(dmp),
+        "mapping": os.path.basename(mapping),
+        "fip_version": fip_version,
+        "evaluated_at": evaluated_at if evaluated_at is not None else time.time(),
+        "results": results,
+        "goals": goals or {},
+        "timings": timings or {},
+    }
+
+
+def _value_text(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return None if value is None else str(value)
+
+
+def parse_since(text):
+    """Turn ``30d``, ``12h``, ``45m`` or an ISO date into a Unix timestamp."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([dhm])", text.strip())
+    if match:
+        amount, unit = float(match.group(1)), match.group(2)
+        return time.time() - amount * {"d": 86400, "h": 3600, "m": 60}[unit]
+    from datetime import datetime
+    return datetime.fromisoformat(text).timestamp()
+
+
+class ResultStore:
+    """SQLite-backed store of evaluation results; safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(evaluations)")}
+            if "file_id" not in columns:
+                self._conn.execute("ALTER TABLE evaluations ADD COLUMN file_id TEXT")
+            self._conn.execute(FILE_ID_INDEX)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _insert(self, record):
+        results = record["results"]
+        present = sum(1 for r in results if r["field_status"] == "Present")
+        compliant = sum(1 for r in results if r["compliance_status"] == "Compliant")
+        cur = self._conn.execute(
+            "INSERT INTO evaluations (dmp_id, file_id, dmp_title, content_hash, mapping, fip_version, evaluated_at,"
+            " present, compliant, total, timings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record["dmp_id"], record.get("file_id"), record["dmp_title"], record["content_hash"], record["mapping"],
+                record["fip_version"], record["evaluated_at"], present, compliant, len(results),
+                json.dumps(record["timings"]),
+            ),
+        )
+        evaluation_id = cur.lastrowid
+        questions, values = [], []
+        for position, r in enumerate(results):
+            questions.append((
+                evaluation_id, position, r["FIP_question"], r.get("FAIR_principle"), r["DCS_field"],
+                r.get("mapping_status"), r["field_status"], r["compliance_status"],
+            ))
+            field_values = r.get("field_value") or []
+            compliance = r.get("compliance_list") or []
+            for value_index, value in enumerate(field_values):
+                comp = compliance[value_index] if value_index < len(compliance) else None
+                values.append((evaluation_id, position, value_index, _value_text(value), comp))
+        self._conn.executemany("INSERT INTO question_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", questions)
+        self._conn.executemany("INSERT INTO value_results VALUES (?, ?, ?, ?, ?)", values)
+        self._conn.executemany(
+            "INSERT INTO goal_issues VALUES (?, ?, ?)",
+            [
+                (evaluation_id, category, str(issue))
+                for category, section in record["goals"].items()
+                for issue in section.get("issues", [])
+            ],
+        )
+        return evaluation_id
+
+    def save(self, record):
+        """Store one record from ``make_record``; returns its evaluation id."""
+        return self.save_many([record])[0]
+
+    def save_many(self, records):
+        """Store a batch of records in a single transaction."""
+        with self._lock, self._conn:
+            return [self._insert(record) for record in records]
+
+    def evaluations(self, dmp_id=None, mapping=None, content_hash=None, since=None, limit=None, file_id=None):
+        """Evaluation summaries, newest first."""
+        clauses, params = [], []
+        filters = (("dmp_id", dmp_id), ("file_id", file_id), ("mapping", mapping), ("content_hash", content_hash))
+        for column, value in filters:
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("evaluated_at >= ?")
+            params.append(since)
+        sql = "SELECT * FROM evaluations"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY evaluated_at DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def find(self, content_hash, mapping):
+        """Latest evaluation of identical content under ``mapping``, or None."""
+        found = self.evaluations(content_hash=content_hash, mapping=os.path.basename(mapping), limit=1)
+        return found[0] if found else None
+
+    def failing(self, principle=None, question=None, mapping=None, since=None):
+        """Evaluations with at least one failing question, e.g. every DMP failing
+        R1.1 under a mapping since a given time. Each row lists the failing questions."""
+        clauses = [f"q.compliance_status IN ({', '.join('?' for _ in FAILING)})"]
+        params = list(FAILING)
+        if principle is not None:
+            clauses.append("q.principle = ?")
+            params.append(principle)
+        if question is not None:
+            clauses.append("q.question = ?")
+            params.append(question)
+        if mapping is not None:
+            clauses.append("e.mapping = ?")
+            params.append(mapping)
+        if since is not None:
+            clauses.append("e.evaluated_at >= ?")
+            params.append(since)
+        sql = (
+            "SELECT e.*, q.question, q.principle, q.compliance_status FROM question_results q"
+            " JOIN evaluations e ON e.id = q.evaluation_id"
+            f" WHERE {' AND '.join(clauses)} ORDER BY e.evaluated_at DESC, q.position"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        failing = {}
+        for row in rows:
+            entry = failing.get(row["id"])
+            if entry is None:
+                entry = failing[row["id"]] = {**self._summary(row), "failing": []}
+            entry["failing"].append({
+                "question": row["question"],
+                "principle": row["principle"],
+                "compliance_status": row["compliance_status"],
+            })
+        return list(failing.values())
+
+    def question_rows(self, mapping=None, since=None):
+        """``(evaluation_id, principle, question, mapping, fip_version, field_status,
+        compliance_status)`` tuples of every stored question result."""
+        clauses, params = [], []
+        if mapping is not None:
+            clauses.append("e.mapping = ?")
+            params.append(mapping)
+        if since is not None:
+            clauses.append("e.evaluated_at >= ?")
+            params.append(since)
+        sql = (
+            "SELECT q.evaluation_id, q.principle, q.question, e.mapping, e.fip_version, q.field_status,"
+            " q.compliance_status FROM question_results q JOIN evaluations e ON e.id = q.evaluation_id"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            cursor.row_factory = None
+            return cursor.fetchall()
+
+    def details(self, evaluation_id):
+        """Full record of one evaluation: questions with their values, and goal issues."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM evaluations WHERE id = ?", (evaluation_id,)).fetchone()
+            if row is None:
+                return None
+            questions = self._conn.execute(
+                "SELECT * FROM question_results WHERE evaluation_id = ? ORDER BY position", (evaluation_id,)
+            ).fetchall()
+            values = self._conn.execute(
+                "SELECT * FROM value_results WHERE evaluation_id = ? ORDER BY position, value_index",
+                (evaluation_id,),
+            ).fetchall()
+            issues = self._conn.execute(
+                "SELECT category, issue FROM goal_issues WHERE evaluation_id = ? ORDER BY rowid", (evaluation_id,)
+            ).fetchall()
+        by_position = {}
+        for v in values:
+            by_position.setdefault(v["position"], []).append({"value": v["value"], "compliance": v["compliance"]})
+        goals = {}
+        for issue in issues:
+            goals.setdefault(issue["category"], []).append(issue["issue"])
+        return {
+            **self._summary(row),
+            "questions": [
+                {
+                    "question": q["question"],
+                    "principle": q["principle"],
+                    "dcs_field": q["dcs_field"],
+                    "mapping_status": q["mapping_status"],
+                    "field_status": q["field_status"],
+                    "compliance_status": q["compliance_status"],
+                    "values": by_position.get(q["position"], []),
+                }
+                for q in questions
+            ],
+            "goal_issues": goals,
+        }
+
+    @staticmethod
+    def _summary(row):
+        return {
+            "id": row["id"],
+            "dmp_id": row["dmp_id"],
+            "file_id": row["file_id"],
+            "dmp_title": row["dmp_title"],
+            "content_hash": row["content_hash"],
+            "mapping": row["mapping"],
+            "fip_version": row["fip_version"],
+            "evaluated_at": row["evaluated_at"],
+            "present": row["present"],
+            "compliant": row["compliant"],
+            "total": row["total"],
+            "timings": json.loads(row["timings"]) if row["timings"] else {},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the evaluation result store")
+    parser.add_argument("--db", default="results/results.sqlite", help="Path of the SQLite result store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    failing = sub.add_parser("failing", help="Evaluations with failing questions")
+    failing.add_argument("--principle", help="FAIR principle, e.g. R1.1")
+    failing.add_argument("--question", help="FIP question text")
+    failing.add_argument("--mapping", help="Mapping file name, e.g. fip_madmp_CLARIN_FIP.json")
+    failing.add_argument("--since", help="Age such as 30d, 12h or 45m, or an ISO date")
+
+    history = sub.add_parser("history", help="Evaluations, newest first")
+    history.add_argument("--dmp-id", help="Only evaluations of this DMP identifier")
+    history.add_argument("--file-id", help="Only evaluations of this maDMP file name (without extension)")
+    history.add_argument("--mapping", help="Mapping file name")
+    history.add_argument("--since", help="Age such as 30d, 12h or 45m, or an ISO date")
+    history.add_argument("--limit", type=int, default=50)
+
+    show = sub.add_parser("show", help="Full stored record of one evaluation")
+    show.add_argument("evaluation_id", type=int)
+    args = parser.parse_args()
+
+    store = ResultStore(args.db)
+    if args.command == "failing":
+        since = parse_since(args.since) if args.since else None
+        output = store.failing(args.principle, args.question, args.mapping, since)
+    elif args.command == "history":
+        since = parse_since(args.since) if args.since else None
+        output = store.evaluations(args.dmp_id, args.mapping, since=since, limit=args.limit, file_id=args.file_id)
+    else:
+        output = store.details(args.evaluation_id)
+    store.close()
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
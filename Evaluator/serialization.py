@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+import re
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, responses are only gzip compressed then
+    brotli = None
+
+# JSON reading and writing for maDMPs, mappings and results. orjson is used
+# when it is installed; output formats:
+#   pretty  - the json.dump(indent=2) output, byte for byte (default)
+#   fast    - indented, encoded by orjson when available (non-ASCII is not escaped)
+#   compact - no whitespace, for machine consumers
+# The default format can be set with DMP_EVAL_JSON_FORMAT or set_default_format().
+# HTTP responses can also be compressed: br (when brotli is installed) or gzip.
+
+PRETTY = "pretty"
+FAST = "fast"
+COMPACT = "compact"
+FORMATS = (PRETTY, FAST, COMPACT)
+
+_default_format = PRETTY
+
+
+def set_default_format(fmt):
+    global _default_format
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown JSON format '{fmt}', expected one of {', '.join(FORMATS)}")
+    _default_format = fmt
+
+
+try:
+    set_default_format(os.environ.get("DMP_EVAL_JSON_FORMAT", PRETTY))
+except ValueError as e:
+    raise ValueError(f"DMP_EVAL_JSON_FORMAT: {e}") from None
+
+
+def get_default_format():
+    return _default_format
+
+
+def _default(obj):
+    # Result records (Evaluator.records) are mappings
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# orjson reads integers beyond 64 bit as floats, so documents with a run of
+# this many digits are left to stdlib json, which keeps them exact. Bytes are
+# scanned by mapping every digit to "0" and everything else to a space.
+_LONG_DIGITS = b"0" * 19
+_DIGITS_ONLY = bytes(ord("0") if chr(byte).isdigit() and byte < 128 else ord(" ") for byte in range(256))
+_LONG_DIGITS_STR = re.compile(r"[0-9]{19}")
+
+
+def _has_long_digit_run(data):
+    if isinstance(data, str):
+        return _LONG_DIGITS_STR.search(data) is not None
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return _LONG_DIGITS in data.translate(_DIGITS_ONLY)
+
+
+def loads(data):
+    """Parse JSON from ``str``, ``bytes`` or a ``memoryview``.
+
+    The result does not depend on whether orjson is installed: input it
+    rejects (e.g. ``NaN``) or cannot represent is parsed by stdlib json.
+    """
+    if orjson is not None:
+        if not _has_long_digit_run(data):
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def load(path):
+    with open(path, "rb") as fh:
+        return loads(fh.read())
+
+
+def dumps(obj, fmt=None):
+    """Encode ``obj`` as UTF-8 JSON ``bytes`` in format ``fmt`` (default: the configured format)."""
+    fmt = fmt or _default_format
+    if fmt == PRETTY:
+        return json.dumps(obj, indent=2, default=_default).encode("utf-8")
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if fmt == FAST else 0
+        try:
+            return orjson.dumps(obj, default=_default, option=option | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bit, which stdlib json can encode
+    if fmt == FAST:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_default).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+@contextmanager
+def atomic_open(path, mode="w", **kwargs):
+    """``open(path, mode)`` for writing, through a temporary file that replaces
+    ``path`` when the block completes, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode, **kwargs) as fh:
+            yield fh
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def dump(obj, path, fmt=None):
+    """Write ``obj`` as JSON to ``path`` (atomically)."""
+    data = dumps(obj, fmt)
+    with atomic_open(path, "wb") as fh:
+        fh.write(data)
+
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 500
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick "br", "gzip" or None for an ``Accept-Encoding`` header value."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(data, encoding):
+    """``data`` compressed with ``encoding`` ("br", "gzip" or None)."""
+    if encoding is None or len(data) < COMPRESS_MIN_SIZE:
+        return data, None
+    if encoding == "br":
+        return brotli.compress(data, quality=5), "br"
+    return gzip.compress(data, compresslevel=6), "gzip"
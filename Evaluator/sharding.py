@@ -0,0 +1,461 @@
+import argparse
+import glob
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from FIP_Mapping.compiled import load_compiled_mapping
+from .evaluator import evaluate_dmp_against_fip, unwrap_dmp
+from .goals_checks import run_goals_scoring
+from .network import network_policy, POLICIES
+from .pack import PACK_EXTENSION, input_files, open_pack
+from .pipeline import Pipeline
+from .result_store import ResultStore, content_hash, make_record
+from .serialization import COMPACT, dump, load, loads
+
+# Sharded evaluation of a corpus over several worker processes or machines.
+# A coordinator turns every maDMP x mapping pair into a work item and puts it
+# on a shared work queue; workers claim items, evaluate them (FIP evaluation,
+# plus the goals checks with --goals) and write one result file per item.
+#   shards     - items of the same mapping go to the same shard, so a worker
+#                mostly needs one compiled mapping; within a shard the largest
+#                maDMPs come first. A worker whose shard is empty steals from
+#                the shard with the most pending items.
+#   leases     - a claimed item is leased for ``lease`` seconds and renewed
+#                while it runs. Items of workers that died are put back when
+#                their lease expires; failures are retried up to
+#                ``max_attempts`` times, then the item is moved to failed/.
+#   results    - written atomically to <results>/<item id>.json together with
+#                the hashes of their inputs, so an item delivered twice is
+#                evaluated once and a rerun over an unchanged corpus is cheap.
+# Queues are pluggable through make_work_queue(); "spool:<dir>" is a directory
+# that every worker can reach (local disk, or a shared filesystem for several
+# machines), like the spool of Evaluator.jobs.
+
+DEFAULT_LEASE = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+# A size rank of this many digits orders pending items largest first
+_RANK_DIGITS = 15
+
+
+class SpoolWorkQueue:
+    """Work queue in a directory.
+
+    ``pending/<shard>/<rank>_<id>.json`` are queued items, claimed by
+    renaming them to ``leased/<id>.<owner>.json``, whose mtime is the lease
+    expiry. ``owner`` (pid and claim time) is kept in the claimed item as
+    ``lease``, so a worker only renews, acks or retries its own lease.
+    ``failed/<id>.json`` are items that ran out of attempts.
+    """
+
+    def __init__(self, directory, poll_interval=0.2):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.pending = os.path.join(directory, "pending")
+        self.leased = os.path.join(directory, "leased")
+        self.failed_dir = os.path.join(directory, "failed")
+        for path in (self.pending, self.leased, self.failed_dir):
+            os.makedirs(path, exist_ok=True)
+
+    def _write(self, path, item):
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+        dump(item, tmp_path, COMPACT)
+        os.replace(tmp_path, path)
+
+    def _pending_path(self, item):
+        rank = max(10 ** _RANK_DIGITS - 1 - item["size"], 0)
+        shard_dir = os.path.join(self.pending, f"{item['shard']:04d}")
+        os.makedirs(shard_dir, exist_ok=True)
+        return os.path.join(shard_dir, f"{rank:0{_RANK_DIGITS}d}_{item['id']}.json")
+
+    def _leased_path(self, item):
+        return os.path.join(self.leased, item["lease"])
+
+    def _names(self, directory):
+        try:
+            return sorted(n for n in os.listdir(directory) if not n.startswith("."))
+        except FileNotFoundError:
+            return []
+
+    def shards(self):
+        return [int(name) for name in self._names(self.pending)]
+
+    def put(self, item):
+        self._write(self._pending_path(item), item)
+
+    def claim(self, shard=None, lease=DEFAULT_LEASE):
+        """Lease the next item of ``shard``, else steal one from the fullest shard."""
+        sizes = {s: len(self._names(os.path.join(self.pending, f"{s:04d}"))) for s in self.shards()}
+        order = sorted(sizes, key=lambda s: (s != shard, -sizes[s]))
+        for s in order:
+            shard_dir = os.path.join(self.pending, f"{s:04d}")
+            for name in self._names(shard_dir):
+                item_id = name[:-5].split("_", 1)[1]
+                pending_path = os.path.join(shard_dir, name)
+                lease_name = f"{item_id}.{os.getpid()}-{time.time_ns()}.json"
+                leased_path = os.path.join(self.leased, lease_name)
+                # The mtime is the lease expiry and survives the rename, so set it
+                # first: a leased item is never seen expired by reap()
+                expires = time.time() + lease
+                try:
+                    os.utime(pending_path, (expires, expires))
+                    os.rename(pending_path, leased_path)
+                    item = load(leased_path)
+                except OSError:
+                    continue  # claimed by another worker, or reaped meanwhile
+                item["stolen"] = s != shard and shard is not None
+                item["lease"] = lease_name
+                return item
+        return None
+
+    def renew(self, item, lease=DEFAULT_LEASE):
+        """Extend the lease; False if it was lost (the item expired and was requeued)."""
+        expires = time.time() + lease
+        try:
+            os.utime(self._leased_path(item), (expires, expires))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def ack(self, item):
+        try:
+            os.remove(self._leased_path(item))
+        except FileNotFoundError:
+            pass  # the lease expired meanwhile; the redelivery finds the result
+
+    def retry(self, item, error):
+        """Requeue a failed item, or move it to failed/ after its last attempt.
+
+        Returns True if it was requeued; None if the lease was lost, in which
+        case the item was already requeued when it expired.
+        """
+        # Take the lease over first, so a reaper cannot requeue the item as well
+        retrying = os.path.join(self.leased, f".retrying.{item['lease']}")
+        try:
+            os.rename(self._leased_path(item), retrying)
+        except FileNotFoundError:
+            return None
+        item = dict(item, attempts=item.get("attempts", 0) + 1, error=error)
+        item.pop("stolen", None)
+        item.pop("lease", None)
+        requeue = item["attempts"] < item.get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+        if requeue:
+            self.put(item)
+        else:
+            self._write(os.path.join(self.failed_dir, f"{item['id']}.json"), item)
+        os.remove(retrying)
+        return requeue
+
+    def reap(self):
+        """Requeue items whose lease expired; returns how many."""
+        now = time.time()
+        reaped = 0
+        for name in self._names(self.leased):
+            path = os.path.join(self.leased, name)
+            try:
+                if os.stat(path).st_mtime > now:
+                    continue
+                # Take the item over first, so two reapers never requeue it twice
+                reaping = os.path.join(self.leased, f".reaping.{os.getpid()}.{name}")
+                os.rename(path, reaping)
+            except OSError:
+                continue
+            item = load(reaping)
+            item = dict(item, attempts=item.get("attempts", 0) + 1, error="lease expired")
+            if item["attempts"] < item.get("max_attempts", DEFAULT_MAX_ATTEMPTS):
+                self.put(item)
+            else:
+                self._write(os.path.join(self.failed_dir, f"{item['id']}.json"), item)
+            os.remove(reaping)
+            reaped += 1
+        return reaped
+
+    def counts(self):
+        pending = sum(len(self._names(os.path.join(self.pending, f"{s:04d}"))) for s in self.shards())
+        return {
+            "pending": pending,
+            "leased": len(self._names(self.leased)),
+            "failed": len(self._names(self.failed_dir)),
+        }
+
+    def failed(self):
+        return [load(os.path.join(self.failed_dir, name)) for name in self._names(self.failed_dir)]
+
+
+def make_work_queue(spec):
+    """Create a work queue from a spec string: ``spool:<directory>``."""
+    if spec and spec.startswith("spool:"):
+        return SpoolWorkQueue(spec[len("spool:"):])
+    raise ValueError(f"Unknown work queue '{spec}', expected 'spool:<directory>'")
+
+
+def _dmp_source(dmp):
+    # (path, pack, dmp_id, size) of a maDMP file path or a (pack path, dmp_id) pair
+    if isinstance(dmp, tuple):
+        pack_path, dmp_id = dmp
+        entry = open_pack(pack_path).entries[dmp_id]
+        return entry["source"], os.path.abspath(pack_path), dmp_id, entry["length"]
+    return os.path.abspath(dmp), None, None, os.path.getsize(dmp)
+
+
+def make_items(dmp_paths, mapping_paths, results_dir, shards=1, goals=False, network=None,
+               max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """One work item per maDMP x mapping, spread over ``shards`` shards by mapping.
+
+    A maDMP is a file path or a ``(pack path, dmp_id)`` pair (see Evaluator.pack).
+    """
+    sources = [_dmp_source(dmp) for dmp in dmp_paths]
+    mapping_paths = [os.path.abspath(p) for p in mapping_paths]
+    total = len(sources) * len(mapping_paths)
+    items = []
+    for m, mapping in enumerate(mapping_paths):
+        for d, (dmp, pack, dmp_id, size) in enumerate(sources):
+            position = m * len(sources) + d
+            items.append({
+                # Keyed by the source file, so packed and loose runs share results
+                "id": hashlib.sha256(f"{dmp}\0{mapping}".encode("utf-8")).hexdigest()[:24],
+                "dmp": dmp,
+                "pack": pack,
+                "dmp_id": dmp_id,
+                "mapping": mapping,
+                "size": size,
+                # Consecutive (mapping-major) items share a shard
+                "shard": position * shards // total,
+                "goals": goals,
+                "network": network,
+                "results_dir": os.path.abspath(results_dir),
+                "attempts": 0,
+                "max_attempts": max_attempts,
+            })
+    return items
+
+
+def result_path(item):
+    return os.path.join(item["results_dir"], f"{item['id']}.json")
+
+
+def _existing_result(path):
+    try:
+        return load(path)
+    except (OSError, ValueError):
+        return None
+
+
+def process_item(item):
+    """Evaluate one work item and write its result; returns "done" or "exists"."""
+    if item.get("pack"):
+        dmp = unwrap_dmp(open_pack(item["pack"]).get(item["dmp_id"]))
+    else:
+        with open(item["dmp"], "rb") as fh:
+            dmp = unwrap_dmp(loads(fh.read()))
+    compiled = load_compiled_mapping(item["mapping"])
+    # Results of a run whose checks were skipped under a stricter network
+    # policy must not stand in for an online run
+    inputs = {
+        "dmp": content_hash(dmp), "mapping": compiled["sha256"], "goals": bool(item["goals"]),
+        "network": item.get("network"),
+    }
+    path = result_path(item)
+    existing = _existing_result(path)
+    if existing is not None and existing.get("inputs") == inputs:
+        return "exists"
+
+    timings = {}
+
+    def timed(name, func):
+        def run():
+            start = time.perf_counter()
+            try:
+                return func()
+            finally:
+                timings[name] = time.perf_counter() - start
+        return run
+
+    pipeline = Pipeline()
+    if item["goals"]:
+        pipeline.add("goals", timed("goals_checks", lambda: run_goals_scoring(dmp)))
+    pipeline.add("evaluation", timed("fip_evaluation", lambda: evaluate_dmp_against_fip(
+        dmp, compiled["mapping"], compiled["plan"])))
+    with network_policy(item.get("network")) as skipped:
+        done = pipeline.run(max_workers=None if item["goals"] else 1)
+
+    dmp_id = item.get("dmp_id") or os.path.splitext(os.path.basename(item["dmp"]))[0]
+    record = make_record(dmp, done["evaluation"], item["mapping"], compiled["fip_version"], dmp_id=dmp_id,
+                         goals=done.get("goals"), timings=timings)
+    record.update(item=item["id"], source=item["dmp"], inputs=inputs, skipped_checks=dict(skipped))
+    os.makedirs(item["results_dir"], exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    dump(record, tmp_path, COMPACT)
+    os.replace(tmp_path, path)
+    return "done"
+
+
+def run_worker(work_queue, shard=None, lease=DEFAULT_LEASE, exit_when_idle=True, log=None):
+    """Claim and process items until the queue is drained; returns {outcome: count}."""
+    stats = {"done": 0, "exists": 0, "retried": 0, "failed": 0, "stolen": 0, "reaped": 0, "lost": 0}
+    next_reap = 0.0
+    while True:
+        if time.monotonic() >= next_reap:
+            stats["reaped"] += work_queue.reap()
+            next_reap = time.monotonic() + lease / 2
+        item = work_queue.claim(shard, lease)
+        if item is None:
+            counts = work_queue.counts()
+            if exit_when_idle and not counts["pending"] and not counts["leased"]:
+                return stats
+            time.sleep(getattr(work_queue, "poll_interval", 0.2))
+            continue
+        stats["stolen"] += bool(item.get("stolen"))
+
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(lease / 3):
+                if not work_queue.renew(item, lease):
+                    lost.set()
+                    return
+
+        renewer = threading.Thread(target=heartbeat, name="lease-renewal", daemon=True)
+        renewer.start()
+        try:
+            outcome = process_item(item)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if log is not None:
+                log(f"{item['dmp']} x {os.path.basename(item['mapping'])}: {error}")
+            stop.set()
+            renewer.join()
+            # Once the lease is lost the item was requeued (and may run elsewhere)
+            requeued = None if lost.is_set() else work_queue.retry(item, error)
+            stats["lost" if requeued is None else "retried" if requeued else "failed"] += 1
+        else:
+            stop.set()
+            renewer.join()
+            if lost.is_set():
+                stats["lost"] += 1
+            else:
+                work_queue.ack(item)
+                stats[outcome] += 1
+        finally:
+            stop.set()
+
+
+def wait_for_completion(work_queue, lease=DEFAULT_LEASE, poll_interval=1.0, log=None):
+    """Block until no item is pending or leased, requeueing expired leases meanwhile."""
+    while True:
+        work_queue.reap()
+        counts = work_queue.counts()
+        if log is not None:
+            log(f"pending {counts['pending']}, leased {counts['leased']}, failed {counts['failed']}")
+        if not counts["pending"] and not counts["leased"]:
+            return counts
+        time.sleep(poll_interval)
+
+
+def collect_results(results_dir):
+    """The result records written to ``results_dir``."""
+    records = []
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.json"))):
+        record = _existing_result(path)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+def _input_files(paths):
+    # maDMP files, and (pack, dmp_id) pairs for every maDMP of a pack
+    files = []
+    for path in paths:
+        if path.endswith(PACK_EXTENSION):
+            files.extend((path, dmp_id) for dmp_id in open_pack(path).ids())
+        else:
+            files.extend(input_files([path]))
+    return files
+
+
+def _mapping_files(names):
+    # Mapping file paths, or names of files in FIP_Mapping/
+    root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FIP_Mapping")
+    return [name if os.path.exists(name) else os.path.join(root, name) for name in names]
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a corpus on several worker processes or machines")
+    parser.add_argument("--queue", required=True, help="Work queue, e.g. spool:/shared/dmp-queue")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE, help="Lease of a claimed item in seconds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_submit_arguments(p):
+        p.add_argument("--input", nargs="+", required=True,
+                       help=f"maDMP files, globs, directories or packs ({PACK_EXTENSION}, see Evaluator.pack)")
+        p.add_argument("--mapping", nargs="+", required=True, help="Mapping files (or names in FIP_Mapping/)")
+        p.add_argument("--results", required=True, help="Directory for the per-item result files")
+        p.add_argument("--shards", type=int, default=None, help="Number of shards (default: one per mapping)")
+        p.add_argument("--goals", action="store_true", help="Also run the goals checks")
+        p.add_argument("--network", choices=POLICIES, default=None,
+                       help="Network policy for the checks that use external services")
+        p.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+
+    add_submit_arguments(sub.add_parser("submit", help="Queue every maDMP x mapping work item"))
+    work = sub.add_parser("work", help="Process items until the queue is drained")
+    work.add_argument("--shard", type=int, default=None, help="Preferred shard (default: any)")
+    work.add_argument("--forever", action="store_true", help="Keep polling when the queue is empty")
+    wait = sub.add_parser("wait", help="Wait until every item is processed")
+    wait.add_argument("--results", help="Directory of the result files, to load into --store")
+    wait.add_argument("--store", help="SQLite result store to record the results in")
+    sub.add_parser("status", help="Pending, leased and failed item counts")
+    run = sub.add_parser("run", help="submit, then work on local worker processes and wait")
+    add_submit_arguments(run)
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Local worker processes")
+    run.add_argument("--store", help="SQLite result store to record the results in")
+    args = parser.parse_args()
+
+    work_queue = make_work_queue(args.queue)
+    if args.command in ("submit", "run"):
+        mappings = _mapping_files(args.mapping)
+        missing = [m for m in mappings if not os.path.isfile(m)]
+        if missing:
+            parser.error(f"mapping not found: {', '.join(missing)}")
+        items = make_items(_input_files(args.input), mappings, args.results, args.shards or len(mappings),
+                           args.goals, args.network, args.max_attempts)
+        for item in items:
+            work_queue.put(item)
+        _log(f"Queued {len(items)} items in {args.shards or len(mappings)} shards")
+    if args.command == "work":
+        stats = run_worker(work_queue, args.shard, args.lease, exit_when_idle=not args.forever, log=_log)
+        _log(f"Worker {os.getpid()}: {stats}")
+    elif args.command == "status":
+        print(work_queue.counts())
+    elif args.command in ("wait", "run"):
+        started = time.perf_counter()
+        workers = []
+        if args.command == "run":
+            for i in range(args.workers):
+                command = [sys.executable, "-m", "Evaluator.sharding", "--queue", args.queue,
+                           "--lease", str(args.lease), "work", "--shard", str(i % (args.shards or len(mappings)))]
+                workers.append(subprocess.Popen(command))
+        counts = wait_for_completion(work_queue, args.lease, log=_log)
+        for worker in workers:
+            worker.wait()
+        for item in work_queue.failed():
+            _log(f"Failed after {item['attempts']} attempts: {item['dmp']} x {item['mapping']}: {item.get('error')}")
+        _log(f"Finished in {time.perf_counter() - started:.1f} s, {counts['failed']} failed")
+        if args.store and args.results:
+            store = ResultStore(args.store)
+            saved = store.save_many(collect_results(args.results))
+            store.close()
+            _log(f"Recorded {len(saved)} evaluations in {args.store}")
+        return 1 if counts["failed"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
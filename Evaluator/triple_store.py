@@ -0,0 +1,525 @@
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+from rdflib import BNode, Graph, Literal, URIRef
+
+# Persistent quad store (SQLite) for the OSTrails JSON-LD results, so the
+# queries of notebooks/sparql_explorer.ipynb can run over a whole corpus
+# instead of one file parsed into memory. Every (DMP, mapping) evaluation is
+# a named graph; re-adding it replaces the graph. Terms are interned in a
+# dictionary table and quads are indexed as SPO (primary key), POS, OSP and
+# by graph, so every triple pattern is answered from an index. POS also
+# carries the graph, as literals such as test ids are shared by every DMP
+# and the corpus queries join within one graph.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    datatype TEXT NOT NULL DEFAULT '',
+    lang TEXT NOT NULL DEFAULT '',
+    UNIQUE (kind, value, datatype, lang)
+);
+CREATE TABLE IF NOT EXISTS quads (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    g INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o, g)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_quads_pos ON quads(p, o, g, s);
+CREATE INDEX IF NOT EXISTS idx_quads_osp ON quads(o, s, p);
+CREATE INDEX IF NOT EXISTS idx_quads_g ON quads(g);
+CREATE TABLE IF NOT EXISTS graphs (
+    id INTEGER PRIMARY KEY,
+    dmp_id TEXT NOT NULL,
+    mapping TEXT NOT NULL,
+    loaded_at REAL NOT NULL,
+    triples INTEGER NOT NULL,
+    UNIQUE (dmp_id, mapping)
+);
+"""
+
+IRI, LITERAL, BLANK = 0, 1, 2
+
+# Named graphs are <GRAPH_NAMESPACE><mapping>/<dmp id>; node ids such as
+# "#F1_benchmark" are resolved against the graph IRI, so they stay distinct per DMP
+GRAPH_NAMESPACE = "http://localhost/dmp-evaluation/results/"
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+FTR = "https://w3id.org/ftr#"
+PROV = "http://www.w3.org/ns/prov#"
+DCTERMS = "http://purl.org/dc/terms/"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# Characters left as they are when percent-encoding node ids
+_IRI_SAFE = "!#$%&'()*+,/:;=?@[]~"
+
+# Number of interned term ids kept in memory between inserts
+TERM_CACHE_SIZE = 200_000
+
+
+def graph_iri(dmp_id, mapping=""):
+    return f"{GRAPH_NAMESPACE}{quote(mapping or '_', safe='')}/{quote(dmp_id, safe='')}"
+
+
+def _simple_context(document):
+    context = document.get("@context")
+    if not isinstance(context, dict) or not all(isinstance(v, str) for v in context.values()):
+        return None
+    return context
+
+
+def document_triples(document, base):
+    """Triples of an OSTrails JSON-LD document (``build_fip_document`` output).
+
+    The exporter's documents (prefix-only context, flat nodes, string values)
+    are converted directly, as a JSON-LD processor would: ``@id`` values are
+    resolved against ``base`` and other strings become plain literals.
+    Anything else is handed to rdflib's JSON-LD parser.
+    """
+    context = _simple_context(document)
+    nodes = document.get("@graph")
+    if context is None or not isinstance(nodes, list):
+        return _parsed_triples(document, base)
+
+    def expand(term):
+        prefix, sep, local = term.partition(":")
+        if sep and prefix in context:
+            return context[prefix] + local
+        if sep and not local.startswith("//") and prefix not in ("http", "https", "urn", "file", "mailto"):
+            return None  # unknown prefix, dropped like a JSON-LD processor does
+        return term if sep else None
+
+    def resolve(node_id):
+        # Ids built from file names can contain spaces; they are percent-encoded
+        # here, where rdflib would drop the node as an invalid IRI
+        if node_id.startswith("#"):
+            return base + quote(node_id, safe=_IRI_SAFE)
+        return expand(node_id) or base + "#" + quote(node_id, safe=_IRI_SAFE)
+
+    triples = []
+    for node in nodes:
+        if not isinstance(node, dict) or not isinstance(node.get("@id"), str):
+            return _parsed_triples(document, base)
+        subject = (IRI, resolve(node["@id"]), "", "")
+        for key, value in node.items():
+            if key == "@id":
+                continue
+            values = value if isinstance(value, list) else [value]
+            if key == "@type":
+                for t in values:
+                    iri = expand(t) if isinstance(t, str) else None
+                    if iri is None:
+                        return _parsed_triples(document, base)
+                    triples.append((subject, (IRI, RDF_TYPE, "", ""), (IRI, iri, "", "")))
+                continue
+            predicate = expand(key)
+            if predicate is None:
+                if key.startswith("@"):
+                    return _parsed_triples(document, base)
+                continue
+            for v in values:
+                if v is None:
+                    continue
+                if isinstance(v, str):
+                    obj = (LITERAL, v, "", "")
+                elif isinstance(v, bool):
+                    obj = (LITERAL, "true" if v else "false", XSD + "boolean", "")
+                elif isinstance(v, int):
+                    obj = (LITERAL, str(v), XSD + "integer", "")
+                else:
+                    return _parsed_triples(document, base)
+                triples.append((subject, (IRI, predicate, "", ""), obj))
+    return triples
+
+
+def _term_key(term):
+    if isinstance(term, URIRef):
+        return (IRI, str(term), "", "")
+    if isinstance(term, BNode):
+        return (BLANK, str(term), "", "")
+    return (LITERAL, str(term), str(term.datatype or ""), term.language or "")
+
+
+def _parsed_triples(document, base):
+    g = Graph()
+    g.parse(data=json.dumps(document), format="json-ld", base=base)
+    return [tuple(_term_key(t) for t in triple) for triple in g]
+
+
+def _to_term(kind, value, datatype, lang):
+    if kind == IRI:
+        return URIRef(value)
+    if kind == BLANK:
+        return BNode(value)
+    return Literal(value, datatype=URIRef(datatype) if datatype else None, lang=lang or None)
+
+
+class TripleStore:
+    """SQLite-backed quad store of OSTrails results; safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._term_ids = {}
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM quads").fetchone()[0]
+
+    def _intern(self, key):
+        term_id = self._term_ids.get(key)
+        if term_id is None:
+            row = self._conn.execute(
+                "SELECT id FROM terms WHERE kind = ? AND value = ? AND datatype = ? AND lang = ?", key
+            ).fetchone()
+            term_id = row[0] if row else self._conn.execute(
+                "INSERT INTO terms (kind, value, datatype, lang) VALUES (?, ?, ?, ?)", key
+            ).lastrowid
+            if len(self._term_ids) >= TERM_CACHE_SIZE:
+                self._term_ids.clear()
+            self._term_ids[key] = term_id
+        return term_id
+
+    def _lookup(self, key):
+        # Id of an existing term, or None; never inserts
+        term_id = self._term_ids.get(key)
+        if term_id is None:
+            row = self._conn.execute(
+                "SELECT id FROM terms WHERE kind = ? AND value = ? AND datatype = ? AND lang = ?", key
+            ).fetchone()
+            term_id = row[0] if row else None
+        return term_id
+
+    def _add(self, dmp_id, document, mapping, loaded_at):
+        iri = graph_iri(dmp_id, mapping)
+        g = self._intern((IRI, iri, "", ""))
+        quads = {
+            (self._intern(s), self._intern(p), self._intern(o), g)
+            for s, p, o in document_triples(document, iri)
+        }
+        self._conn.execute("DELETE FROM quads WHERE g = ?", (g,))
+        self._conn.executemany("INSERT INTO quads (s, p, o, g) VALUES (?, ?, ?, ?)", quads)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO graphs (id, dmp_id, mapping, loaded_at, triples) VALUES (?, ?, ?, ?, ?)",
+            (g, dmp_id, mapping, loaded_at, len(quads)),
+        )
+        return len(quads)
+
+    def add_document(self, dmp_id, document, mapping=""):
+        """Store a JSON-LD results document as the graph of (``dmp_id``, ``mapping``),
+        replacing an earlier one. Returns the number of triples."""
+        return self.add_documents([(dmp_id, document, mapping)])
+
+    def add_documents(self, documents):
+        """Bulk insert ``(dmp_id, document, mapping)`` tuples in one transaction."""
+        loaded_at = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    return sum(self._add(dmp_id, doc, mapping or "", loaded_at) for dmp_id, doc, mapping in documents)
+            except sqlite3.Error:
+                self._term_ids.clear()  # ids from the rolled back transaction
+                raise
+
+    def remove(self, dmp_id, mapping=""):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM graphs WHERE dmp_id = ? AND mapping = ?", (dmp_id, mapping)
+            ).fetchone()
+            if row is None:
+                return False
+            self._conn.execute("DELETE FROM quads WHERE g = ?", row)
+            self._conn.execute("DELETE FROM graphs WHERE id = ?", row)
+            return True
+
+    def graphs(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dmp_id, mapping, loaded_at, triples FROM graphs ORDER BY dmp_id, mapping"
+            ).fetchall()
+        return [{"dmp_id": r[0], "mapping": r[1], "loaded_at": r[2], "triples": r[3]} for r in rows]
+
+    def triples(self, s=None, p=None, o=None, graph=None):
+        """Quads ``(s, p, o, graph IRI)`` matching a pattern of rdflib terms
+        (None is a wildcard)."""
+        clauses, params = [], []
+        with self._lock:
+            for column, term in (("s", s), ("p", p), ("o", o), ("g", graph)):
+                if term is None:
+                    continue
+                term_id = self._lookup(_term_key(term))
+                if term_id is None:
+                    return []
+                clauses.append(f"q.{column} = ?")
+                params.append(term_id)
+            sql = (
+                "SELECT ts.kind, ts.value, ts.datatype, ts.lang, tp.kind, tp.value, tp.datatype, tp.lang,"
+                " tob.kind, tob.value, tob.datatype, tob.lang, tg.kind, tg.value, tg.datatype, tg.lang"
+                " FROM quads q JOIN terms ts ON ts.id = q.s JOIN terms tp ON tp.id = q.p"
+                " JOIN terms tob ON tob.id = q.o JOIN terms tg ON tg.id = q.g"
+            )
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            rows = self._conn.execute(sql, params).fetchall()
+        return [tuple(_to_term(*row[i:i + 4]) for i in range(0, 16, 4)) for row in rows]
+
+    def _ids(self, **terms):
+        # {name: term id} for IRIs/literals used as query constants; None if one is unknown
+        ids = {}
+        for name, key in terms.items():
+            ids[name] = self._lookup(key)
+            if ids[name] is None:
+                return None
+        return ids
+
+    def benchmarks(self, principle=None):
+        """Benchmarks (one per FAIR principle) of every stored evaluation."""
+        with self._lock:
+            ids = self._ids(type=(IRI, RDF_TYPE, "", ""), benchmark=(IRI, FTR + "Benchmark", "", ""),
+                            identifier=(IRI, DCTERMS + "identifier", "", ""), title=(IRI, DCTERMS + "title", "", ""))
+            if ids is None:
+                return []
+            sql = (
+                "SELECT gr.dmp_id, gr.mapping, tb.value, ti.value, tt.value"
+                " FROM quads qt"
+                " JOIN quads qi ON qi.s = qt.s AND qi.p = :identifier AND qi.g = qt.g"
+                " LEFT JOIN quads qn ON qn.s = qt.s AND qn.p = :title AND qn.g = qt.g"
+                " JOIN graphs gr ON gr.id = qt.g JOIN terms tb ON tb.id = qt.s JOIN terms ti ON ti.id = qi.o"
+                " LEFT JOIN terms tt ON tt.id = qn.o"
+                " WHERE qt.p = :type AND qt.o = :benchmark"
+            )
+            if principle is not None:
+                sql += " AND ti.value = :principle"
+                ids["principle"] = principle
+            rows = self._conn.execute(sql + " ORDER BY gr.dmp_id, gr.mapping, ti.value", ids).fetchall()
+        return [
+            {"dmp_id": r[0], "mapping": r[1], "benchmark": r[2], "principle": r[3], "title": r[4]}
+            for r in rows
+        ]
+
+    def benchmark_metrics(self, principle):
+        """Metrics associated with the benchmark of ``principle``, per evaluation."""
+        with self._lock:
+            ids = self._ids(identifier=(IRI, DCTERMS + "identifier", "", ""), title=(IRI, DCTERMS + "title", "", ""),
+                            metric=(IRI, FTR + "hasAssociatedMetric", "", ""), principle=(LITERAL, principle, "", ""))
+            if ids is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT gr.dmp_id, gr.mapping, tm.value, tt.value"
+                " FROM quads qi"
+                " JOIN quads qm ON qm.s = qi.s AND qm.p = :metric AND qm.g = qi.g"
+                " LEFT JOIN quads qn ON qn.s = qi.s AND qn.p = :title AND qn.g = qi.g"
+                " JOIN graphs gr ON gr.id = qi.g JOIN terms tm ON tm.id = qm.o LEFT JOIN terms tt ON tt.id = qn.o"
+                " WHERE qi.p = :identifier AND qi.o = :principle"
+                " ORDER BY gr.dmp_id, gr.mapping, tm.value",
+                ids,
+            ).fetchall()
+        return [{"dmp_id": r[0], "mapping": r[1], "metric": r[2], "benchmark_title": r[3]} for r in rows]
+
+    def _matched(self, status=None, principle=None, dmp_id=None, mapping=None):
+        # SQL (and parameters) of the distinct (g, s, principle, status) rows of
+        # matching test results; a result with several values has a row per status
+        ids = self._ids(type=(IRI, RDF_TYPE, "", ""), result=(IRI, FTR + "TestResult", "", ""),
+                        value=(IRI, PROV + "value", "", ""), identifier=(IRI, DCTERMS + "identifier", "", ""),
+                        test_metric=(IRI, FTR + "testMetric", "", ""),
+                        metric=(IRI, FTR + "hasAssociatedMetric", "", ""))
+        if ids is None:
+            return None, None
+        # result -identifier-> test id <-identifier- test -testMetric-> "#metric"
+        # <-hasAssociatedMetric- benchmark -identifier-> principle, all within one graph
+        sql = (
+            "SELECT DISTINCT qt.g AS g, qt.s AS s, tp.value AS principle, tv.value AS status FROM quads qt"
+            " JOIN quads qv ON qv.s = qt.s AND qv.p = :value AND qv.g = qt.g"
+            " JOIN terms tv ON tv.id = qv.o"
+            " LEFT JOIN quads qid ON qid.s = qt.s AND qid.p = :identifier AND qid.g = qt.g"
+            " LEFT JOIN quads qtest ON qtest.p = :identifier AND qtest.o = qid.o AND qtest.g = qt.g"
+            "  AND qtest.s <> qt.s"
+            " LEFT JOIN quads qtm ON qtm.s = qtest.s AND qtm.p = :test_metric AND qtm.g = qt.g"
+            " LEFT JOIN quads qb ON qb.p = :metric AND qb.o = qtm.o AND qb.g = qt.g"
+            " LEFT JOIN quads qbp ON qbp.s = qb.s AND qbp.p = :identifier AND qbp.g = qt.g"
+            " LEFT JOIN terms tp ON tp.id = qbp.o"
+        )
+        clauses = ["qt.p = :type", "qt.o = :result"]
+        if status is not None:
+            clauses.append("tv.value = :status")
+            ids["status"] = status
+        if principle is not None:
+            clauses.append("tp.value = :principle")
+            ids["principle"] = principle
+        if dmp_id is not None or mapping is not None:
+            sql += " JOIN graphs gr ON gr.id = qt.g"
+            if dmp_id is not None:
+                clauses.append("gr.dmp_id = :dmp_id")
+                ids["dmp_id"] = dmp_id
+            if mapping is not None:
+                clauses.append("gr.mapping = :mapping")
+                ids["mapping"] = mapping
+        return sql + " WHERE " + " AND ".join(clauses), ids
+
+    def test_results(self, status=None, principle=None, dmp_id=None, mapping=None):
+        """Test results across the corpus, e.g. every failed test (``status="fail"``)
+        or every R1.1 result. ``status`` matches results with at least one value
+        of that status."""
+        fields = {"identifier": "test", "title": "title", "value": "status", "log": "log"}
+        with self._lock:
+            matched, params = self._matched(status, principle, dmp_id, mapping)
+            if matched is None:
+                return []
+            predicates = {
+                "identifier": (IRI, DCTERMS + "identifier", "", ""), "title": (IRI, DCTERMS + "title", "", ""),
+                "value": (IRI, PROV + "value", "", ""), "log": (IRI, FTR + "log", "", ""),
+            }
+            pred_ids = {}
+            for name, key in predicates.items():
+                term_id = self._lookup(key)
+                if term_id is not None:
+                    pred_ids[term_id] = fields[name]
+            rows = self._conn.execute(
+                f"WITH m AS ({matched}), r AS (SELECT DISTINCT g, s, principle FROM m)"
+                " SELECT gr.dmp_id, gr.mapping, ts.value, r.principle, q.p, t.value FROM r"
+                " JOIN graphs gr ON gr.id = r.g JOIN terms ts ON ts.id = r.s"
+                f" JOIN quads q ON q.s = r.s AND q.g = r.g AND q.p IN ({', '.join(str(i) for i in pred_ids)})"
+                " JOIN terms t ON t.id = q.o",
+                params,
+            ).fetchall()
+        results = {}
+        for dmp, mapping_name, result, principle_value, p, value in rows:
+            entry = results.get((dmp, mapping_name, result))
+            if entry is None:
+                entry = results[(dmp, mapping_name, result)] = {
+                    "dmp_id": dmp, "mapping": mapping_name, "result": result, "test": None, "title": None,
+                    "principle": principle_value, "status": [], "log": [],
+                }
+            name = pred_ids[p]
+            if name in ("status", "log"):
+                entry[name].append(value)
+            else:
+                entry[name] = value
+        for entry in results.values():
+            entry["status"].sort()
+            entry["log"].sort()
+        return sorted(results.values(), key=lambda r: (r["dmp_id"], r["mapping"], r["test"] or ""))
+
+    def status_counts(self, by="principle", mapping=None):
+        """Number of test results per status, grouped ``by`` principle, dmp_id,
+        mapping or None (corpus totals)."""
+        groups = {"principle": "m.principle", "dmp_id": "gr.dmp_id", "mapping": "gr.mapping", None: "'all'"}
+        if by not in groups:
+            raise ValueError(f"Cannot group by '{by}'")
+        with self._lock:
+            matched, params = self._matched(mapping=mapping)
+            if matched is None:
+                return []
+            rows = self._conn.execute(
+                f"WITH m AS ({matched}) SELECT {groups[by]}, m.status, COUNT(*) FROM m"
+                " JOIN graphs gr ON gr.id = m.g GROUP BY 1, 2",
+                params,
+            ).fetchall()
+        counts = {}
+        for group, status, count in rows:
+            counts.setdefault(group, {})[status] = count
+        key = by or "group"
+        return [{key: group, **counts[group]} for group in sorted(counts, key=lambda k: (k is None, k or ""))]
+
+
+def _results_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "*_ostrails_results.jsonld")))
+        else:
+            yield from sorted(glob.glob(path))
+
+
+def load_results(store, paths, mapping="", batch_size=500):
+    """Bulk load ``*_ostrails_results.jsonld`` files (or directories of them).
+
+    The DMP id is the file name without the ``_ostrails_results.jsonld`` suffix.
+    Returns (files, triples).
+    """
+    from .serialization import load
+
+    files = triples = 0
+    batch = []
+    for path in _results_files(paths):
+        name = os.path.basename(path)
+        dmp_id = name[: -len("_ostrails_results.jsonld")] if name.endswith("_ostrails_results.jsonld") else name
+        batch.append((dmp_id, load(path), mapping))
+        if len(batch) >= batch_size:
+            triples += store.add_documents(batch)
+            files += len(batch)
+            batch = []
+    if batch:
+        triples += store.add_documents(batch)
+        files += len(batch)
+    return files, triples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and query the OSTrails results triple store")
+    parser.add_argument("--db", default="results/triples.sqlite", help="Path of the SQLite triple store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    load_cmd = sub.add_parser("load", help="Bulk load *_ostrails_results.jsonld files or directories")
+    load_cmd.add_argument("paths", nargs="+")
+    load_cmd.add_argument("--mapping", default="", help="Mapping file the results were produced with")
+
+    tests = sub.add_parser("tests", help="Test results across the corpus")
+    tests.add_argument("--status", help="pass, fail or indeterminate")
+    tests.add_argument("--principle", help="FAIR principle, e.g. R1.1")
+    tests.add_argument("--dmp-id")
+    tests.add_argument("--mapping")
+
+    counts = sub.add_parser("counts", help="Number of results per status")
+    counts.add_argument("--by", choices=("principle", "dmp_id", "mapping", "none"), default="principle")
+    counts.add_argument("--mapping")
+
+    benchmarks = sub.add_parser("benchmarks", help="Benchmarks per evaluation")
+    benchmarks.add_argument("--principle")
+
+    metrics = sub.add_parser("metrics", help="Metrics associated with a principle's benchmark")
+    metrics.add_argument("principle")
+
+    sub.add_parser("graphs", help="Stored evaluations (named graphs)")
+    args = parser.parse_args()
+
+    store = TripleStore(args.db)
+    if args.command == "load":
+        started = time.perf_counter()
+        files, triples = load_results(store, args.paths, args.mapping)
+        output = {"files": files, "triples": triples, "seconds": round(time.perf_counter() - started, 3)}
+    elif args.command == "tests":
+        output = store.test_results(args.status, args.principle, args.dmp_id, args.mapping)
+    elif args.command == "counts":
+        output = store.status_counts(None if args.by == "none" else args.by, args.mapping)
+    elif args.command == "benchmarks":
+        output = store.benchmarks(args.principle)
+    elif args.command == "metrics":
+        output = store.benchmark_metrics(args.principle)
+    else:
+        output = store.graphs()
+    store.close()
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from .lazy import lazy_import
+from .profiling import incr
+from .validation_rules import normalized_url, _normalize_url
+
+validators = lazy_import("validators")
+
+# The URLs of a maDMP that the goals checks look at (dataset identifiers,
+# host URLs and license URLs), extracted in one walk over the datasets with
+# the title of the dataset each occurrence belongs to. Every distinct URL is
+# validated once, however often it occurs and however many checks read it;
+# normalized forms come from the process wide cache that the SPDX license
+# check uses too.
+
+DATASET_ID = "dataset_id"
+HOST_URL = "host_url"
+LICENSE_URL = "license_url"
+
+
+class UrlInventory:
+    """``occurrences`` are ``(kind, dataset title, url)`` in document order,
+    for every non-empty URL; ``kind`` is DATASET_ID, HOST_URL or LICENSE_URL."""
+
+    def __init__(self, dmp):
+        self.occurrences = []
+        self._valid = {}
+        for ds in dmp.get("dataset", []):
+            title = ds.get("title", "Unknown dataset")
+
+            dataset_id = ds.get("dataset_id", {}).get("identifier", "")
+            if dataset_id:
+                self.occurrences.append((DATASET_ID, title, dataset_id))
+
+            for dist in ds.get("distribution", []):
+                host = dist.get("host", {})
+                if host:
+                    url = host.get("url", "")
+                    if url:
+                        self.occurrences.append((HOST_URL, title, url))
+
+                for lic in dist.get("license", []):
+                    lic_url = lic.get("license_ref", "")
+                    if lic_url:
+                        self.occurrences.append((LICENSE_URL, title, lic_url))
+
+    def urls(self, kind=None):
+        """Distinct URLs (of one ``kind``), in order of first occurrence."""
+        seen = {}
+        for occurrence_kind, _, url in self.occurrences:
+            if (kind is None or occurrence_kind == kind) and isinstance(url, str):
+                seen.setdefault(url, None)
+        return list(seen)
+
+    def is_valid(self, url):
+        """Whether ``url`` is a well formed URL (``validators.url``)."""
+        if not isinstance(url, str):
+            return bool(validators.url(url))
+        valid = self._valid.get(url)
+        if valid is None:
+            incr("url_validations")
+            valid = self._valid[url] = bool(validators.url(url))
+        return valid
+
+    def normalized(self, url):
+        """``url`` normalized for comparison (see ``validation_rules._normalize_url``)."""
+        return normalized_url(url) if isinstance(url, str) else _normalize_url(url)
@@ -1,7 +1,13 @@
 # Recognize formats and vocabularies
 import re
+from functools import lru_cache
 from urllib.parse import urlparse, urlunparse
-import requests
+from . import network
+from .lazy import lazy_import
+from .profiling import incr
+
+# Only needed to fetch the SPDX license list
+requests = lazy_import("requests")
 
 # Checks for metadata 
 def check_access_vs_license(dataset):
@@ -66,7 +72,21 @@ def _normalize_url(url: str) -> str:
         path = path[:-9].rstrip('/')
     return urlunparse((scheme, netloc, path, '', '', ''))
 
+
+# The same license and host URLs recur across datasets, maDMPs and allowed
+# values, so normalized forms are kept for the life of the process
+NORMALIZED_URL_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=NORMALIZED_URL_CACHE_SIZE)
+def normalized_url(url: str) -> str:
+    """``_normalize_url`` of a string URL, cached."""
+    return _normalize_url(url)
+
+SPDX_LICENSES_URL = "https://spdx.org/licenses/licenses.json"
 _SPDX_CACHE = None
+# (SPDX list, {licenseId: normalized seeAlso URLs}) for the last list loaded
+_SPDX_SEE_ALSO = (None, {})
 
 
 # Mapping of canonical allowed values to accepted synonyms
@@ -79,32 +99,107 @@ def _to_spdx_id(label: str) -> str:
     return label.strip().replace(" ", "-")
 
 
-def is_license_compliant(madmp_url: str, spdx_id: str) -> bool:
-    """Check if the given URL corresponds to the SPDX license."""
+def _spdx_list():
+    """The SPDX license list, fetched once under the network policy; None if unavailable."""
     global _SPDX_CACHE
+    policy = network.get_policy()
+    if policy == network.OFFLINE:
+        network.skip(network.SPDX_LICENSE_CHECK)
+        return None
     if _SPDX_CACHE is None:
-        try:
-            resp = requests.get("https://spdx.org/licenses/licenses.json", timeout=10)
-            _SPDX_CACHE = resp.json()
-        except Exception:
-            return False
-
-    data = _SPDX_CACHE
-    spdx_id = _to_spdx_id(spdx_id)
-    
+        if policy == network.CACHED_ONLY:
+            _SPDX_CACHE = network.cache_get("spdx", SPDX_LICENSES_URL)
+            if _SPDX_CACHE is None:
+                network.skip(network.SPDX_LICENSE_CHECK)
+                return None
+        else:
+            incr("http_requests")
+            try:
+                resp = requests.get(SPDX_LICENSES_URL, timeout=10)
+                _SPDX_CACHE = resp.json()
+            except Exception:
+                return None
+            network.cache_put("spdx", SPDX_LICENSES_URL, _SPDX_CACHE)
+    else:
+        incr("spdx_cache_hits")
+    return _SPDX_CACHE
 
-    for lic in data.get("licenses", []):
-        if lic.get("licenseId") == spdx_id:
-            normalized_input = _normalize_url(madmp_url)
-            for url in lic.get("seeAlso", []):
-                if normalized_input == _normalize_url(url):
-                    return True
-            break
-    return False
 
+def is_license_compliant(madmp_url: str, spdx_id: str) -> bool:
+    """Check if the given URL corresponds to the SPDX license."""
+    incr("spdx_lookups")
+    data = _spdx_list()
+    if data is None:
+        return False
+
+    see_also = _spdx_see_also(data).get(_to_spdx_id(spdx_id))
+    if see_also is None:
+        return False
+    return normalized_url(madmp_url) in see_also
+
+
+def _spdx_see_also(data):
+    """{licenseId: normalized seeAlso URLs} of the SPDX list ``data``, built once per list."""
+    global _SPDX_SEE_ALSO
+    source, index = _SPDX_SEE_ALSO
+    if source is not data:
+        index = {}
+        for lic in data.get("licenses", []):
+            # The first entry of a license id is the one that counts
+            index.setdefault(lic.get("licenseId"), frozenset(
+                _normalize_url(url) for url in lic.get("seeAlso") or []
+            ))
+        _SPDX_SEE_ALSO = (data, index)
+    return index
+
+
+
+# Patterns used to recognise identifier types and protocols
+IDENTIFIER_PATTERNS = {
+    "DOI": r"^https?://doi\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
+    "doi": r"^https?://doi\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
+    "Crossref (DOI)": r"^https?://doi\.crossref\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
+    "URI": r"^https?://[^\s]+$",
+    "HTTPS": r"^https://.*$",
+    "B2HANDLE": r"^hdl:\d+/.+$",
+    "dPIDs": r"^[a-f0-9-]{36}$",
+    "UUID": r"^[a-f0-9-]{36}$",
+    "REST": r"^(GET|POST|PUT|DELETE).*",
+    ### Additional patterns
+    "EML": r"^https?://eml\.arizona\.edu/.*$",
+    "Schema.org": r"^https?://schema\.org/.*$",
+    "DataCite": r"^https?://datacite\.org/.*$",
+    "Handle": r"^https:\/\/hdl\.handle\.net\/\d+\/[A-Za-z0-9.\-]+$",
+    "GBIF search engine": r"https://globalbioticinteractions.org/.*$",
+}
+_COMPILED_PATTERNS = {name: re.compile(p, re.I) for name, p in IDENTIFIER_PATTERNS.items()}
+
+KNOWN_LABELS = [
+    "Schema.org", "DCAT", "Dublin Core", "DataCite", "GBIF search engine",
+    "Global Biotic Interactions", "Open Data", "Open", "OAuth 2.0", "GBIF local account",
+    "DwC-A", "JSON", "XMLS", "RDFS", "EML", "DwC",
+    "Plant Pollinator Vocabulary", "Relations Ontology", "PROV-O",
+]
+"""
+    "CC0 1.0", "CC-BY 4.0", "CC BY-NC 4.0",
+]
+"""
+_KNOWN_LABELS_LOWER = {}
+for _label in KNOWN_LABELS:
+    _KNOWN_LABELS_LOWER.setdefault(_label.strip().lower(), _label)
+
+
+def build_matchers(allowed_values):
+    """Precompute the synonym set, SPDX id and pattern checked for each allowed value."""
+    if not allowed_values:
+        return []
+    return [
+        (val, _SYNONYM_MAP.get(val.lower()), _to_spdx_id(val), _COMPILED_PATTERNS.get(val))
+        for val in allowed_values
+    ]
 
 
-def detect_identifier_type(identifier, allowed_values=None):
+def detect_identifier_type(identifier, allowed_values=None, matchers=None):
     if not isinstance(identifier, str):
         return "Unknown"
 
@@ -112,68 +207,35 @@ def detect_identifier_type(identifier, allowed_values=None):
     raw_identifier = identifier.strip()
     lower_identifier = raw_identifier.lower()
 
-    # Patterns
-    patterns = {
-        "DOI": r"^https?://doi\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
-        "doi": r"^https?://doi\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
-        "Crossref (DOI)": r"^https?://doi\.crossref\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
-        "URI": r"^https?://[^\s]+$",
-        "HTTPS": r"^https://.*$",
-        "B2HANDLE": r"^hdl:\d+/.+$",
-        "dPIDs": r"^[a-f0-9-]{36}$",
-        "UUID": r"^[a-f0-9-]{36}$",
-        "REST": r"^(GET|POST|PUT|DELETE).*",
-        ### Additional patterns
-        "EML": r"^https?://eml\.arizona\.edu/.*$",
-        "Schema.org": r"^https?://schema\.org/.*$",
-        "DataCite": r"^https?://datacite\.org/.*$",
-        "Handle": r"^https:\/\/hdl\.handle\.net\/\d+\/[A-Za-z0-9.\-]+$",
-        "GBIF search engine": r"https://globalbioticinteractions.org/.*$",
-    }
-
     # If allowed_values are provided, prioritize matching these first
     if allowed_values:
-        for val in allowed_values:
-            synonyms = _SYNONYM_MAP.get(val.lower())
+        if matchers is None:
+            matchers = build_matchers(allowed_values)
+        for val, synonyms, spdx_id, pattern in matchers:
             if synonyms and lower_identifier in synonyms:
                 return val
-            if is_license_compliant(raw_identifier, val):
+            if is_license_compliant(raw_identifier, spdx_id):
                 return val
-            pattern = patterns.get(val)
-            if pattern and re.match(pattern, lower_identifier, re.I):
-                return val
-
-
-    known_labels = [
-        "Schema.org", "DCAT", "Dublin Core", "DataCite", "GBIF search engine",
-        "Global Biotic Interactions", "Open Data", "Open", "OAuth 2.0", "GBIF local account",
-        "DwC-A", "JSON", "XMLS", "RDFS", "EML", "DwC",
-        "Plant Pollinator Vocabulary", "Relations Ontology", "PROV-O",
-    ]
-    """
-        "CC0 1.0", "CC-BY 4.0", "CC BY-NC 4.0",
-    ]
-    """
-
+            if pattern:
+                incr("regex_calls")
+                if pattern.match(lower_identifier):
+                    return val
 
     # Match patterns
-    for id_type, pattern in patterns.items():
-        if re.match(pattern, lower_identifier, re.I):
+    for id_type, pattern in _COMPILED_PATTERNS.items():
+        incr("regex_calls")
+        if pattern.match(lower_identifier):
             return id_type
 
     # Exact match to label
-    for label in known_labels:
-        if lower_identifier == label.strip().lower():
-            return label
-
-    return "Unknown"
+    return _KNOWN_LABELS_LOWER.get(lower_identifier, "Unknown")
 
 
 # allowed-value checker
-def is_allowed_value(field_value, allowed_values):
+def is_allowed_value(field_value, allowed_values, matchers=None):
     
     def check_one(val):
-        detected = detect_identifier_type(val, allowed_values)
+        detected = detect_identifier_type(val, allowed_values, matchers)
         return detected in allowed_values or val in allowed_values
 
     if isinstance(field_value, list):
@@ -0,0 +1,166 @@
+import argparse
+import glob
+import hashlib
+import os
+import pickle
+import struct
+import time
+
+from FIP_Mapping.mapping import load_mapping
+from FIP_Mapping.utils import transform_mapping
+from Evaluator.evaluator import compile_questions
+from Evaluator.ostrails_formatter import build_static_nodes, DEFAULT_VERSION
+from Evaluator.profiling import incr
+from Evaluator.serialization import atomic_open
+
+# Compiled mappings are stored next to the source JSON as ``<name>.fipc``:
+# a 6 byte header (magic + format version) followed by a pickled dict.
+# Bump COMPILED_VERSION whenever the layout or the matcher rules change.
+COMPILED_MAGIC = b"FIPC"
+COMPILED_VERSION = 2
+COMPILED_EXTENSION = ".fipc"
+_HEADER = COMPILED_MAGIC + struct.pack("<H", COMPILED_VERSION)
+
+# Artifacts already loaded by this process, keyed by absolute source path,
+# and when their source was last checked against the stored hash
+_LOADED = {}
+_CHECKED = {}
+# An edit within this long of a check can keep the (mtime, size) signature
+# (coarse filesystem timestamps), so such sources are hashed again
+MTIME_GRANULARITY_NS = 2_000_000_000
+
+
+def compiled_path(json_path):
+    return os.path.splitext(json_path)[0] + COMPILED_EXTENSION
+
+
+def _source_signature(json_path):
+    stat = os.stat(json_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _source_sha256(json_path):
+    with open(json_path, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def _static_items(mapping):
+    """Mapping-only part of the OSTrails records, in evaluation order."""
+    items = []
+    for idx, (question, details) in enumerate(mapping.items(), start=1):
+        metric_id = f"FIP{str(idx).zfill(2)}.Q{idx}"
+        benchmark = details.get("Allowed_values", [])
+        if benchmark and not isinstance(benchmark, list):
+            benchmark = [benchmark]
+        items.append({
+            "metric_id": metric_id,
+            "metric_label": question,
+            "test_id": f"Test_{metric_id}",
+            "benchmark": benchmark,
+            "subject": details.get("DCS_field") or details.get("maDMP_field") or None,
+        })
+    return items
+
+
+def compile_mapping(json_path):
+    """Parse a mapping JSON and precompute everything the evaluation needs from it."""
+    signature = _source_signature(json_path)
+    sha256 = _source_sha256(json_path)
+    mapping_raw = load_mapping(json_path)
+    mapping = transform_mapping(mapping_raw)
+    fip_version = mapping_raw.get("FIP_Version", DEFAULT_VERSION)
+    return {
+        "version": COMPILED_VERSION,
+        "source": signature,
+        # Content hash of the source JSON, used to refer to the mapping without embedding it
+        "sha256": sha256,
+        "mapping_raw": mapping_raw,
+        "mapping": mapping,
+        "fip_version": fip_version,
+        "plan": compile_questions(mapping),
+        "static_nodes": build_static_nodes(_static_items(mapping), fip_version),
+    }
+
+
+def write_compiled(compiled, path):
+    with atomic_open(path, "wb") as fh:
+        fh.write(_HEADER)
+        pickle.dump(compiled, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_compiled(path):
+    """Return the artifact stored at ``path`` or None if it is missing or from another format version."""
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+    except OSError:
+        return None
+    if data[:len(_HEADER)] != _HEADER:
+        return None
+    try:
+        return pickle.loads(data[len(_HEADER):])
+    except Exception:
+        return None
+
+
+def load_compiled_mapping(json_path):
+    """Load the compiled form of a mapping, (re)compiling it when the source JSON changed.
+
+    The artifact is written next to the JSON file; if that directory is not
+    writable the freshly compiled mapping is still returned. An artifact read
+    from disk is only used if the source still has its content hash, since
+    copies and checkouts can keep mtimes.
+    """
+    key = os.path.abspath(json_path)
+    checked = time.time_ns()
+    signature = _source_signature(json_path)
+
+    compiled = _LOADED.get(key)
+    if compiled is not None and compiled["source"] == signature:
+        if signature[0] < _CHECKED[key] - MTIME_GRANULARITY_NS:
+            incr("mapping_cache_hits")
+            return compiled
+        if _source_sha256(json_path) == compiled["sha256"]:
+            _CHECKED[key] = checked
+            incr("mapping_cache_hits")
+            return compiled
+
+    artifact_path = compiled_path(json_path)
+    compiled = read_compiled(artifact_path)
+    if (compiled is None or compiled.get("source") != signature
+            or compiled.get("sha256") != _source_sha256(json_path)):
+        incr("mapping_compiles")
+        compiled = compile_mapping(json_path)
+        try:
+            write_compiled(compiled, artifact_path)
+        except OSError:
+            pass
+
+    _LOADED[key] = compiled
+    _CHECKED[key] = checked
+    return compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile FIP mapping JSON files into .fipc artifacts")
+    parser.add_argument(
+        "mappings",
+        nargs="*",
+        help="Mapping JSON files (default: every mapping in FIP_Mapping)",
+    )
+    parser.add_argument("--force", action="store_true", help="Recompile even if the artifact is up to date")
+    args = parser.parse_args()
+
+    paths = args.mappings or sorted(
+        glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.json"))
+    )
+    for path in paths:
+        if args.force:
+            write_compiled(compile_mapping(path), compiled_path(path))
+        else:
+            load_compiled_mapping(path)
+        print(f"Compiled mapping saved to: {compiled_path(path)}")
+
+
+if __name__ == "__main__":
+    main()
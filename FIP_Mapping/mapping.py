@@ -1,8 +1,8 @@
 import json
+from Evaluator.serialization import load
 
 def load_mapping(json_path='fip_madmp_mapping.json'):
-    with open(json_path, 'r') as file:
-        return json.load(file)
+    return load(json_path)
 
 # Quick verification, remove/comment out after verifying initially.
 # if __name__ == "__main__":
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no flock: only threads of one process are serialized
+    fcntl = None
+
+from Evaluator.serialization import atomic_open
+
+# Inverted index of allowed values across every mapping in FIP_Mapping:
+# (FAIR principle, FIP question, normalized allowed value) -> mapping files.
+
+MAPPING_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIRECTORY = os.path.join(MAPPING_DIRECTORY, ".cache")
+INDEX_PATH = os.path.join(CACHE_DIRECTORY, "allowed_values_index.json")
+INDEX_VERSION = 1
+
+# Serializes update_index() between threads; an flock on <index>.lock
+# between processes
+_update_lock = threading.Lock()
+
+
+def normalize_value(value):
+    """Normalize an allowed value so lookups ignore case, spacing and dash/space variants."""
+    return re.sub(r"[\s_-]+", " ", str(value)).strip().lower()
+
+
+def _mapping_files(mapping_dir):
+    return sorted(f for f in os.listdir(mapping_dir) if f.endswith(".json"))
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _index_entries(path):
+    """Return [principle, question, normalized value, original value] rows for a mapping file."""
+    with open(path, "r", encoding="utf-8") as fh:
+        mapping = json.load(fh)
+    entries = []
+    for item in mapping.get("FIP_maDMP_Mapping", []):
+        principle = item.get("FAIR_principle") or ""
+        question = item.get("FIP_question") or ""
+        allowed = item.get("Allowed_values", [])
+        if not isinstance(allowed, list):
+            allowed = [allowed] if allowed else []
+        for val in allowed:
+            normalized = normalize_value(val)
+            if normalized:
+                entries.append([principle, question, normalized, str(val).strip()])
+    return entries
+
+
+def _add_entries(values, filename, entries):
+    for principle, question, normalized, _ in entries:
+        files = values.setdefault(principle, {}).setdefault(normalized, {}).setdefault(question, [])
+        if filename not in files:
+            files.append(filename)
+            files.sort()
+
+
+def _remove_entries(values, filename, entries):
+    for principle, question, normalized, _ in entries:
+        by_value = values.get(principle, {})
+        by_question = by_value.get(normalized, {})
+        files = by_question.get(question, [])
+        if filename in files:
+            files.remove(filename)
+        if not files:
+            by_question.pop(question, None)
+        if not by_question:
+            by_value.pop(normalized, None)
+        if not by_value:
+            values.pop(principle, None)
+
+
+def _empty_index(mapping_dir):
+    return {"version": INDEX_VERSION, "mapping_dir": mapping_dir, "files": {}, "values": {}}
+
+
+def _read_index(index_path, mapping_dir):
+    try:
+        with open(index_path, "r", encoding="utf-8") as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        return _empty_index(mapping_dir)
+    if index.get("version") != INDEX_VERSION or index.get("mapping_dir") != mapping_dir:
+        return _empty_index(mapping_dir)
+    return index
+
+
+def _write_index(index, index_path):
+    with atomic_open(index_path, "w", encoding="utf-8") as fh:
+        json.dump(index, fh)
+
+
+@contextmanager
+def _index_locked(index_path):
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with _update_lock, open(f"{index_path}.lock", "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def update_index(mapping_dir=MAPPING_DIRECTORY, index_path=INDEX_PATH):
+    """Bring the persisted index up to date, re-reading only mapping files that changed.
+
+    Returns the index and the list of files that were (re)indexed or dropped.
+    """
+    with _index_locked(index_path):
+        return _update_index(os.path.abspath(mapping_dir), index_path)
+
+
+def _update_index(mapping_dir, index_path):
+    index = _read_index(index_path, mapping_dir)
+    files = index["files"]
+    values = index["values"]
+    changed = []
+
+    current = _mapping_files(mapping_dir)
+    for filename in set(files) - set(current):
+        _remove_entries(values, filename, files.pop(filename)["entries"])
+        changed.append(filename)
+
+    for filename in current:
+        path = os.path.join(mapping_dir, filename)
+        signature = _file_signature(path)
+        known = files.get(filename)
+        if known and known["signature"] == signature:
+            continue
+        if known:
+            _remove_entries(values, filename, known["entries"])
+        try:
+            entries = _index_entries(path)
+        except (OSError, ValueError):
+            # Not a readable mapping, keep it out of the index until it changes again
+            entries = []
+        files[filename] = {"signature": signature, "entries": entries}
+        _add_entries(values, filename, entries)
+        changed.append(filename)
+
+    if changed or not os.path.exists(index_path):
+        _write_index(index, index_path)
+    return index, sorted(changed)
+
+
+def load_index(mapping_dir=MAPPING_DIRECTORY, index_path=INDEX_PATH):
+    index, _ = update_index(mapping_dir, index_path)
+    return index
+
+
+def lookup(index, value, principle=None, question=None, partial=False):
+    """Return the mapping files that accept ``value``.
+
+    ``principle`` and ``question`` narrow the search to one FAIR principle
+    and/or one FIP question text. With ``partial`` any allowed value
+    containing ``value`` matches (e.g. "handle" finds "Handle System").
+    """
+    normalized = normalize_value(value)
+    principles = [principle] if principle else list(index["values"])
+    matches = set()
+    for p in principles:
+        by_value = index["values"].get(p, {})
+        if partial:
+            candidates = [v for k, v in by_value.items() if normalized in k]
+        else:
+            candidates = [by_value.get(normalized, {})]
+        for by_question in candidates:
+            for q, files in by_question.items():
+                if question is None or q == question:
+                    matches.update(files)
+    return sorted(matches)
+
+
+def allowed_values(index, principle=None):
+    """Return {normalized value: [original spellings]} for one principle or all of them."""
+    spellings = {}
+    for entry in index["files"].values():
+        for p, _, normalized, original in entry["entries"]:
+            if principle and p != principle:
+                continue
+            known = spellings.setdefault(normalized, [])
+            if original not in known:
+                known.append(original)
+    return dict(sorted(spellings.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query FIP mappings by allowed value")
+    parser.add_argument("--mapping-dir", default=MAPPING_DIRECTORY, help="Directory with the mapping JSON files")
+    parser.add_argument("--index", default=INDEX_PATH, help="Path of the persisted index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("build", help="Build or incrementally update the index")
+
+    query = sub.add_parser("query", help="List mappings accepting a value")
+    query.add_argument("value", help="Allowed value, e.g. 'CC-BY-4.0' or 'Handle System'")
+    query.add_argument("--principle", help="FAIR principle, e.g. F1 or R1.1")
+    query.add_argument("--question", help="Exact FIP question text")
+    query.add_argument("--partial", action="store_true", help="Match allowed values containing VALUE")
+
+    values = sub.add_parser("values", help="List the indexed allowed values")
+    values.add_argument("--principle", help="FAIR principle, e.g. F1 or R1.1")
+
+    args = parser.parse_args()
+    index, changed = update_index(args.mapping_dir, args.index)
+
+    if args.command == "build":
+        print(f"Indexed {len(index['files'])} mapping files ({len(changed)} updated).")
+        print(f"Index saved to: {args.index}")
+    elif args.command == "query":
+        for filename in lookup(index, args.value, args.principle, args.question, args.partial):
+            print(filename)
+    else:
+        for normalized, originals in allowed_values(index, args.principle).items():
+            print(f"{normalized}: {', '.join(originals)}")
+
+
+if __name__ == "__main__":
+    main()
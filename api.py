@@ -1,14 +1,30 @@
-from fastapi import FastAPI, UploadFile, File, Query, Body
-import json
+from fastapi import FastAPI, UploadFile, File, Query, Body, Request, Response
+from fastapi.responses import PlainTextResponse
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from Evaluator.evaluator import (
-    load_dmp,
+    unwrap_dmp,
     evaluate_dmp_against_fip,
 )
-from Evaluator.ostrails_formatter import export_fip_results, DEFAULT_VERSION
-from FIP_Mapping.mapping import load_mapping
-from FIP_Mapping.utils import transform_mapping
-from scripts.nanopub_to_mapping import build_mapping, get_fip_label
-import tempfile
+from Evaluator.goals_checks import run_goals_scoring
+from Evaluator.validation_rules import validate_metadata_intentions
+from Evaluator.admission import Admission, BodySizeLimit, ConcurrencyLimit
+from Evaluator.jobs import JobManager, make_queue, DONE, FAILED
+from Evaluator.network import network_policy, get_policy, POLICIES
+from Evaluator.pipeline import Pipeline
+from Evaluator.profiling import stage, incr, prometheus_text
+from Evaluator.result_store import ResultStore, make_record, parse_since
+from Evaluator.triple_store import TripleStore
+from Evaluator.projection import project_results, compliance_json
+from Evaluator.ostrails_formatter import build_fip_document, compact_fip_document
+from Evaluator.serialization import loads, dump, dumps, compress, negotiate_encoding, COMPACT, PRETTY, FORMATS
+from FIP_Mapping.compiled import load_compiled_mapping
+from FIP_Mapping.value_index import update_index
+from scripts.nanopub_to_mapping import build_mapping, get_fip_label, fetch_graph
 import os
 
 
@@ -32,44 +48,282 @@ def get_fip_options():
 # List used for Query enum. Updated when new mappings are uploaded.
 FIP_OPTIONS = get_fip_options()
 fip_query = Query(..., enum=FIP_OPTIONS)
+network_query = Query(
+    None,
+    enum=list(POLICIES),
+    description="Network policy: online, cached-only or offline (default: DMP_EVAL_NETWORK, else online)",
+)
+
+# Nanopub imports run in this bounded pool so they never block the event loop
+UPLOAD_WORKERS = int(os.environ.get("FIP_UPLOAD_WORKERS", "2"))
+# Declaration nanopubs fetched concurrently within one import
+UPLOAD_FETCH_WORKERS = int(os.environ.get("FIP_UPLOAD_FETCH_WORKERS", "8"))
+upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="fip-upload")
+# Finished upload jobs are forgotten after this many seconds
+UPLOAD_JOB_TTL = 3600
+
+# job_id -> job record, and nanopub URI -> job_id of the import currently running for it
+upload_jobs = {}
+_inflight_uploads = {}
+_upload_lock = threading.Lock()
+
 
 def convert_nanopub_to_mapping(url: str) -> str: # Fetch a nanopublication and store the generated mapping.
-    mapping = build_mapping(url)
-    label = get_fip_label(url)
+    with network_policy() as skipped:
+        main_graph = fetch_graph(url)
+        if skipped:
+            raise RuntimeError(f"{url} cannot be fetched under network policy '{get_policy()}'")
+        mapping = build_mapping(url, workers=UPLOAD_FETCH_WORKERS, graph=main_graph)
+    label = get_fip_label(url, graph=main_graph)
     os.makedirs(FIP_DIRECTORY, exist_ok=True)
     filename = f"fip_madmp_{label}.json"
     path = os.path.join(FIP_DIRECTORY, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(mapping, f, indent=2)
+    # Written atomically: evaluations and the value index may read it meanwhile
+    dump(mapping, path, PRETTY)
+    update_index(FIP_DIRECTORY)
+    refresh_fip_options()
     return filename
 
-def build_compliance_json(results):
-    table = []
-    for r in results:
-        allowed_values = r["allowed_values"]
-        if isinstance(allowed_values, list):
-            allowed_str = ", ".join(allowed_values)
+
+def refresh_fip_options():
+    # Recalculate options so the evaluate endpoint dropdown updates
+    FIP_OPTIONS[:] = get_fip_options()
+    if fip_query.json_schema_extra is None:
+        fip_query.json_schema_extra = {}
+    fip_query.json_schema_extra["enum"] = list(FIP_OPTIONS)
+    app.openapi_schema = None
+
+
+def _finish_upload(job, future):
+    with _upload_lock:
+        _inflight_uploads.pop(job["uri"], None)
+        job["finished"] = time.time()
+        error = future.exception()
+        if error is None:
+            job["status"] = "done"
+            job["filename"] = future.result()
         else:
-            allowed_str = allowed_values
+            job["status"] = "failed"
+            job["error"] = str(error)
+
+
+def submit_upload(uri: str):
+    """Start importing ``uri`` in the upload pool, or join the import already running for it."""
+    with _upload_lock:
+        job_id = _inflight_uploads.get(uri)
+        if job_id is not None:
+            return upload_jobs[job_id]
+        expired = [
+            k for k, j in upload_jobs.items()
+            if j["finished"] and time.time() - j["finished"] > UPLOAD_JOB_TTL
+        ]
+        for k in expired:
+            del upload_jobs[k]
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "uri": uri,
+            "status": "running",
+            "filename": None,
+            "error": None,
+            "submitted": time.time(),
+            "finished": None,
+        }
+        job["future"] = upload_executor.submit(convert_nanopub_to_mapping, uri)
+        upload_jobs[job["job_id"]] = job
+        _inflight_uploads[uri] = job["job_id"]
+    job["future"].add_done_callback(lambda fut: _finish_upload(job, fut))
+    return job
+
+
+def upload_job_status(job):
+    status = {k: v for k, v in job.items() if k != "future"}
+    if job["status"] == "done":
+        status["detail"] = "Uploaded"
+    elif job["status"] == "running":
+        status["detail"] = f"Import still running, poll /upload_fip/{job['job_id']} for the result"
+    return status
+
+# Encoding of the /evaluate/ response body: compact (default), fast or pretty
+API_JSON_FORMAT = os.environ.get("EVAL_API_JSON_FORMAT", COMPACT)
+if API_JSON_FORMAT not in FORMATS:
+    raise ValueError(f"Unknown EVAL_API_JSON_FORMAT '{API_JSON_FORMAT}', expected one of {', '.join(FORMATS)}")
+
+# Evaluations are also recorded in this SQLite store when EVAL_RESULT_STORE is set
+EVAL_RESULT_STORE = os.environ.get("EVAL_RESULT_STORE")
+result_store = ResultStore(EVAL_RESULT_STORE) if EVAL_RESULT_STORE else None
+
+# ... and their OSTrails results added to this triple store when EVAL_TRIPLE_STORE is set
+EVAL_TRIPLE_STORE = os.environ.get("EVAL_TRIPLE_STORE")
+triple_store = TripleStore(EVAL_TRIPLE_STORE) if EVAL_TRIPLE_STORE else None
+
+
+# Sections of the /evaluate/ response, by the names used in ``sections``
+SECTIONS = {
+    "mapping": "Mapping used",
+    "results": "OSTrails compliant result",
+    "compliance": "Compliance table",
+    "summary": "Summary",
+}
+DEFAULT_SECTIONS = ("mapping", "results", "compliance")
+# "Mapping used" holds the mapping itself, or a reference to it by content hash
+MAPPING_REFS = ("embed", "hash")
+# "OSTrails compliant result" is the full document, or only the evaluation's own nodes
+JSONLD_FORMS = ("full", "compact")
+
+
+def run_evaluation(dmp, base_filename, fip_mapping_file, goals=False, network=None,
+                   sections=DEFAULT_SECTIONS, mapping_ref="embed", jsonld="full"):
+    """Evaluate a loaded maDMP against a mapping from ``FIP_Mapping``.
+
+    Shared by ``/evaluate/`` and the background evaluation jobs. With
+    ``goals`` the goals checks and metadata validation are included too.
+    ``network`` is the network policy (default: DMP_EVAL_NETWORK).
+    ``sections``, ``mapping_ref`` and ``jsonld`` shape the response; steps
+    whose output is not returned (or stored) are not run.
+    """
+    with network_policy(network) as skipped:
+        response = _run_evaluation(dmp, base_filename, fip_mapping_file, goals, sections, mapping_ref, jsonld)
+    if skipped:
+        response["Skipped checks"] = {"network_policy": network or get_policy(), "checks": dict(skipped)}
+    return response
+
+
+def _run_evaluation(dmp, base_filename, fip_mapping_file, goals, sections, mapping_ref, jsonld):
+    started = time.perf_counter()
+    mapping_path = os.path.join(FIP_DIRECTORY, fip_mapping_file)
+
+    def load_mapping():
+        with stage("mapping_transform"):
+            return load_compiled_mapping(mapping_path)
+
+    # Evaluate
+    def evaluate_fip(compiled):
+        with stage("fip_evaluation"):
+            return evaluate_dmp_against_fip(dmp, compiled["mapping"], compiled["plan"])
+
+    # The JSON-LD is also built when it has to be stored
+    build_results = "results" in sections or triple_store is not None
+    views = [view for view, needed in (
+        ("ftr", build_results), ("compliance", "compliance" in sections), ("summary", "summary" in sections),
+    ) if needed]
+
+    # FTR records, compliance rows and summary counts in one pass
+    def project(results):
+        with stage("projection"):
+            return project_results(results, views)
+
+    # The JSON-LD document is returned as is, without a round trip through a file
+    def build_jsonld(compiled, views):
+        with stage("ostrails_build"):
+            return build_fip_document(
+                views["ftr"],
+                dmp_id=base_filename,
+                dmp_title=dmp.get("title", base_filename),
+                metric_version=compiled["fip_version"],
+                static_nodes=compiled["static_nodes"],
+            )
 
-        comp = r.get("compliance_list") or r.get("compliance_status")
-        if allowed_values == "":
-            compliant = "No choice made by community"
+    def build_compliance_table(views):
+        with stage("reports"):
+            return compliance_json(views["compliance"])
+
+    def goals_checks():
+        with stage("goals_checks"):
+            return run_goals_scoring(dmp)
+
+    def metadata_validation():
+        with stage("metadata_validation"):
+            return validate_metadata_intentions(dmp)
+
+    pipeline = Pipeline()
+    if goals:
+        # Network-bound, so started first and overlapped with the FIP evaluation
+        pipeline.add("goals", goals_checks)
+        pipeline.add("validation", metadata_validation)
+    pipeline.add("mapping", load_mapping)
+    pipeline.add("evaluation", evaluate_fip, after=("mapping",))
+    pipeline.add("views", project, after=("evaluation",))
+    if build_results:
+        pipeline.add("jsonld", build_jsonld, after=("mapping", "views"))
+    if "compliance" in sections:
+        pipeline.add("compliance", build_compliance_table, after=("views",))
+    # Without the goals checks the steps form a chain, run in this thread
+    done = pipeline.run(max_workers=None if goals else 1)
+
+    response = {}
+    for section in sections:
+        if section == "mapping":
+            compiled = done["mapping"]
+            value = compiled["mapping_raw"] if mapping_ref == "embed" else {
+                "file": fip_mapping_file,
+                "sha256": compiled["sha256"],
+                "href": f"/mappings/{compiled['sha256']}",
+            }
+        elif section == "results":
+            value = done["jsonld"] if jsonld == "full" else compact_fip_document(done["jsonld"])
+        elif section == "compliance":
+            value = done["compliance"]
         else:
-            if isinstance(comp, list):
-                entries = ["Yes" if c == "Compliant" else "No" for c in comp]
-                compliant = f"[{', '.join(entries)}]"
-            else:
-                compliant = "Yes" if comp == "Compliant" else "No"
-
-        table.append({
-            "FIP Question": r["FIP_question"],
-            "DCS Field": r["DCS_field"],
-            "maDMP Value": r["field_value"],
-            "Accepted Values": allowed_str,
-            "Compliant": compliant,  
-        })
-    return table
+            present, compliant, total = done["views"]["summary"]
+            value = {"present": present, "compliant": compliant, "total": total}
+        response[SECTIONS[section]] = value
+    if goals:
+        response["Goals checks"] = done["goals"]
+        response["Metadata validation"] = done["validation"]
+    if triple_store is not None:
+        with stage("triple_store"):
+            triple_store.add_document(base_filename, done["jsonld"], fip_mapping_file)
+    if result_store is not None:
+        with stage("result_store"):
+            result_store.save(make_record(
+                dmp, done["evaluation"], fip_mapping_file, done["mapping"]["fip_version"], dmp_id=base_filename,
+                goals=response.get("Goals checks"), timings={"total": time.perf_counter() - started},
+            ))
+    incr("evaluations")
+    return response
+
+
+def run_evaluation_job(payload):
+    return run_evaluation(
+        unwrap_dmp(payload["dmp"]),
+        payload["base_filename"],
+        payload["fip_mapping_file"],
+        goals=payload.get("goals", True),
+        network=payload.get("network"),
+    )
+
+
+# Background evaluation jobs, configured through environment variables:
+# EVAL_JOB_QUEUE ("memory" or "spool:<dir>"), EVAL_JOB_WORKERS and EVAL_JOB_RESULTS
+EVAL_JOB_RESULTS = os.environ.get("EVAL_JOB_RESULTS", "job_results")
+evaluation_jobs = JobManager(
+    run_evaluation_job,
+    job_queue=make_queue(os.environ.get("EVAL_JOB_QUEUE", "memory")),
+    results_dir=EVAL_JOB_RESULTS,
+    concurrency=int(os.environ.get("EVAL_JOB_WORKERS", "2")),
+)
+# Long-polling clients check their job this often, without holding a thread
+JOB_POLL_INTERVAL = 0.25
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Started with the app, so jobs left in a spool by a previous process run
+    # without waiting for a new submission
+    evaluation_jobs.start()
+    yield
+    evaluation_jobs.stop(timeout=5)
+
+
+# Admission control: request bodies larger than EVAL_MAX_BODY_BYTES get 413,
+# at most EVAL_MAX_CONCURRENT evaluations run at once with EVAL_MAX_QUEUE more
+# waiting (429 when the queue is full, 503 after EVAL_QUEUE_TIMEOUT seconds
+# in it). 0 disables the body and concurrency limits.
+EVAL_MAX_BODY_BYTES = int(os.environ.get("EVAL_MAX_BODY_BYTES", str(16 * 1024 * 1024)))
+EVAL_MAX_CONCURRENT = int(os.environ.get("EVAL_MAX_CONCURRENT", "4"))
+EVAL_MAX_QUEUE = int(os.environ.get("EVAL_MAX_QUEUE", "16"))
+EVAL_QUEUE_TIMEOUT = float(os.environ.get("EVAL_QUEUE_TIMEOUT", "30"))
+admission = Admission(EVAL_MAX_CONCURRENT, EVAL_MAX_QUEUE, EVAL_QUEUE_TIMEOUT)
 
 
 # app = FastAPI()
@@ -100,7 +354,11 @@ See [GitHub Repository](https://github.com/bernardobap21/DMP-Evaluation-through-
 """,
     version="0.0.1",
     openapi_tags=tags_metadata,
+    lifespan=lifespan,
 )
+app.add_middleware(ConcurrencyLimit, admission=admission, paths=["/evaluate/"])
+# Added last so it runs first: oversized bodies are refused before queueing
+app.add_middleware(BodySizeLimit, max_bytes=EVAL_MAX_BODY_BYTES)
 
 
 # @app.get("/")
@@ -109,6 +367,16 @@ def read_root():
     return {"Welcome": "Your DMP Evaluation API is running!"} # Run to verify the API is available.
 
 
+@app.get(
+    "/metrics",
+    summary="Evaluation stage timings and counters in Prometheus text format",
+    tags=["maDMP"],
+    response_class=PlainTextResponse,
+)
+def metrics():
+    return prometheus_text() + admission.prometheus_text()
+
+
 # @app.post("/upload_fip/")
 @app.post(
     "/upload_fip/",
@@ -117,6 +385,7 @@ def read_root():
     tags=["maDMP"],
 )
 async def upload_fip(
+    response: Response,
     uri: str = Body(
         ...,
         embed=False,
@@ -124,24 +393,40 @@ async def upload_fip(
         description="Nanopublication URL",
         example="Paste the nanopublication URL here between quotes", 
     ),
+    wait: float = Query(
+        20.0,
+        ge=0,
+        description="Seconds to wait for the import before returning a job handle to poll",
+    ),
 ):
-    """Fetch a nanopublication and store the resulting mapping JSON."""
-    mapping = build_mapping(uri)
-    label = get_fip_label(uri)
-    filename = f"fip_madmp_{label}.json"
-    dest_path = os.path.join(FIP_DIRECTORY, filename)
-    with open(dest_path, "w", encoding="utf-8") as out_file:
-        json.dump(mapping, out_file, indent=2)
+    """Fetch a nanopublication and store the resulting mapping JSON.
 
-    # Recalculate options so the evaluate endpoint dropdown updates
-    global FIP_OPTIONS, fip_query
-    FIP_OPTIONS[:] = get_fip_options()
-    if fip_query.json_schema_extra is None:
-        fip_query.json_schema_extra = {}
-    fip_query.json_schema_extra["enum"] = list(FIP_OPTIONS)
-    app.openapi_schema = None
+    The import runs in a worker thread; concurrent uploads of the same URI
+    share one import. If it takes longer than ``wait`` seconds a job handle
+    is returned (HTTP 202) that can be polled on ``/upload_fip/{job_id}``.
+    """
+    job = submit_upload(uri)
+    try:
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job["future"])), timeout=wait)
+    except asyncio.TimeoutError:
+        response.status_code = 202
+        return upload_job_status(job)
+    except Exception as e:
+        return {"error": f"Could not import nanopublication: {e}", "job_id": job["job_id"]}
 
-    return {"filename": filename, "detail": "Uploaded"}
+    return {"filename": job["future"].result(), "detail": "Uploaded", "job_id": job["job_id"]}
+
+
+@app.get(
+    "/upload_fip/{job_id}",
+    summary="Status of a FIP import started with upload_fip",
+    tags=["maDMP"],
+)
+def upload_fip_status(job_id: str):
+    job = upload_jobs.get(job_id)
+    if job is None:
+        return {"error": f"Unknown upload job '{job_id}'."}
+    return upload_job_status(job)
 
 
 # @app.post("/evaluate/")
@@ -152,8 +437,25 @@ async def upload_fip(
     tags=["maDMP"],
 )
 async def evaluate(
+    request: Request,
     maDMP_file: UploadFile = File(...),
     fip_mapping_file: str = fip_query,
+    network: str = network_query,
+    goals: bool = Query(False, description="Also run the goals checks and metadata validation"),
+    sections: str = Query(
+        ",".join(DEFAULT_SECTIONS),
+        description=f"Comma separated sections to return: {', '.join(SECTIONS)}",
+    ),
+    mapping_ref: str = Query(
+        "embed",
+        enum=list(MAPPING_REFS),
+        description="embed the mapping, or refer to it by content hash (fetch it from /mappings/{sha256})",
+    ),
+    jsonld: str = Query(
+        "full",
+        enum=list(JSONLD_FORMS),
+        description="full JSON-LD document, or compact: without the nodes that only depend on the mapping",
+    ),
 ):
     
     """Evaluate a maDMP file using a selected FIP mapping.
@@ -164,12 +466,30 @@ async def evaluate(
         JSON file following the maDMP schema.
     fip_mapping_file: str
         Name of a mapping file located in ``FIP_Mapping``.
+    network: str
+        Network policy for the checks that use external services.
+    goals: bool
+        Also run the goals checks and metadata validation, concurrently
+        with the FIP evaluation.
+    sections: str
+        Sections to return: mapping, results (the JSON-LD), compliance and
+        summary (present/compliant/total counts). Sections that are not
+        requested are not computed.
+    mapping_ref: str
+        ``embed`` or ``hash``.
+    jsonld: str
+        ``full`` or ``compact``.
 
     Returns
     -------
     dict
         Mapping details, an OSTrails compliant JSON-LD with the evaluation
-        results and a human readable compliance table.
+        results and a human readable compliance table (and, with ``goals``,
+        the goals checks and metadata validation). Checks skipped
+        under the network policy are listed under "Skipped checks".
+        Requests over the admission limits get 413, 429 or 503 instead
+        (see EVAL_MAX_BODY_BYTES, EVAL_MAX_CONCURRENT and EVAL_MAX_QUEUE).
+        The body is br or gzip encoded when the client accepts it.
     """
 
     # Validate uploaded DMP file
@@ -184,93 +504,167 @@ async def evaluate(
             "error": f"Mapping file '{fip_mapping_file}' not found.",
             "available": options,
         }
-    
-    with tempfile.TemporaryDirectory() as tmpdir:
-        dmp_path = os.path.join(tmpdir, maDMP_file.filename)
-
-        with open(dmp_path, "wb") as buffer:
-            buffer.write(await maDMP_file.read())
-
-        mapping_path = os.path.join(FIP_DIRECTORY, fip_mapping_file)
-
-        # Load DMP and mapping
-        dmp = load_dmp(dmp_path)
-        mapping_raw = load_mapping(mapping_path)
-        mapping = transform_mapping(mapping_raw)
-
-        # Evaluate
-        results = evaluate_dmp_against_fip(dmp, mapping)
-        
-
-        # Build OSTrails results
-        base_filename = os.path.splitext(maDMP_file.filename)[0]
-        fip_version = mapping_raw.get("FIP_Version", DEFAULT_VERSION)
-        ftr_ready = []
-        for idx, r in enumerate(results, start=1):
-            metric_id = f"FIP{str(idx).zfill(2)}.Q{idx}"
-            benchmark = r.get("allowed_values", [])
-            if benchmark and not isinstance(benchmark, list):
-                benchmark = [benchmark]
-
-            fair_principle = r.get("FAIR_principle")
-            field_val = json.dumps(r.get("field_value"), ensure_ascii=False)
-            comment = (
-                f"Field status: {r['field_status']}; maDMP value: {field_val}; compliance: {r['compliance_status']}"
-            )
+    if network is not None and network not in POLICIES:
+        return {"error": f"Unknown network policy '{network}'.", "available": list(POLICIES)}
+    selected = tuple(dict.fromkeys(s.strip() for s in sections.split(",") if s.strip()))
+    unknown = [s for s in selected if s not in SECTIONS]
+    if unknown or not selected:
+        return {"error": f"Unknown sections: {', '.join(unknown) or '(none given)'}.", "available": list(SECTIONS)}
+    if mapping_ref not in MAPPING_REFS:
+        return {"error": f"Unknown mapping_ref '{mapping_ref}'.", "available": list(MAPPING_REFS)}
+    if jsonld not in JSONLD_FORMS:
+        return {"error": f"Unknown jsonld form '{jsonld}'.", "available": list(JSONLD_FORMS)}
+
+    data = await maDMP_file.read()
+    base_filename = os.path.splitext(maDMP_file.filename)[0]
+    shape = {"sections": selected, "mapping_ref": mapping_ref, "jsonld": jsonld}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    # Evaluate in a worker thread so queued requests and other endpoints are
+    # still served; EVAL_MAX_CONCURRENT bounds how many run at once
+    body, encoding = await asyncio.to_thread(
+        _evaluate_upload, data, base_filename, fip_mapping_file, goals, network, shape, encoding,
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
-            values = r.get("field_value")
-            if not isinstance(values, list):
-                values = [values]
-
-            comp_list = r.get("compliance_list") or r.get("compliance_status")
-            if not isinstance(comp_list, list):
-                comp_list = [comp_list]
-
-            log_val = []
-            status_vals = []
-            for val, comp in zip(values, comp_list):
-                if isinstance(val, (dict, list)):
-                    log_val.append(json.dumps(val, ensure_ascii=False))
-                else:
-                    log_val.append(str(val))
-                if not r.get("allowed_values"):
-                    status_vals.append("indeterminate")
-                else:
-                    status_vals.append(
-                        "pass" if r["field_status"] == "Present" and comp == "Compliant" else "fail"
-                    )
-
-            ftr_ready.append(
-                {
-                    "metric_id": metric_id,
-                    "metric_label": r["FIP_question"],
-                    "test_id": f"Test_{metric_id}",
-                    "benchmark": benchmark,
-                    "fair_principle": fair_principle,
-                    "comment": comment,
-                    "log_value": log_val,
-                    "subject": r["DCS_field"],
-                    "status": status_vals,
-                }
-            )
 
-        jsonld_path = export_fip_results(
-            ftr_ready,
-            dmp_id=base_filename,
-            dmp_title=dmp.get("title", base_filename),
-            output_dir=tmpdir,
-            metric_version=fip_version,
-        )
+def _evaluate_upload(data, base_filename, fip_mapping_file, goals, network, shape, encoding):
+    with stage("load"):
+        dmp = unwrap_dmp(loads(data))
+    result = run_evaluation(dmp, base_filename, fip_mapping_file, goals=goals, network=network, **shape)
+    with stage("response_encode"):
+        body = dumps(result, API_JSON_FORMAT)
+    with stage("response_compress"):
+        return compress(body, encoding)
 
-        with open(jsonld_path, "r", encoding="utf-8") as fh:
-            ostrails_jsonld = json.load(fh)
 
-        compliance_table = build_compliance_json(results)
+@app.get(
+    "/mappings/{sha256}",
+    summary="Mapping with the given content hash (as referenced by /evaluate/ with mapping_ref=hash)",
+    tags=["maDMP"],
+)
+def mapping_by_hash(sha256: str):
+    for name in get_fip_options():
+        compiled = load_compiled_mapping(os.path.join(FIP_DIRECTORY, name))
+        if compiled["sha256"] == sha256:
+            return compiled["mapping_raw"]
+    return {"error": f"No mapping with content hash '{sha256}'."}
+
 
-    return {
-        "Mapping used": mapping_raw,
-        "OSTrails compliant result": ostrails_jsonld,
-        "Compliance table": compliance_table,
+@app.post(
+    "/jobs/evaluate/",
+    summary="Submit a maDMP evaluation as a background job (including goals checks and metadata validation).",
+    description="Returns a job ID immediately; poll /jobs/{job_id} for the status and result.",
+    tags=["maDMP"],
+)
+async def submit_evaluation_job(
+    maDMP_file: UploadFile = File(...),
+    fip_mapping_file: str = fip_query,
+    goals: bool = Query(True, description="Also run the goals checks and metadata validation"),
+    network: str = network_query,
+):
+    if not maDMP_file.filename.endswith(".json"):
+        return {
+            "error": f"Invalid file type: {maDMP_file.filename}. Only .json files are allowed."
+        }
+
+    options = get_fip_options()
+    if fip_mapping_file not in options:
+        return {
+            "error": f"Mapping file '{fip_mapping_file}' not found.",
+            "available": options,
+        }
+    if network is not None and network not in POLICIES:
+        return {"error": f"Unknown network policy '{network}'.", "available": list(POLICIES)}
+
+    try:
+        dmp = loads(await maDMP_file.read())
+    except ValueError as e:
+        return {"error": f"Invalid JSON in {maDMP_file.filename}: {e}"}
+
+    payload = {
+        "dmp": dmp,
+        "base_filename": os.path.splitext(maDMP_file.filename)[0],
+        "fip_mapping_file": fip_mapping_file,
+        "goals": goals,
+        "network": network,
     }
+    record = evaluation_jobs.submit(
+        payload,
+        meta={"filename": maDMP_file.filename, "fip_mapping_file": fip_mapping_file},
+    )
+    return {"job_id": record["job_id"], "status": record["status"]}
+
+
+@app.get(
+    "/results/failing",
+    summary="Stored evaluations with failing questions (requires EVAL_RESULT_STORE)",
+    tags=["maDMP"],
+)
+def failing_results(
+    principle: str = Query(None, description="FAIR principle, e.g. R1.1"),
+    mapping: str = Query(None, description="Mapping file name, e.g. fip_madmp_CLARIN_FIP.json"),
+    since: str = Query(None, description="Age such as 30d, 12h or 45m, or an ISO date"),
+):
+    if result_store is None:
+        return {"error": "No result store configured, set EVAL_RESULT_STORE."}
+    try:
+        since_ts = parse_since(since) if since else None
+    except ValueError as e:
+        return {"error": f"Invalid since value '{since}': {e}"}
+    return result_store.failing(principle=principle, mapping=mapping, since=since_ts)
+
+
+@app.get(
+    "/results/tests",
+    summary="Stored OSTrails test results across all evaluations (requires EVAL_TRIPLE_STORE)",
+    tags=["maDMP"],
+)
+def stored_test_results(
+    status: str = Query(None, enum=["pass", "fail", "indeterminate"], description="Only results with this status"),
+    principle: str = Query(None, description="FAIR principle, e.g. R1.1"),
+    dmp_id: str = Query(None, description="maDMP file name without extension"),
+    mapping: str = Query(None, description="Mapping file name, e.g. fip_madmp_CLARIN_FIP.json"),
+):
+    if triple_store is None:
+        return {"error": "No triple store configured, set EVAL_TRIPLE_STORE."}
+    return triple_store.test_results(status=status, principle=principle, dmp_id=dmp_id, mapping=mapping)
 
 
+@app.get(
+    "/results/status-counts",
+    summary="Number of stored test results per status (requires EVAL_TRIPLE_STORE)",
+    tags=["maDMP"],
+)
+def stored_status_counts(
+    by: str = Query("principle", enum=["principle", "dmp_id", "mapping", "none"]),
+    mapping: str = Query(None, description="Mapping file name, e.g. fip_madmp_CLARIN_FIP.json"),
+):
+    if triple_store is None:
+        return {"error": "No triple store configured, set EVAL_TRIPLE_STORE."}
+    try:
+        return triple_store.status_counts(by=None if by == "none" else by, mapping=mapping)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.get(
+    "/jobs/{job_id}",
+    summary="Status and result of an evaluation job",
+    description="With wait > 0 the request blocks (long-poll) until the job finishes or the wait expires.",
+    tags=["maDMP"],
+)
+async def evaluation_job_status(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for the job to finish"),
+):
+    deadline = time.monotonic() + wait
+    record = evaluation_jobs.status(job_id)
+    while record is not None and record["status"] not in (DONE, FAILED) and time.monotonic() < deadline:
+        await asyncio.sleep(min(JOB_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+        record = evaluation_jobs.status(job_id)
+    if record is None:
+        return {"error": f"Unknown evaluation job '{job_id}'."}
+    return record
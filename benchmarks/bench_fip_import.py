@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.nanopub_to_mapping import build_mapping, fetch_graph, get_fip_label
+from benchmarks.nanopub_server import (
+    FIXTURE_PATH, load_fixtures, route_nanopubs_to, save_fixtures, start_nanopub_server, synthesise_fixtures,
+)
+
+# Times importing every FIP of the fixture set (by default one per bundled
+# mapping) through the local nanopublication stand-in, for each combination
+# of declaration fetch workers and concurrently imported FIPs.
+
+DEFAULT_WORKERS = [1, 4, 8]
+DEFAULT_PARALLEL = [1, 4]
+
+
+def import_fip(uri, workers):
+    """Import one FIP the way /upload_fip/ does; returns ``(label, mapping, seconds, error)``."""
+    start = time.perf_counter()
+    try:
+        graph = fetch_graph(uri)
+        mapping = build_mapping(uri, workers=workers, graph=graph)
+        label = get_fip_label(uri, graph=graph)
+    except Exception as e:
+        return None, None, time.perf_counter() - start, f"{e}"
+    return label, mapping, time.perf_counter() - start, None
+
+
+def _allowed_values(mapping):
+    # rdflib does not keep the order of a declaration's values, so compare them as sets
+    return [set(item.get("Allowed_values", [])) for item in mapping.get("FIP_maDMP_Mapping", [])]
+
+
+def _mismatches(fixtures, imported, mapping_dir):
+    """FIPs whose imported allowed values differ from the mapping the fixture was made from."""
+    mismatches = []
+    for uri, mapping in imported.items():
+        path = os.path.join(mapping_dir, fixtures["fips"][uri])
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as fh:
+            expected = json.load(fh)
+        if _allowed_values(expected) != _allowed_values(mapping):
+            mismatches.append(fixtures["fips"][uri])
+    return mismatches
+
+
+def run_import_benchmark(fixtures, workers_list, parallel_list, repeat=1, latency=0.0,
+                         failure_rate=0.0, seed=0, mapping_dir="FIP_Mapping"):
+    uris = list(fixtures["fips"])
+    server, base_url = start_nanopub_server(fixtures["responses"], latency, failure_rate, seed)
+    rows = []
+    try:
+        with route_nanopubs_to(base_url):
+            for workers in workers_list:
+                for parallel in parallel_list:
+                    timings, results = [], []
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        with ThreadPoolExecutor(max_workers=parallel) as pool:
+                            results = list(pool.map(lambda uri: import_fip(uri, workers), uris))
+                        timings.append(time.perf_counter() - start)
+                    per_fip = [seconds for _, _, seconds, _ in results]
+                    imported = {uri: r[1] for uri, r in zip(uris, results) if r[3] is None}
+                    median = statistics.median(timings)
+                    row = {
+                        "workers": workers,
+                        "parallel_imports": parallel,
+                        "fips": len(uris),
+                        "repeat": repeat,
+                        "median_seconds": median,
+                        "fips_per_second": len(uris) / median if median else None,
+                        "median_fip_seconds": statistics.median(per_fip) if per_fip else None,
+                        "max_fip_seconds": max(per_fip) if per_fip else None,
+                        "errors": sum(1 for r in results if r[3] is not None),
+                        "mismatches": _mismatches(fixtures, imported, mapping_dir),
+                    }
+                    rows.append(row)
+                    print(_format_row(row), flush=True)
+    finally:
+        server.shutdown()
+    return rows
+
+
+def _format_row(row):
+    return (
+        f"{row['workers']:>8}{row['parallel_imports']:>10}{row['median_seconds']:>11.2f} s"
+        f"{row['fips_per_second'] or 0:>12.1f}{row['max_fip_seconds'] or 0:>12.2f} s"
+        f"{row['errors']:>8}{len(row['mismatches']):>12}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FIP imports against the local nanopublication stand-in")
+    parser.add_argument("--fixtures", default=FIXTURE_PATH,
+                        help="Fixture file (synthesised from --mapping-dir when missing)")
+    parser.add_argument("--mapping-dir", default="FIP_Mapping", help="Bundled mappings the fixtures are made from")
+    parser.add_argument("--workers", default=",".join(map(str, DEFAULT_WORKERS)),
+                        help="Comma separated declaration fetch workers per import")
+    parser.add_argument("--parallel", default=",".join(map(str, DEFAULT_PARALLEL)),
+                        help="Comma separated numbers of FIPs imported concurrently")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per setting (median is reported)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latency added to every nanopub response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of responses failing with 503")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the failure injection")
+    parser.add_argument("--save", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    if os.path.exists(args.fixtures):
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        fixtures = synthesise_fixtures(args.mapping_dir)
+        save_fixtures(fixtures, args.fixtures)
+        print(f"Fixtures synthesised from {args.mapping_dir} and saved to: {args.fixtures}")
+
+    print(f"{'Workers':>8}{'Parallel':>10}{'Total':>13}{'FIPs/s':>12}{'Slowest':>14}{'Errors':>8}{'Mismatches':>12}")
+    rows = run_import_benchmark(
+        fixtures,
+        [int(w) for w in args.workers.split(",") if w],
+        [int(p) for p in args.parallel.split(",") if p],
+        repeat=args.repeat,
+        latency=args.latency_ms / 1000,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        mapping_dir=args.mapping_dir,
+    )
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"latency_ms": args.latency_ms, "failure_rate": args.failure_rate, "results": rows}, fh, indent=2)
+        print(f"Benchmark results saved to: {args.save}")
+    if args.failure_rate == 0 and any(row["errors"] or row["mismatches"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+import argparse
+import copy
+import csv
+import glob
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import Evaluator.validation_rules as validation_rules
+from Evaluator.evaluator import evaluate_dmp_against_fip, load_dmp
+from Evaluator.goals_checks import run_goals_scoring
+from Evaluator.ostrails_formatter import DEFAULT_VERSION, build_fip_document
+from Evaluator.projection import project_results
+from Evaluator.validation_rules import validate_metadata_intentions
+from FIP_Mapping.compiled import load_compiled_mapping
+from FIP_Mapping.mapping import load_mapping
+from FIP_Mapping.utils import transform_mapping
+from benchmarks import reference
+from benchmarks.stub_server import start_stub_server, route_network_to
+from benchmarks.synthetic_dmp import generate_dmp
+
+# Differential check of the optimized evaluation against the reference
+# implementation in benchmarks/reference.py: both run on the same maDMPs
+# (the examples, synthetic maDMPs and fuzzed variants of the examples with
+# dropped keys, odd nesting and unexpected values) and every mapping, and
+# the evaluation records, compliance table, FTR statuses and JSON-LD
+# document, recommendations, goals issues and metadata validation issues
+# must be identical - including the exception raised when a maDMP is too
+# malformed to evaluate. Known good outputs in results/ are checked too.
+# Reports each divergence and the reference/optimized time per component;
+# exits with status 1 when anything diverged.
+
+COMPONENTS = ["evaluate", "compliance", "ftr", "recommendations", "goals", "validation"]
+DEFAULT_MAPPINGS = os.path.join("FIP_Mapping", "*.json")
+DEFAULT_SYNTHETIC_SIZES = [10, 100]
+
+# Example maDMPs in results/ and the mapping their outputs were made with
+GOLDEN_CASES = {
+    "DMPOpenScience4": "fip_madmp_ODISSEI_Portal_FIP.json",
+    "DMP_Beyond_COVID_2": "fip_madmp_COVID-19_INSPIRE_Population_Health_FIP.json",
+    "IAM_COMPACT__MachineActionable_Data_Management_Plan_New":
+        "fip_madmp_F2A_Case_Study_6__FAIR_Climate_Risk_Assessments.json",
+}
+
+# Values the fuzzer puts in place of existing ones: empty and wrongly typed
+# values, and strings close to the identifiers, protocols and labels the
+# mappings allow (the allowed values of the mappings are added to these)
+FUZZ_VALUES = [
+    None, "", [], {}, 0, -1, 1.5, True,
+    "open", "Open Data", " DATACITE ", "not an identifier",
+    "https://doi.org/10.1234/fuzz.1", "HTTP://DOI.ORG/10.1234/FUZZ", "https://doi.crossref.org/10.5555/x",
+    "hdl:20.500/fuzz", "https://hdl.handle.net/11304/fuzz-1", "https://hdl.handle.net/x/y",
+    "00000000-0000-0000-0000-000000000000", "GET /records", "https://schema.org/Dataset",
+    "https://creativecommons.org/licenses/by/4.0/legalcode", "http://creativecommons.org/licenses/by/4.0",
+    "https://globalbioticinteractions.org/about",
+]
+MUTATIONS = ("drop", "wrap", "unwrap", "replace", "duplicate", "nest")
+DEFAULT_MUTATIONS = 8
+
+
+def _slots(node, out):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            out.append((node, key))
+            _slots(value, out)
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            out.append((node, index))
+            _slots(value, out)
+
+
+def fuzz_dmp(dmp, rng, mutations=DEFAULT_MUTATIONS, values=FUZZ_VALUES):
+    """Return a copy of ``dmp`` with ``mutations`` random structural changes.
+
+    Each change drops a key or list item, wraps a value in a list, replaces
+    a list by its first item, replaces a value by one of ``values``,
+    duplicates a list item, or nests a list inside a list.
+    """
+    dmp = copy.deepcopy(dmp)
+    for _ in range(mutations):
+        slots = []
+        _slots(dmp, slots)
+        if not slots:
+            break
+        container, key = rng.choice(slots)
+        value = container[key]
+        kind = rng.choice(MUTATIONS)
+        if kind == "drop":
+            del container[key]
+        elif kind == "wrap":
+            container[key] = [value]
+        elif kind == "unwrap" and isinstance(value, list):
+            container[key] = value[0] if value else None
+        elif kind == "duplicate" and isinstance(value, list) and value:
+            value.append(copy.deepcopy(rng.choice(value)))
+        elif kind == "nest" and isinstance(value, list):
+            container[key] = [value, copy.deepcopy(value)]
+        else:
+            container[key] = copy.deepcopy(rng.choice(values))
+    return dmp
+
+
+def _allowed_values(mappings):
+    seen = []
+    for mapping in mappings:
+        for details in mapping["reference"].values():
+            for value in details.get("Allowed_values", []) or []:
+                if isinstance(value, str) and value not in seen:
+                    seen.append(value)
+    return seen
+
+
+def build_corpus(examples, synthetic_sizes, fuzz, mutations, seed, values):
+    """``(case, dmp)`` pairs: the examples, synthetic maDMPs and fuzzed examples."""
+    corpus = []
+    loaded = []
+    for path in examples:
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            dmp = load_dmp(path)
+        except (OSError, ValueError) as e:
+            print(f"Skipped {path}: {e}", file=sys.stderr)
+            continue
+        loaded.append((name, dmp))
+        corpus.append((name, dmp))
+    for size in synthetic_sizes:
+        corpus.append((f"synthetic-{size}", generate_dmp(size, seed=seed)["dmp"]))
+    rng = random.Random(seed)
+    for name, dmp in loaded:
+        for i in range(fuzz):
+            corpus.append((f"{name}~fuzz{i}", fuzz_dmp(dmp, rng, mutations, values)))
+    return corpus
+
+
+def load_mappings(paths):
+    mappings = []
+    for path in paths:
+        raw = load_mapping(path)
+        mappings.append({
+            "name": os.path.basename(path),
+            "reference": transform_mapping(raw),
+            "fip_version": raw.get("FIP_Version", DEFAULT_VERSION),
+            "compiled": load_compiled_mapping(path),
+        })
+    return mappings
+
+
+def _run(func, *args):
+    # (value, error, seconds) - the error as "<type>: <message>"
+    start = time.perf_counter()
+    try:
+        value, error = func(*args), None
+    except Exception as e:
+        value, error = None, f"{type(e).__name__}: {e}"
+    return value, error, time.perf_counter() - start
+
+
+def _short(value, limit=160):
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def first_difference(expected, actual, path=""):
+    """Path and values of the first difference between two JSON-like values, or None."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in list(expected) + [k for k in actual if k not in expected]:
+            if key not in actual or key not in expected:
+                return f"{path}.{key}", expected.get(key, "<missing>"), actual.get(key, "<missing>")
+            found = first_difference(expected[key], actual[key], f"{path}.{key}")
+            if found:
+                return found
+        return None
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        for index, (a, b) in enumerate(zip(expected, actual)):
+            found = first_difference(a, b, f"{path}[{index}]")
+            if found:
+                return found
+        if len(expected) != len(actual):
+            return f"{path} length", len(expected), len(actual)
+        return None
+    if expected != actual or type(expected) is not type(actual):
+        return path or "value", expected, actual
+    return None
+
+
+class EquivalenceRun:
+    """Collects divergences and per component timings over a run."""
+
+    def __init__(self, max_reported=20):
+        self.max_reported = max_reported
+        self.divergences = []
+        self.timings = {c: {"cases": 0, "reference_seconds": 0.0, "optimized_seconds": 0.0} for c in COMPONENTS}
+        self.cases = 0
+
+    def diverged(self, case, component, detail):
+        self.divergences.append({"case": case, "component": component, "detail": detail})
+        if len(self.divergences) <= self.max_reported:
+            print(f"DIVERGENCE {case} {component}: {detail}", flush=True)
+
+    def compare(self, case, component, expected, actual):
+        """Record a divergence when ``expected`` and ``actual`` differ; returns whether they match."""
+        found = first_difference(expected, actual)
+        if found:
+            where, a, b = found
+            self.diverged(case, component, f"{where}: reference {_short(a)}, optimized {_short(b)}")
+        return found is None
+
+    def run(self, component, case, reference_func, optimized_func, *args):
+        """Time both implementations of ``component``; returns both values, or None when either raised."""
+        expected, expected_error, reference_seconds = _run(reference_func, *args)
+        actual, actual_error, optimized_seconds = _run(optimized_func, *args)
+        timing = self.timings[component]
+        timing["cases"] += 1
+        timing["reference_seconds"] += reference_seconds
+        timing["optimized_seconds"] += optimized_seconds
+        if expected_error or actual_error:
+            if expected_error != actual_error:
+                self.diverged(case, component, f"reference raised {expected_error}, optimized raised {actual_error}")
+            return None
+        return expected, actual
+
+    def check_mapping(self, case, dmp, mapping):
+        case = f"{case} [{mapping['name']}]"
+        compiled = mapping["compiled"]
+        self.cases += 1
+        evaluated = self.run(
+            "evaluate", case,
+            lambda d: reference.evaluate_dmp_against_fip(d, mapping["reference"]),
+            lambda d: evaluate_dmp_against_fip(d, compiled["mapping"], compiled["plan"]),
+            dmp,
+        )
+        if evaluated is None:
+            return
+        expected, actual = evaluated
+        self.compare(case, "evaluate", expected, [r.to_dict() for r in actual])
+
+        title = dmp.get("title", "equivalence")
+        pairs = {
+            "compliance": (
+                lambda: reference.build_compliance_rows(expected),
+                lambda: compliance_rows(project_results(actual, ("compliance",))["compliance"]),
+            ),
+            "ftr": (
+                lambda: reference.build_fip_document(
+                    reference.build_ftr_records(expected), "equivalence", title, mapping["fip_version"]),
+                lambda: build_fip_document(
+                    project_results(actual, ("ftr",))["ftr"], "equivalence", title,
+                    compiled["fip_version"], compiled["static_nodes"]),
+            ),
+            "recommendations": (
+                lambda: [reference.build_recommendations(expected), list(reference.summarize_results(expected))],
+                lambda: _recommendations(project_results(actual, ("recommendations", "summary"))),
+            ),
+        }
+        for component, (reference_func, optimized_func) in pairs.items():
+            outputs = self.run(component, case, reference_func, optimized_func)
+            if outputs is None:
+                continue
+            if component == "ftr":
+                # Statuses first, so that a changed verdict is reported as such
+                if self.compare(case, component, *map(ftr_statuses, outputs)):
+                    self.compare(case, component, *outputs)
+            else:
+                self.compare(case, component, *outputs)
+
+    def check_dmp(self, case, dmp):
+        goals = self.run("goals", case, reference.run_goals_scoring, run_goals_scoring, dmp)
+        if goals is not None:
+            expected, actual = goals
+            self.compare(case, "goals", expected, {k: {"issues": v["issues"]} for k, v in actual.items()})
+        validation = self.run(
+            "validation", case, reference.validate_metadata_intentions, validate_metadata_intentions, dmp)
+        if validation is not None:
+            self.compare(case, "validation", *validation)
+
+    def report(self):
+        rows = []
+        for component, timing in self.timings.items():
+            ref, opt = timing["reference_seconds"], timing["optimized_seconds"]
+            rows.append({
+                "component": component,
+                "cases": timing["cases"],
+                "reference_seconds": ref,
+                "optimized_seconds": opt,
+                "speedup": ref / opt if opt else None,
+                "divergences": sum(1 for d in self.divergences if d["component"] == component),
+            })
+        return rows
+
+
+def compliance_rows(rows):
+    """Compliance table rows (as written to the CSV) from the ``compliance`` view."""
+    return [[r["FIP_question"], r["DCS_field"], value_json, allowed_str, compliant]
+            for r, value_json, allowed_str, compliant in rows]
+
+
+def _csv_round_trip(rows):
+    # Rows as read back from the CSV file (None becomes "")
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return list(csv.reader(io.StringIO(buffer.getvalue())))
+
+
+def _recommendations(views):
+    return [views["recommendations"], list(views["summary"])]
+
+
+def ftr_statuses(document):
+    """``{test result id: statuses}`` of an OSTrails JSON-LD document."""
+    return {
+        node["@id"]: node["prov:value"]
+        for node in document["@graph"]
+        if "ftr:TestResult" in node.get("@type", ())
+    }
+
+
+def check_golden(run, golden_dir, examples, mappings):
+    """Compare the optimized outputs for the examples in GOLDEN_CASES with the files in ``golden_dir``."""
+    by_name = {m["name"]: m for m in mappings}
+    paths = {os.path.splitext(os.path.basename(p))[0]: p for p in examples}
+    for name, mapping_name in GOLDEN_CASES.items():
+        prefix = os.path.join(golden_dir, name)
+        if name not in paths or not os.path.exists(f"{prefix}_compliance_table.csv"):
+            continue
+        mapping = by_name.get(mapping_name)
+        if mapping is None:
+            continue
+        case = f"{name} [{mapping_name}] vs {golden_dir}"
+        compiled = mapping["compiled"]
+        dmp = load_dmp(paths[name])
+        results = evaluate_dmp_against_fip(dmp, compiled["mapping"], compiled["plan"])
+        views = project_results(results)
+
+        with open(f"{prefix}_compliance_table.csv", newline="", encoding="utf-8") as fh:
+            golden_rows = list(csv.reader(fh))[1:]
+        run.compare(case, "compliance", golden_rows, _csv_round_trip(compliance_rows(views["compliance"])))
+        with open(f"{prefix}_recommendations.txt", encoding="utf-8") as fh:
+            run.compare(case, "recommendations", fh.read().splitlines(), views["recommendations"])
+        with open(f"{prefix}_ostrails_results.jsonld", encoding="utf-8") as fh:
+            golden = json.load(fh)
+        document = build_fip_document(
+            views["ftr"], name, dmp.get("title", name), compiled["fip_version"], compiled["static_nodes"])
+        if run.compare(case, "ftr", ftr_statuses(golden), ftr_statuses(document)):
+            run.compare(case, "ftr", golden, document)
+
+
+def run_equivalence(corpus, mappings, run, http_status=200, golden_dir=None, examples=()):
+    server, base_url = start_stub_server(status=http_status)
+    try:
+        with route_network_to(base_url):
+            validation_rules._SPDX_CACHE = None
+            validation_rules.is_license_compliant("", "")
+            for case, dmp in corpus:
+                for mapping in mappings:
+                    run.check_mapping(case, dmp, mapping)
+                run.check_dmp(case, dmp)
+            if golden_dir:
+                check_golden(run, golden_dir, examples, mappings)
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the optimized evaluation gives the same results as the reference implementation")
+    parser.add_argument("--examples", default=os.path.join("examples", "*.json"), help="Glob of example maDMPs")
+    parser.add_argument("--mappings", default=DEFAULT_MAPPINGS, help="Glob of FIP mappings to evaluate against")
+    parser.add_argument("--synthetic-sizes", default=",".join(map(str, DEFAULT_SYNTHETIC_SIZES)),
+                        help="Comma separated dataset counts of synthetic maDMPs (empty for none)")
+    parser.add_argument("--fuzz", type=int, default=10, help="Fuzzed variants of each example")
+    parser.add_argument("--mutations", type=int, default=DEFAULT_MUTATIONS, help="Changes per fuzzed variant")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the fuzzer and generator")
+    parser.add_argument("--golden", default="results",
+                        help="Folder of known good outputs for the examples (empty to skip)")
+    parser.add_argument("--http-status", type=int, default=200,
+                        help="Status the HTTP stand-in answers the availability checks with")
+    parser.add_argument("--max-reported", type=int, default=20, help="Divergences printed in full")
+    parser.add_argument("--save", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    examples = sorted(glob.glob(args.examples))
+    mapping_paths = sorted(glob.glob(args.mappings))
+    if not mapping_paths:
+        parser.error(f"No mappings match {args.mappings}")
+    sizes = [int(s) for s in args.synthetic_sizes.split(",") if s]
+
+    mappings = load_mappings(mapping_paths)
+    values = FUZZ_VALUES + _allowed_values(mappings)
+    corpus = build_corpus(examples, sizes, args.fuzz, args.mutations, args.seed, values)
+    print(f"Comparing {len(corpus)} maDMPs x {len(mappings)} mappings", flush=True)
+
+    run = EquivalenceRun(args.max_reported)
+    run_equivalence(corpus, mappings, run, args.http_status, args.golden, examples)
+
+    rows = run.report()
+    print(f"{'Component':<18}{'Cases':>8}{'Reference':>14}{'Optimized':>14}{'Speedup':>10}{'Divergences':>13}")
+    for row in rows:
+        speedup = f"{row['speedup']:.2f}x" if row["speedup"] else "-"
+        print(
+            f"{row['component']:<18}{row['cases']:>8}{row['reference_seconds'] * 1000:>11.1f} ms"
+            f"{row['optimized_seconds'] * 1000:>11.1f} ms{speedup:>10}{row['divergences']:>13}"
+        )
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({
+                "created": datetime.now(timezone.utc).isoformat(),
+                "maDMPs": len(corpus),
+                "mappings": [m["name"] for m in mappings],
+                "seed": args.seed,
+                "components": rows,
+                "divergences": run.divergences,
+            }, fh, indent=2)
+        print(f"Equivalence report saved to: {args.save}")
+
+    if run.divergences:
+        print(f"{len(run.divergences)} divergences in {run.cases} evaluations")
+        sys.exit(1)
+    print(f"No divergences in {run.cases} evaluations")
+
+
+if __name__ == "__main__":
+    main()
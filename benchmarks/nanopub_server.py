@@ -0,0 +1,249 @@
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from rdflib import Dataset, Literal, URIRef
+from rdflib.namespace import RDF, RDFS
+
+import scripts.nanopub_to_mapping as nanopub_to_mapping
+from scripts.nanopub_to_mapping import (
+    HAS_INDEX, INCLUDES, REFERS_TO, CURRENT_USE, CONSIDERATIONS, SCHEMA, FIP_DECLARATION,
+)
+from benchmarks.stub_server import _Redirect
+
+# Local stand-in for the nanopublication servers used by
+# scripts/nanopub_to_mapping.py. It replays responses stored in a fixture
+# file ({uri: {"content_type", "body"}}), with injectable latency and
+# failure rate. Fixtures are either recorded from the live servers or
+# synthesised from the bundled FIP_Mapping/*.json files.
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "nanopubs.json")
+FIXTURE_BASE = "https://w3id.org/np/fixture"
+FIP_TYPE = URIRef("https://w3id.org/fair/fip/terms/FAIR-Implementation-Profile")
+TRIG = "application/trig"
+
+
+def load_fixtures(path=FIXTURE_PATH):
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_fixtures(fixtures, path=FIXTURE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(fixtures, fh)
+
+
+def _trig(triples, graph_uri):
+    ds = Dataset()
+    g = ds.graph(URIRef(graph_uri))
+    for triple in triples:
+        g.add(triple)
+    return ds.serialize(format="trig")
+
+
+def _fip_label(mapping_file):
+    name = os.path.splitext(os.path.basename(mapping_file))[0]
+    return name[len("fip_madmp_"):] if name.startswith("fip_madmp_") else name
+
+
+def synthesise_fip(mapping_file):
+    """Build the FIP, index, declaration and value-label nanopubs for a mapping file.
+
+    Returns ``(fip_uri, {uri: {"content_type", "body"}})``.
+    """
+    with open(mapping_file, "r", encoding="utf-8") as fh:
+        mapping = json.load(fh)
+    label = _fip_label(mapping_file)
+    slug = re.sub(r"[^\w.-]", "_", label)
+    base = f"{FIXTURE_BASE}/{slug}"
+    fip_uri, index_uri = f"{base}/fip", f"{base}/index"
+    responses = {}
+
+    declarations = []
+    for q_idx, item in enumerate(mapping.get("FIP_maDMP_Mapping", []), start=1):
+        decl_uri = f"{base}/declaration/{q_idx}"
+        decl = URIRef(f"{decl_uri}#declaration")
+        triples = [(decl, RDF.type, FIP_DECLARATION)]
+        if item.get("Question_URI"):
+            triples.append((decl, REFERS_TO, URIRef(item["Question_URI"])))
+        if item.get("Comments"):
+            triples.append((decl, CONSIDERATIONS, Literal(item["Comments"])))
+        if mapping.get("FIP_Version"):
+            triples.append((decl, SCHEMA.version, Literal(mapping["FIP_Version"])))
+        allowed = item.get("Allowed_values", [])
+        if not isinstance(allowed, list):
+            allowed = [allowed] if allowed else []
+        for v_idx, value in enumerate(allowed, start=1):
+            value_uri = f"{base}/value/{q_idx}-{v_idx}"
+            triples.append((decl, CURRENT_USE, URIRef(value_uri)))
+            responses[value_uri] = {
+                "content_type": TRIG,
+                "body": _trig([(URIRef(value_uri), RDFS.label, Literal(value))], f"{value_uri}/assertion"),
+            }
+        responses[decl_uri] = {"content_type": TRIG, "body": _trig(triples, f"{decl_uri}/assertion")}
+        declarations.append(decl_uri)
+
+    index = URIRef(f"{index_uri}#index")
+    responses[index_uri] = {
+        "content_type": TRIG,
+        "body": _trig([(index, INCLUDES, URIRef(d)) for d in declarations], f"{index_uri}/assertion"),
+    }
+    fip = URIRef(f"{fip_uri}#fip")
+    responses[fip_uri] = {
+        "content_type": TRIG,
+        "body": _trig(
+            [(fip, RDF.type, FIP_TYPE), (fip, RDFS.label, Literal(label)), (fip, HAS_INDEX, URIRef(index_uri))],
+            f"{fip_uri}/assertion",
+        ),
+    }
+    return fip_uri, responses
+
+
+def synthesise_fixtures(mapping_dir="FIP_Mapping"):
+    """Fixtures for every bundled mapping; ``"fips"`` maps each FIP URI to its source mapping file."""
+    fixtures = {"fips": {}, "responses": {}}
+    for mapping_file in sorted(glob.glob(os.path.join(mapping_dir, "*.json"))):
+        fip_uri, responses = synthesise_fip(mapping_file)
+        fixtures["fips"][fip_uri] = os.path.basename(mapping_file)
+        fixtures["responses"].update(responses)
+    return fixtures
+
+
+class _Recorder:
+    """Stands in for ``requests`` in nanopub_to_mapping and keeps every response."""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def get(self, url, **kwargs):
+        resp = requests.get(url, **kwargs)
+        if resp.ok:
+            self.responses[url] = {
+                "content_type": resp.headers.get("Content-Type", TRIG).split(";")[0],
+                "body": resp.text,
+            }
+        return resp
+
+
+def record_fips(uris, fixtures=None):
+    """Import ``uris`` from the live servers, recording every nanopub fetched."""
+    fixtures = fixtures or {"fips": {}, "responses": {}}
+    recorder = _Recorder(fixtures["responses"])
+    original = nanopub_to_mapping.requests
+    nanopub_to_mapping.requests = recorder
+    try:
+        for uri in uris:
+            nanopub_to_mapping.build_mapping(uri)
+            label = nanopub_to_mapping.get_fip_label(uri)
+            fixtures["fips"][uri] = f"fip_madmp_{label}.json"
+    finally:
+        nanopub_to_mapping.requests = original
+    return fixtures
+
+
+class NanopubHandler(BaseHTTPRequestHandler):
+    responses = {}
+    latency = 0.0
+    failure_rate = 0.0
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.rng_lock:
+            failed = self.failure_rate and self.rng.random() < self.failure_rate
+        target = parse_qs(urlparse(self.path).query).get("url", [""])[0]
+        response = self.responses.get(target)
+        if failed or response is None:
+            self.send_response(503 if failed else 404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = response["body"].encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", response["content_type"])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_nanopub_server(responses, latency=0.0, failure_rate=0.0, seed=0, port=0):
+    """Serve ``responses`` from a daemon thread; returns ``(server, base_url)``."""
+    handler = type("ConfiguredNanopubHandler", (NanopubHandler,), {
+        "responses": responses,
+        "latency": latency,
+        "failure_rate": failure_rate,
+        "rng": random.Random(seed),
+        "rng_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@contextmanager
+def route_nanopubs_to(base_url):
+    """Send the nanopub fetches of scripts/nanopub_to_mapping.py to the stand-in."""
+    original = nanopub_to_mapping.requests
+    nanopub_to_mapping.requests = _Redirect(base_url)
+    try:
+        yield
+    finally:
+        nanopub_to_mapping.requests = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create fixtures for, or run, the local nanopublication stand-in")
+    parser.add_argument("--fixtures", default=FIXTURE_PATH, help="Fixture file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synth = sub.add_parser("synthesise", help="Build fixtures from the bundled mapping files")
+    synth.add_argument("--mapping-dir", default="FIP_Mapping", help="Directory with the mapping JSON files")
+
+    record = sub.add_parser("record", help="Record live nanopub responses for the given FIP URIs")
+    record.add_argument("uris", nargs="+", help="FIP nanopublication URIs")
+
+    serve = sub.add_parser("serve", help="Serve the fixtures over HTTP (pass the original URI as ?url=)")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency-ms", type=float, default=0.0)
+    serve.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "synthesise":
+        fixtures = synthesise_fixtures(args.mapping_dir)
+        save_fixtures(fixtures, args.fixtures)
+        print(f"{len(fixtures['responses'])} responses for {len(fixtures['fips'])} FIPs saved to: {args.fixtures}")
+    elif args.command == "record":
+        fixtures = load_fixtures(args.fixtures) if os.path.exists(args.fixtures) else None
+        fixtures = record_fips(args.uris, fixtures)
+        save_fixtures(fixtures, args.fixtures)
+        print(f"{len(fixtures['responses'])} responses saved to: {args.fixtures}")
+    else:
+        fixtures = load_fixtures(args.fixtures)
+        server, base_url = start_nanopub_server(
+            fixtures["responses"], args.latency_ms / 1000, args.failure_rate, port=args.port,
+        )
+        print(f"Serving {len(fixtures['responses'])} nanopub responses on {base_url}/?url=<nanopub URI>")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
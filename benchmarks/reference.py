@@ -0,0 +1,721 @@
+import json
+import re
+from urllib.parse import urlparse, urlunparse
+
+import validators
+
+from Evaluator.goals_checks import _head_status
+from Evaluator.ostrails_formatter import BENCHMARK_TITLES, DEFAULT_LICENSE, DEFAULT_REPOSITORY, DEFAULT_VERSION
+from Evaluator.validation_rules import _spdx_list
+
+# Reference implementations of the evaluation steps, as they were before
+# they were optimized: plain recursive field lookup, identifier patterns
+# matched one by one for every value, dict results, the OSTrails document
+# rebuilt node by node and the goals checks as first written. They are slow
+# on purpose; benchmarks/equivalence.py checks that the optimized code in
+# Evaluator/ gives exactly the same verdicts, so only change them together
+# with an intended change of behaviour. Only network access (HEAD checks,
+# fetching the SPDX list) goes through the same helpers as the optimized code.
+
+
+_SYNONYM_MAP = {
+    "open data": {"open", "open data"},
+}
+
+
+def _normalize_url(url):
+    if not isinstance(url, str):
+        return ""
+    url = url.strip()
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    path = parsed.path.rstrip('/')
+    if path.endswith('/legalcode'):
+        path = path[:-9].rstrip('/')
+    return urlunparse((scheme, netloc, path, '', '', ''))
+
+
+def is_license_compliant(madmp_url, spdx_id):
+    data = _spdx_list()
+    if data is None:
+        return False
+    spdx_id = spdx_id.strip().replace(" ", "-")
+    for lic in data.get("licenses", []):
+        if lic.get("licenseId") == spdx_id:
+            normalized_input = _normalize_url(madmp_url)
+            for url in lic.get("seeAlso", []):
+                if normalized_input == _normalize_url(url):
+                    return True
+            break
+    return False
+
+
+IDENTIFIER_PATTERNS = {
+    "DOI": r"^https?://doi\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
+    "doi": r"^https?://doi\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
+    "Crossref (DOI)": r"^https?://doi\.crossref\.org/10\.\d{4,9}/[-._;()/:a-z0-9]+$",
+    "URI": r"^https?://[^\s]+$",
+    "HTTPS": r"^https://.*$",
+    "B2HANDLE": r"^hdl:\d+/.+$",
+    "dPIDs": r"^[a-f0-9-]{36}$",
+    "UUID": r"^[a-f0-9-]{36}$",
+    "REST": r"^(GET|POST|PUT|DELETE).*",
+    "EML": r"^https?://eml\.arizona\.edu/.*$",
+    "Schema.org": r"^https?://schema\.org/.*$",
+    "DataCite": r"^https?://datacite\.org/.*$",
+    "Handle": r"^https:\/\/hdl\.handle\.net\/\d+\/[A-Za-z0-9.\-]+$",
+    "GBIF search engine": r"https://globalbioticinteractions.org/.*$",
+}
+
+
+KNOWN_LABELS = [
+    "Schema.org", "DCAT", "Dublin Core", "DataCite", "GBIF search engine",
+    "Global Biotic Interactions", "Open Data", "Open", "OAuth 2.0", "GBIF local account",
+    "DwC-A", "JSON", "XMLS", "RDFS", "EML", "DwC",
+    "Plant Pollinator Vocabulary", "Relations Ontology", "PROV-O",
+]
+
+
+def collect_values(data, path_parts):
+    """Collect all values for the given path parts."""
+    if not path_parts:
+        return [data]
+
+    key = path_parts[0]
+    remaining = path_parts[1:]
+
+    results = []
+    if isinstance(data, dict):
+        if key in data:
+            results.extend(collect_values(data[key], remaining))
+    elif isinstance(data, list):
+        for item in data:
+            if isinstance(item, (dict, list)):
+                if isinstance(item, dict) and key not in item:
+                    continue
+                value = item[key] if isinstance(item, dict) else item
+                results.extend(collect_values(value, remaining))
+    return results
+
+
+def detect_identifier_type(identifier, allowed_values=None):
+    if not isinstance(identifier, str):
+        return "Unknown"
+
+    raw_identifier = identifier.strip()
+    lower_identifier = raw_identifier.lower()
+
+    # If allowed_values are provided, prioritize matching these first
+    if allowed_values:
+        for val in allowed_values:
+            synonyms = _SYNONYM_MAP.get(val.lower())
+            if synonyms and lower_identifier in synonyms:
+                return val
+            if is_license_compliant(raw_identifier, val):
+                return val
+            pattern = IDENTIFIER_PATTERNS.get(val)
+            if pattern and re.match(pattern, lower_identifier, re.I):
+                return val
+
+    for id_type, pattern in IDENTIFIER_PATTERNS.items():
+        if re.match(pattern, lower_identifier, re.I):
+            return id_type
+
+    for label in KNOWN_LABELS:
+        if lower_identifier == label.strip().lower():
+            return label
+
+    return "Unknown"
+
+
+def is_allowed_value(field_value, allowed_values):
+
+    def check_one(val):
+        detected = detect_identifier_type(val, allowed_values)
+        return detected in allowed_values or val in allowed_values
+
+    if isinstance(field_value, list):
+        return all(check_one(v) for v in field_value)
+    return check_one(field_value)
+
+
+def evaluate_dmp_against_fip(dmp, mapping_dict):
+    results = []
+    for question, details in mapping_dict.items():
+        field_path = details.get("DCS_field") or details.get("maDMP_field", "")
+        allowed_values = details.get("Allowed_values", [])
+        mapping_status = details.get("Mapping_status", "Unmapped")
+        fair_principle = details.get("FAIR_principle")
+
+        field_status = "Not Present"
+        compliance_status = "Not Applicable"
+        field_value = None
+
+        if not field_path:
+            results.append({
+                "FIP_question": question,
+                "DCS_field": None,
+                "field_value": None,
+                "allowed_values": allowed_values,
+                "mapping_status": mapping_status,
+                "FAIR_principle": fair_principle,
+                "field_status": field_status,
+                "compliance_status": compliance_status
+            })
+            continue
+
+        values = collect_values(dmp, field_path.split('.'))
+
+        if values:
+            field_status = "Present"
+            field_value = values
+            if allowed_values:
+                compliance_list = [
+                    "Compliant" if is_allowed_value(v, allowed_values) else "Non-compliant"
+                    for v in values
+                ]
+                compliance_status = "Compliant" if all(cs == "Compliant" for cs in compliance_list) else "Non-compliant"
+            else:
+                compliance_list = []
+        else:
+            compliance_list = []
+            if allowed_values:
+                compliance_status = "Missing value"
+
+        results.append({
+            "FIP_question": question,
+            "DCS_field": field_path,
+            "field_value": field_value,
+            "allowed_values": allowed_values,
+            "mapping_status": mapping_status,
+            "FAIR_principle": fair_principle,
+            "field_status": field_status,
+            "compliance_status": compliance_status,
+            "compliance_list": compliance_list
+        })
+
+    return results
+
+
+def summarize_results(results):
+    present = sum(1 for r in results if r["field_status"] == "Present")
+    compliant = sum(1 for r in results if r.get("compliance_status") == "Compliant")
+    return present, compliant, len(results)
+
+
+def build_ftr_records(results):
+    """OSTrails test records, as evaluate_dmp.py built them inline."""
+    ftr_ready = []
+    for idx, r in enumerate(results, start=1):
+        metric_id = f"FIP{str(idx).zfill(2)}.Q{idx}"
+        benchmark = r.get("allowed_values", [])
+        if benchmark and not isinstance(benchmark, list):
+            benchmark = [benchmark]
+
+        field_val = json.dumps(r.get("field_value"), ensure_ascii=False)
+        comment = (
+            f"Field status: {r['field_status']}; maDMP value: {field_val}; "
+            f"compliance: {r['compliance_status']}"
+        )
+
+        values = r.get("field_value")
+        if not isinstance(values, list):
+            values = [values]
+
+        comp_list = r.get("compliance_list") or r.get("compliance_status")
+        if not isinstance(comp_list, list):
+            comp_list = [comp_list]
+
+        log_val = []
+        status_vals = []
+        for val, comp in zip(values, comp_list):
+            if isinstance(val, (dict, list)):
+                log_val.append(json.dumps(val, ensure_ascii=False))
+            else:
+                log_val.append(str(val))
+            if r.get("compliance_status") == "Not Applicable":
+                status_vals.append("indeterminate")
+                continue
+            if not r.get("allowed_values"):
+                status_vals.append("indeterminate")
+            else:
+                status_vals.append(
+                    "pass" if r["field_status"] == "Present" and comp == "Compliant" else "fail"
+                )
+
+        ftr_ready.append({
+            "metric_id": metric_id,
+            "metric_label": r["FIP_question"],
+            "test_id": f"Test_{metric_id}",
+            "benchmark": benchmark,
+            "fair_principle": r.get("FAIR_principle"),
+            "comment": comment,
+            "log_value": log_val,
+            "subject": r["DCS_field"],
+            "status": status_vals,
+        })
+    return ftr_ready
+
+
+def build_compliance_rows(results):
+    """Rows of the compliance table CSV, without the header."""
+    rows = []
+    for r in results:
+        allowed_values = r["allowed_values"]
+        if isinstance(allowed_values, list):
+            allowed_str = ", ".join(allowed_values)
+        else:
+            allowed_str = allowed_values
+
+        comp = r.get("compliance_list") or r.get("compliance_status")
+        if not allowed_values:
+            compliant = "No choice made by community"
+        elif isinstance(comp, list):
+            entries = ["Yes" if c == "Compliant" else "No" for c in comp]
+            compliant = f"[{', '.join(entries)}]"
+        else:
+            compliant = "Yes" if comp == "Compliant" else "No"
+
+        rows.append([
+            r["FIP_question"],
+            r["DCS_field"],
+            json.dumps(r["field_value"], ensure_ascii=False),
+            allowed_str,
+            compliant,
+        ])
+    return rows
+
+
+def build_recommendations(results):
+    recommendations = []
+    for r in results:
+        if r["field_status"] != "Present" or r["compliance_status"] == "Non-compliant":
+            recommendations.append(
+                f"- Improve or add metadata for: {r['FIP_question']} (Field: {r['DCS_field']}, "
+                f"Compliance: {r['compliance_status']})"
+            )
+    if not recommendations:
+        recommendations.append("All mapped fields are present and compliant!")
+    return recommendations
+
+
+def build_fip_document(results, dmp_id, dmp_title, metric_version=DEFAULT_VERSION):
+    """The OSTrails JSON-LD document, as export_fip_results wrote it."""
+    graph = []
+
+    dmp_entity_id = "#input_dmp"
+    graph.append(
+        {
+            "@id": dmp_entity_id,
+            "@type": "prov:Entity",
+            "dcterms:identifier": dmp_id,
+            "dcterms:title": dmp_title,
+            "dcterms:description": "Input maDMP",
+        }
+    )
+
+    org_id = "#evaluation_org"
+    graph.append(
+        {
+            "@id": org_id,
+            "@type": "vcard:Organization",
+            "vcard:fn": "OSTrails",
+            "vcard:organization-name": "OSTrails",
+            "vcard:hasEmail": "mailto:info@ostrails.org",
+        }
+    )
+
+    algorithm_id = "#evaluation_algorithm"
+    algorithm_node = {
+        "@id": algorithm_id,
+        "@type": ["ftr:Algorithm", "dcat:DataService", "prov:Agent"],
+        "dcterms:identifier": "ostrails-algorithm",
+        "dcterms:title": "maDMP Evaluation Algorithm",
+        "dcterms:description": "Algorithm that evaluates maDMP fields against a FIP",
+        "dcterms:license": DEFAULT_LICENSE,
+        "dcat:version": metric_version,
+        "doap:repository": DEFAULT_REPOSITORY,
+        "sio:is-implementation-of": [],
+        "dcterms:creator": org_id,
+    }
+    graph.append(algorithm_node)
+
+    exec_id = "#test_execution"
+    execution_activity = {
+        "@id": exec_id,
+        "@type": "ftr:TestExecutionActivity",
+        "prov:wasAssociatedWith": [],
+        "prov:generated": [],
+        "prov:used": dmp_entity_id,
+    }
+
+    result_set_id = f"#{dmp_id}_results"
+    result_set = {
+        "@id": result_set_id,
+        "@type": ["ftr:TestResultSet", "prov:Entity", "prov:Collection"],
+        "dcterms:identifier": dmp_id,
+        "dcterms:title": f"Evaluation results for DMP: {dmp_title}",
+        "dcterms:license": "https://creativecommons.org/publicdomain/zero/1.0/",
+        "prov:hadMember": [],
+        "prov:wasDerivedFrom": dmp_entity_id,
+        "prov:wasGeneratedBy": exec_id,
+    }
+    graph.append(result_set)
+
+    benchmarks = {}
+
+    for res in results:
+        metric_uri = f"#{res['metric_id']}"
+        metric = {
+            "@id": metric_uri,
+            "@type": "dqv:Metric",
+            "dcterms:identifier": res["metric_id"],
+            "dcterms:title": res["metric_label"],
+            "dcterms:description": res["metric_label"],
+            "dcat:version": metric_version,
+        }
+        graph.append(metric)
+
+        principle = res.get("fair_principle")
+        bench_uri = None
+        if principle:
+            bench_uri = f"#{principle}_benchmark"
+            if principle not in benchmarks:
+                benchmarks[principle] = {
+                    "@id": bench_uri,
+                    "@type": "ftr:Benchmark",
+                    "dcterms:identifier": principle,
+                    "dcterms:title": BENCHMARK_TITLES.get(principle, principle),
+                    "dcterms:description": f"Metrics for FAIR principle {principle}",
+                    "dcat:version": metric_version,
+                    "ftr:hasAssociatedMetric": [],
+                }
+            if metric_uri not in benchmarks[principle]["ftr:hasAssociatedMetric"]:
+                benchmarks[principle]["ftr:hasAssociatedMetric"].append(metric_uri)
+
+        test_uri = f"#{res['test_id']}"
+        allowed_vals = res.get("benchmark", [])
+        if not isinstance(allowed_vals, list):
+            allowed_vals = [allowed_vals] if allowed_vals else []
+
+        description = (
+            f"DCS field: {res['subject']}; allowed_value from the community: "
+            f"{json.dumps(allowed_vals, ensure_ascii=False)}"
+        )
+        test_node = {
+            "@id": test_uri,
+            "@type": ["ftr:Test", "dcat:DataService", "prov:Agent"],
+            "dcterms:identifier": res["test_id"],
+            "dcterms:title": res["metric_label"],
+            "dcterms:description": description,
+            "dcterms:license": DEFAULT_LICENSE,
+            "dcat:version": metric_version,
+            "sio:is-implementation-of": metric_uri,
+            "ftr:testMetric": metric_uri,
+        }
+        graph.append(test_node)
+
+        if bench_uri and bench_uri not in algorithm_node["sio:is-implementation-of"]:
+            algorithm_node["sio:is-implementation-of"].append(bench_uri)
+
+        execution_activity["prov:wasAssociatedWith"].append(test_uri)
+
+        result_uri = f"#{res['test_id']}_result"
+        status = res["status"]
+        log_value = res.get("log_value")
+        result_node = {
+            "@id": result_uri,
+            "@type": ["ftr:TestResult", "prov:Entity"],
+            "dcterms:identifier": res["test_id"],
+            "dcterms:title": f"Result for {res['metric_id']}",
+            "dcterms:description": res["comment"],
+            "dcterms:license": "https://creativecommons.org/publicdomain/zero/1.0/",
+            "prov:value": status,
+            "ftr:log": log_value,
+            "ftr:completion": "100",
+            "ftr:outputFromTest": test_uri,
+            "prov:wasDerivedFrom": dmp_entity_id,
+        }
+        graph.append(result_node)
+        result_set["prov:hadMember"].append(result_uri)
+        execution_activity["prov:generated"].append(result_uri)
+
+    for bench in benchmarks.values():
+        graph.append(bench)
+
+    graph.append(execution_activity)
+
+    return {
+        "@context": {
+            "prov": "http://www.w3.org/ns/prov#",
+            "ftr": "https://w3id.org/ftr#",
+            "dcat": "http://www.w3.org/ns/dcat#",
+            "sio": "http://semanticscience.org/resource/",
+            "dcterms": "http://purl.org/dc/terms/",
+            "doap": "http://usefulinc.com/ns/doap#",
+            "adms": "http://www.w3.org/ns/adms#",
+            "vivo": "http://vivoweb.org/ontology/core#",
+            "dpv": "http://www.w3id.org/dpv#",
+            "vcard": "http://www.w3.org/2006/vcard/ns#",
+            "dqv": "http://www.w3.org/ns/dqv#"
+        },
+        "@graph": graph,
+    }
+
+
+def check_completeness(dmp):
+    required_fields_always = [
+        "dmp_id.identifier",
+        "dmp_id.type",
+        "title",
+        "description",
+        "created",
+        "modified",
+        "ethical_issues_exist",
+        "language",
+        "contact.contact_id.identifier",
+        "contact.contact_id.type",
+        "contact.mbox",
+        "contact.name",
+        "project.title",
+        "project.project_id.identifier",
+        "project.project_id.type",
+        "project.funding.funder_id.identifier",
+        "project.funding.funder_id.type",
+        "project.funding.grant_id.identifier",
+        "project.funding.grant_id.type",
+        "dataset"
+    ]
+
+    missing = []
+
+    # Check nested fields
+    def field_exists(data, path):
+        keys = path.split(".")
+        temp = data
+        for key in keys:
+            if isinstance(temp, list):
+                temp = temp[0] if temp else {}
+            if isinstance(temp, dict) and key in temp:
+                temp = temp[key]
+            else:
+                return False
+        return True
+
+    # Check required fields
+    for path in required_fields_always:
+        if not field_exists(dmp, path):
+            missing.append(path)
+
+    datasets = dmp.get("dataset", [])
+    dataset_missing = 0
+    dataset_checked = 0
+
+    for ds in datasets:
+        dataset_checked += 1
+        fields_to_check = [
+            "dataset_id.identifier",
+            "dataset_id.type",
+            "title",
+            "personal_data",
+            "sensitive_data"
+        ]
+        for field in fields_to_check:
+            if not field_exists(ds, field):
+                missing.append(f"dataset.{dataset_checked-1}.{field}")
+                dataset_missing += 1
+
+        for dist in ds.get("distribution", []):
+            dist_fields = [
+                "title",
+                "data_access"
+            ]
+            for field in dist_fields:
+                if not field_exists(dist, field):
+                    missing.append(f"dataset.{dataset_checked-1}.distribution.{field}")
+
+            for lic in dist.get("license", []):
+                if not field_exists(lic, "license_ref"):
+                    missing.append(f"dataset.{dataset_checked-1}.distribution.license.license_ref")
+                if not field_exists(lic, "start_date"):
+                    missing.append(f"dataset.{dataset_checked-1}.distribution.license.start_date")
+
+            if "host" in dist:
+                if not field_exists(dist["host"], "title"):
+                    missing.append(f"dataset.{dataset_checked-1}.distribution.host.title")
+                if not field_exists(dist["host"], "url"):
+                    missing.append(f"dataset.{dataset_checked-1}.distribution.host.url")
+
+        for md in ds.get("metadata", []):
+            if not field_exists(md, "language"):
+                missing.append(f"dataset.{dataset_checked-1}.metadata.language")
+            if "metadata_standard_id" in md:
+                if not field_exists(md["metadata_standard_id"], "identifier"):
+                    missing.append(f"dataset.{dataset_checked-1}.metadata.metadata_standard_id.identifier")
+                if not field_exists(md["metadata_standard_id"], "type"):
+                    missing.append(f"dataset.{dataset_checked-1}.metadata.metadata_standard_id.type")
+
+    return missing
+
+
+def check_accuracy(dmp):
+    # Fields correctly filled
+    issues = []
+    datasets = dmp.get("dataset", [])
+
+    for ds in datasets:
+        title = ds.get("title", "Unknown dataset")
+
+        # Check dataset identifier format
+        dataset_id = ds.get("dataset_id", {}).get("identifier", "")
+        if dataset_id and not validators.url(dataset_id):
+            issues.append(f"[{title}] Invalid dataset identifier format: {dataset_id}")
+
+        for dist in ds.get("distribution", []):
+            # Check host URL
+            host = dist.get("host", {})
+            if host:
+                url = host.get("url", "")
+                if url and not validators.url(url):
+                    issues.append(f"[{title}] Invalid host URL format: {url}")
+
+            licenses = dist.get("license", [])
+            for lic in licenses:
+                lic_url = lic.get("license_ref", "")
+                if lic_url and not validators.url(lic_url):
+                    issues.append(f"[{title}] Invalid license URL format: {lic_url}")
+
+    return issues
+
+
+def check_availability(dmp, head_status=_head_status):
+    """Check that identifiers and URLs can be resolved online.
+
+    ``head_status(url)`` returns the HTTP status of ``url``, or None when it
+    was not checked.
+    """
+    issues = []
+    datasets = dmp.get("dataset", [])
+
+    for ds in datasets:
+        title = ds.get("title", "Unknown dataset")
+
+        dataset_id = ds.get("dataset_id", {}).get("identifier", "")
+        if dataset_id and validators.url(dataset_id):
+            try:
+                status = head_status(dataset_id)
+                if status is not None and status != 200:
+                    issues.append(
+                        f"[{title}] Dataset identifier not resolvable (status {status}): {dataset_id}"
+                    )
+            except Exception as e:
+                issues.append(f"[{title}] Dataset identifier check error: {str(e)}")
+
+        for dist in ds.get("distribution", []):
+            host = dist.get("host", {})
+            if host:
+                url = host.get("url", "")
+                if url and validators.url(url):
+                    try:
+                        status = head_status(url)
+                        if status is not None and status != 200:
+                            issues.append(
+                                f"[{title}] Host URL not resolvable (status {status}): {url}"
+                            )
+                    except Exception as e:
+                        issues.append(f"[{title}] Host URL check error: {str(e)}")
+
+            for lic in dist.get("license", []):
+                lic_url = lic.get("license_ref", "")
+                if lic_url and validators.url(lic_url):
+                    try:
+                        status = head_status(lic_url)
+                        if status is not None and status != 200:
+                            issues.append(
+                                f"[{title}] License URL not resolvable (status {status}): {lic_url}"
+                            )
+                    except Exception as e:
+                        issues.append(f"[{title}] License URL check error: {str(e)}")
+
+    return issues
+
+
+def check_consistency(dmp):
+    issues = []
+    for ds in dmp.get("dataset", []):
+        for dist in ds.get("distribution", []):
+            access = dist.get("data_access", "")
+            licenses = dist.get("license", [])
+            has_license = any(
+                lic.get("license_name") or lic.get("license_ref") for lic in licenses
+            )
+            if access == "open" and not has_license:
+                issues.append(f"{ds.get('title')} is open but lacks a license.")
+            if not dist.get("byte_size"):
+                issues.append(f"{ds.get('title')} is missing byte_size.")
+            if not dist.get("format"):
+                issues.append(f"{ds.get('title')} is missing format.")
+    return issues
+
+
+def run_goals_scoring(dmp):
+    return {
+        "completeness": {"issues": check_completeness(dmp)},
+        "accuracy": {"issues": check_accuracy(dmp)},
+        "availability": {"issues": check_availability(dmp)},
+        "consistency": {"issues": check_consistency(dmp)},
+    }
+
+
+def check_access_vs_license(dataset):
+    issues = []
+    for ds in dataset:
+        title = ds.get('title', 'Unnamed Dataset')
+        for dist in ds.get("distribution", []):
+            access = dist.get("data_access", "").lower()
+            license_present = bool(dist.get("license"))
+            if access == "open" and not license_present:
+                issues.append(f"Dataset '{title}' marked as open access but has no license.")
+    return issues
+
+
+def check_personal_vs_sensitive(dataset):
+    issues = []
+    for ds in dataset:
+        title = ds.get('title', 'Unnamed Dataset')
+        personal = ds.get("personal_data", "").lower()
+        sensitive = ds.get("sensitive_data", "").lower()
+        if personal == "yes" and sensitive == "no":
+            issues.append(f"Dataset '{title}' claims no sensitive data but contains personal data.")
+    return issues
+
+
+def check_distribution_integrity(datasets):
+    issues = []
+    for ds in datasets:
+        title = ds.get("title", "Unknown")
+        for dist in ds.get("distribution", []):
+            byte_size = dist.get("byte_size")
+            if byte_size is None:
+                issues.append(f"Dataset '{title}' has a distribution with missing byte_size.")
+            elif byte_size <= 0:
+                issues.append(f"Dataset '{title}' has invalid byte_size: {byte_size}")
+    return issues
+
+
+def validate_metadata_intentions(dmp):
+    issues = {}
+    datasets = dmp.get("dataset", [])
+    access_license_issues = check_access_vs_license(datasets)
+    personal_sensitive_issues = check_personal_vs_sensitive(datasets)
+    distribution_integrity_issues = check_distribution_integrity(datasets)
+
+    if access_license_issues:
+        issues["access_vs_license"] = access_license_issues
+    if personal_sensitive_issues:
+        issues["personal_vs_sensitive"] = personal_sensitive_issues
+    if distribution_integrity_issues:
+        issues["distribution_integrity"] = distribution_integrity_issues
+
+    return issues
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import Evaluator.validation_rules as validation_rules
+from Evaluator.evaluator import evaluate_dmp_against_fip, load_dmp
+from Evaluator.goals_checks import run_goals_scoring
+from Evaluator.ostrails_formatter import export_fip_results
+from Evaluator.projection import build_ftr_records, build_compliance_json
+from Evaluator.validation_rules import validate_metadata_intentions
+from FIP_Mapping.compiled import load_compiled_mapping
+from benchmarks.stub_server import start_stub_server, route_network_to
+from benchmarks.synthetic_dmp import generate_dmp, parse_identifier_mix
+
+# Times each evaluation stage on synthetic maDMPs of increasing size and
+# records throughput (datasets/s) and peak traced memory per stage.
+
+STAGES = [
+    "evaluate_dmp_against_fip",
+    "run_goals_scoring",
+    "validate_metadata_intentions",
+    "export_fip_results",
+    "build_compliance_json",
+]
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_MAPPING = os.path.join("FIP_Mapping", "fip_madmp_CLARIN_FIP.json")
+
+
+def _stage_functions(dmp, compiled, output_dir):
+    mapping = compiled["mapping"]
+    results = evaluate_dmp_against_fip(dmp, mapping, compiled["plan"])
+    ftr_ready = build_ftr_records(results)
+    return {
+        "evaluate_dmp_against_fip": lambda: evaluate_dmp_against_fip(dmp, mapping, compiled["plan"]),
+        "run_goals_scoring": lambda: run_goals_scoring(dmp),
+        "validate_metadata_intentions": lambda: validate_metadata_intentions(dmp),
+        "export_fip_results": lambda: export_fip_results(
+            ftr_ready, "benchmark", dmp.get("title", "benchmark"), output_dir,
+            metric_version=compiled["fip_version"], static_nodes=compiled["static_nodes"],
+        ),
+        "build_compliance_json": lambda: build_compliance_json(results),
+    }
+
+
+def _time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(sizes, stages, mapping_path, distributions=2, identifier_mix=None,
+                   template=None, repeat=3, measure_memory=True, latency=0.0, seed=0):
+    compiled = load_compiled_mapping(mapping_path)
+    server, base_url = start_stub_server(latency=latency)
+    rows = []
+    try:
+        with route_network_to(base_url), tempfile.TemporaryDirectory() as output_dir:
+            # Warm the SPDX list from the stand-in once, like a long running process would
+            validation_rules._SPDX_CACHE = None
+            validation_rules.is_license_compliant("", "")
+            for size in sizes:
+                dmp = generate_dmp(size, distributions, identifier_mix, seed, template=template)["dmp"]
+                functions = _stage_functions(dmp, compiled, output_dir)
+                for name in stages:
+                    timings = _time(functions[name], repeat)
+                    median = statistics.median(timings)
+                    row = {
+                        "stage": name,
+                        "datasets": size,
+                        "distributions_per_dataset": distributions,
+                        "repeat": repeat,
+                        "min_seconds": min(timings),
+                        "median_seconds": median,
+                        "datasets_per_second": size / median if median else None,
+                        "peak_memory_bytes": _peak_memory(functions[name]) if measure_memory else None,
+                    }
+                    rows.append(row)
+                    print(_format_row(row), flush=True)
+    finally:
+        server.shutdown()
+    return rows
+
+
+def _format_row(row):
+    peak = row["peak_memory_bytes"]
+    peak_text = f"{peak / 1024 / 1024:10.2f} MiB" if peak is not None else f"{'-':>14}"
+    return (
+        f"{row['stage']:<30}{row['datasets']:>8}{row['median_seconds'] * 1000:>12.2f} ms"
+        f"{row['datasets_per_second'] or 0:>14.0f} ds/s{peak_text}"
+    )
+
+
+def compare(rows, baseline, threshold):
+    """Return the rows whose median time regressed by more than ``threshold`` (a fraction)."""
+    reference = {(r["stage"], r["datasets"]): r for r in baseline["results"]}
+    regressions = []
+    for row in rows:
+        ref = reference.get((row["stage"], row["datasets"]))
+        if not ref or not ref["median_seconds"]:
+            continue
+        ratio = row["median_seconds"] / ref["median_seconds"]
+        if ratio > 1 + threshold:
+            regressions.append({**row, "baseline_median_seconds": ref["median_seconds"], "ratio": ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the maDMP evaluation stages on synthetic maDMPs")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma separated dataset counts (10 up to 100000)")
+    parser.add_argument("--distributions", type=int, default=2, help="Distributions per dataset")
+    parser.add_argument("--identifier-mix", help="e.g. doi=0.5,handle=0.2,url=0.2,uuid=0.05,invalid=0.05")
+    parser.add_argument("--template", help="Seed the synthetic maDMPs from this example maDMP")
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING, help="FIP mapping JSON to evaluate against")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma separated stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (median is reported)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added by the HTTP stand-in")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slower) peak memory measurement")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the generator")
+    parser.add_argument("--save", help="Write the results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare the results against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline before reporting a regression")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    mix = parse_identifier_mix(args.identifier_mix) if args.identifier_mix else None
+    template = load_dmp(args.template) if args.template else None
+
+    print(f"{'Stage':<30}{'Datasets':>8}{'Median':>15}{'Throughput':>19}{'Peak memory':>14}")
+    rows = run_benchmarks(
+        sizes, stages, args.mapping, args.distributions, mix, template,
+        repeat=args.repeat, measure_memory=not args.no_memory,
+        latency=args.latency_ms / 1000, seed=args.seed,
+    )
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "mapping": args.mapping,
+        "template": args.template,
+        "identifier_mix": mix,
+        "results": rows,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Benchmark results saved to: {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(rows, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} ({r['datasets']} datasets): "
+                  f"{r['median_seconds'] * 1000:.2f} ms vs {r['baseline_median_seconds'] * 1000:.2f} ms "
+                  f"({r['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlparse, parse_qs
+
+import requests
+
+import Evaluator.goals_checks as goals_checks
+import Evaluator.validation_rules as validation_rules
+
+# Local HTTP stand-in for the external services the evaluator talks to
+# (availability HEAD checks and the SPDX license list), so benchmarks do not
+# depend on the network.
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SPDX_FIXTURE = os.path.join(FIXTURES, "spdx_licenses.json")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    status = 200
+
+    def _target(self):
+        return parse_qs(urlparse(self.path).query).get("url", [""])[0]
+
+    def _respond(self, send_body):
+        if self.latency:
+            time.sleep(self.latency)
+        body = b""
+        content_type = "text/plain"
+        if "spdx.org/licenses/licenses.json" in self._target():
+            with open(SPDX_FIXTURE, "rb") as fh:
+                body = fh.read()
+            content_type = "application/json"
+        self.send_response(self.status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency=0.0, status=200, port=0):
+    """Start the stand-in in a daemon thread; returns ``(server, base_url)``."""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"latency": latency, "status": status})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class _Redirect:
+    """Drop-in for the ``requests`` functions used by the checks that sends every
+    request to the stand-in, passing the original URL as a query parameter."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def _url(self, url):
+        return f"{self.base_url}/?url={quote(url, safe='')}"
+
+    def head(self, url, **kwargs):
+        return requests.head(self._url(url), **kwargs)
+
+    def get(self, url, **kwargs):
+        return requests.get(self._url(url), **kwargs)
+
+
+@contextmanager
+def route_network_to(base_url):
+    """Route the availability checks and SPDX lookups to the stand-in at ``base_url``."""
+    redirect = _Redirect(base_url)
+    originals = (goals_checks.requests, validation_rules.requests)
+    goals_checks.requests = redirect
+    validation_rules.requests = redirect
+    try:
+        yield
+    finally:
+        goals_checks.requests, validation_rules.requests = originals
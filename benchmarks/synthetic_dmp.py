@@ -0,0 +1,191 @@
+import argparse
+import copy
+import json
+import random
+import uuid
+
+from Evaluator.evaluator import load_dmp
+
+# Generator of synthetic maDMPs following the RDA DMP Common Standard,
+# used to benchmark the evaluator on plans far larger than the examples.
+
+DEFAULT_IDENTIFIER_MIX = {"doi": 0.5, "handle": 0.2, "url": 0.2, "uuid": 0.05, "invalid": 0.05}
+
+LICENSES = [
+    "https://creativecommons.org/licenses/by/4.0/",
+    "https://creativecommons.org/licenses/by-sa/4.0/",
+    "https://creativecommons.org/publicdomain/zero/1.0/",
+    "https://opensource.org/license/mit/",
+    "https://example.org/custom-license",
+]
+ACCESS = ["open", "open", "shared", "closed"]
+FORMATS = ["text/csv", "application/json", "application/zip", "image/tiff"]
+METADATA_STANDARDS = [
+    ("http://www.dublincore.org/specifications/dublin-core/dcmi-terms/", "url"),
+    ("https://schema.org/Dataset", "url"),
+    ("https://schema.datacite.org/meta/kernel-4/", "url"),
+    ("DataCite", "other"),
+]
+
+
+def parse_identifier_mix(text):
+    """Parse ``doi=0.5,handle=0.3,url=0.2`` into a weights dict."""
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_IDENTIFIER_MIX:
+            raise ValueError(f"Unknown identifier kind '{kind}', expected one of {sorted(DEFAULT_IDENTIFIER_MIX)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def _identifier(rng, kind, i, base_url):
+    if kind == "doi":
+        return f"https://doi.org/10.{rng.randint(1000, 99999)}/bench.{i}", "doi"
+    if kind == "handle":
+        return f"https://hdl.handle.net/{rng.randint(10000, 99999)}/bench-{i}", "handle"
+    if kind == "url":
+        return f"{base_url}/dataset/{i}", "url"
+    if kind == "uuid":
+        return str(uuid.UUID(int=rng.getrandbits(128))), "other"
+    return f"not a valid identifier {i}", "other"
+
+
+def _distribution(rng, ds_index, dist_index, base_url):
+    distribution = {
+        "title": f"Distribution {dist_index} of dataset {ds_index}",
+        "data_access": rng.choice(ACCESS),
+        "access_url": f"{base_url}/dataset/{ds_index}/files/{dist_index}",
+        "format": [rng.choice(FORMATS)],
+        "host": {
+            "title": "Benchmark Repository",
+            "url": f"{base_url}/repository/{ds_index % 7}",
+            "pid_system": [rng.choice(["doi", "handle", "other"])],
+        },
+        "license": [
+            {
+                "license_ref": rng.choice(LICENSES),
+                "start_date": "2024-01-01",
+            }
+        ],
+    }
+    # Leave some gaps so completeness/consistency checks have work to do
+    if rng.random() > 0.1:
+        distribution["byte_size"] = rng.randint(1, 10 ** 10)
+    return distribution
+
+
+def _dataset(rng, i, distributions, kinds, weights, base_url, template=None):
+    identifier, id_type = _identifier(rng, rng.choices(kinds, weights)[0], i, base_url)
+    if template is not None:
+        dataset = copy.deepcopy(template)
+        dataset["title"] = f"{dataset.get('title', 'Dataset')} #{i}"
+    else:
+        standard, standard_type = rng.choice(METADATA_STANDARDS)
+        dataset = {
+            "title": f"Synthetic dataset {i}",
+            "description": f"Dataset {i} generated for benchmarking",
+            "type": "dataset",
+            "personal_data": rng.choice(["yes", "no", "unknown"]),
+            "sensitive_data": rng.choice(["yes", "no", "unknown"]),
+            "data_quality_assurance": ["PROV-O"] if rng.random() < 0.5 else [],
+            "metadata": [
+                {
+                    "language": "eng",
+                    "metadata_standard_id": {"identifier": standard, "type": standard_type},
+                }
+            ],
+        }
+    dataset["dataset_id"] = {"identifier": identifier, "type": id_type}
+    dataset["distribution"] = [_distribution(rng, i, d, base_url) for d in range(distributions)]
+    return dataset
+
+
+def generate_dmp(
+    datasets=10,
+    distributions=2,
+    identifier_mix=None,
+    seed=0,
+    base_url="https://repository.example.org",
+    template=None,
+):
+    """Return a synthetic maDMP (wrapped in ``{"dmp": ...}``).
+
+    ``template`` is an optional maDMP (e.g. one of ``examples/``) whose
+    top-level fields and datasets are reused; identifiers and distributions
+    are always generated.
+    """
+    rng = random.Random(seed)
+    mix = identifier_mix or DEFAULT_IDENTIFIER_MIX
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+
+    templates = []
+    if template is not None:
+        dmp = {k: copy.deepcopy(v) for k, v in template.items() if k != "dataset"}
+        templates = template.get("dataset", [])
+    else:
+        dmp = {
+            "title": f"Synthetic maDMP with {datasets} datasets",
+            "description": "Generated for benchmarking the maDMP evaluator",
+            "language": "eng",
+            "created": "2024-01-01T00:00:00",
+            "modified": "2024-01-01T00:00:00",
+            "ethical_issues_exist": "no",
+            "dmp_id": {"identifier": f"https://doi.org/10.9999/dmp.{seed}", "type": "doi"},
+            "contact": {
+                "name": "Benchmark Contact",
+                "mbox": "contact@example.org",
+                "contact_id": {"identifier": "https://orcid.org/0000-0000-0000-0000", "type": "orcid"},
+            },
+            "project": [
+                {
+                    "title": "Benchmark project",
+                    "funding": [
+                        {
+                            "funder_id": {"identifier": "https://doi.org/10.13039/501100000780", "type": "fundref"},
+                            "grant_id": {"identifier": "123456", "type": "other"},
+                            "funding_status": "granted",
+                        }
+                    ],
+                }
+            ],
+        }
+
+    dmp["dataset"] = [
+        _dataset(
+            rng, i, distributions, kinds, weights, base_url,
+            template=templates[i % len(templates)] if templates else None,
+        )
+        for i in range(datasets)
+    ]
+    return {"dmp": dmp}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic maDMP for benchmarking")
+    parser.add_argument("output", help="Path of the JSON file to write")
+    parser.add_argument("--datasets", type=int, default=10, help="Number of datasets")
+    parser.add_argument("--distributions", type=int, default=2, help="Distributions per dataset")
+    parser.add_argument(
+        "--identifier-mix",
+        default=None,
+        help="Weights of dataset identifier kinds, e.g. doi=0.5,handle=0.2,url=0.2,uuid=0.05,invalid=0.05",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--template", help="maDMP (e.g. from examples/) to seed top-level fields and datasets from")
+    args = parser.parse_args()
+
+    mix = parse_identifier_mix(args.identifier_mix) if args.identifier_mix else None
+    template = load_dmp(args.template) if args.template else None
+    dmp = generate_dmp(args.datasets, args.distributions, mix, args.seed, template=template)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(dmp, fh, indent=2)
+    print(f"Synthetic maDMP saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,142 +1,503 @@
 import argparse
-import os
+import contextlib
+import cProfile
+import glob
+import hashlib
+import io
 import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import time
+import traceback
 
-from FIP_Mapping.mapping import load_mapping
-from FIP_Mapping.utils import transform_mapping
-from Evaluator.goals_checks import run_goals_scoring
+from FIP_Mapping.compiled import load_compiled_mapping
+from Evaluator.goals_checks import run_goals_scoring, remember_url_statuses
 from Evaluator.validation_rules import validate_metadata_intentions
-from Evaluator.ostrails_formatter import export_fip_results, DEFAULT_VERSION
+from Evaluator.ostrails_formatter import export_fip_results
+from Evaluator.network import network_policy, skipped_checks, get_default_policy, POLICIES
+from Evaluator.pipeline import Pipeline
+from Evaluator.profiling import stage, format_breakdown, snapshot, reset
+from Evaluator.serialization import dump, dumps, set_default_format, get_default_format, FORMATS
+from Evaluator.archive import ArtifactArchive, DEFAULT_SHARDS, DEFAULT_CHUNK_BYTES
+from Evaluator.projection import (
+    project_results,
+    compliance_table_text,
+    recommendations_text,
+    write_compliance_table,
+    write_recommendations,
+)
 from Evaluator.evaluator import (
     load_dmp,
     evaluate_dmp_against_fip,
-    summarize_results,
-    save_recommendations,
-    save_compliance_table, 
 )
 
+# Daemon mode: ``--serve`` keeps one process with the imports done and every
+# FIP_Mapping/*.json compiled in memory; ``--daemon`` sends the run to it and
+# prints its output, so repeated evaluations skip interpreter start-up.
+# Requests are handled one at a time (stage timers and the JSON format are
+# process-wide). Without AF_UNIX, --socket takes a HOST:PORT instead.
+DEFAULT_SOCKET = (
+    os.path.join(tempfile.gettempdir(), "dmp-evaluate.sock")
+    if hasattr(socket, "AF_UNIX") else "127.0.0.1:8765"
+)
+MAPPING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "FIP_Mapping")
+
+# Watch mode: ``--watch`` polls --input (a file or a directory of maDMPs) and
+# the mapping, and re-evaluates a file once it has been stable for --debounce
+# seconds and its content hash differs from the last evaluated one. The
+# compiled mapping, the SPDX license list and URL statuses stay in memory
+# between runs, so a save only costs the evaluation itself.
+WATCH_POLL_INTERVAL = 0.05
+# URL statuses are re-checked after this many seconds in watch mode
+WATCH_URL_STATUS_TTL = 600.0
 
-def main():
+# Output layouts: five loose files per maDMP in --output, or records appended
+# to a sharded tar archive there (Evaluator/archive.py), for corpus runs
+FILES = "files"
+ARCHIVE = "archive"
+OUTPUT_LAYOUTS = (FILES, ARCHIVE)
+
+# Captured at import so a daemon request cannot inherit the previous one's --json-format
+_DEFAULT_JSON_FORMAT = get_default_format()
+_DEFAULT_NETWORK = get_default_policy()
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description="Evaluate a maDMP against a FIP mapping.")
-    parser.add_argument('--input', required=True, help='Path to the maDMP JSON file')
-    parser.add_argument('--mapping', required=True, help='Path to the FIP mapping JSON file')
-    parser.add_argument('--output', required=True, help='Output folder to save evaluation results')
-
-    args = parser.parse_args()
-
-    os.makedirs(args.output, exist_ok=True)
-
-    # Load the maDMP and FIP mapping
-    dmp = load_dmp(args.input)
-    mapping_raw = load_mapping(args.mapping)
-    mapping = transform_mapping(mapping_raw)
-    fip_version = mapping_raw.get("FIP_Version", DEFAULT_VERSION)
-
-    evaluation_results = evaluate_dmp_against_fip(dmp, mapping)
-
-    # Transform into OSTrails TestResult format
-    ftr_ready = []
-    for idx, r in enumerate(evaluation_results, start=1):
-        metric_id = f"FIP{str(idx).zfill(2)}.Q{idx}"
-        benchmark = r.get("allowed_values", [])
-        if benchmark and not isinstance(benchmark, list):
-            benchmark = [benchmark]
-        ###
-        fair_principle = r.get("FAIR_principle")
-        ###
-
-        field_val = json.dumps(r.get("field_value"), ensure_ascii=False)
-        comment = (
-            f"Field status: {r['field_status']}; maDMP value: {field_val}; "
-            f"compliance: {r['compliance_status']}"
-        )
+    parser.add_argument('--input', help='Path to the maDMP JSON file')
+    parser.add_argument('--mapping', help='Path to the FIP mapping JSON file')
+    parser.add_argument('--output', help='Output folder to save evaluation results')
+    parser.add_argument('--output-layout', choices=OUTPUT_LAYOUTS, default=FILES,
+                        help='files (default): one file per artifact in --output; archive: append the artifacts '
+                             'to a sharded tar archive in --output (see python -m Evaluator.archive)')
+    parser.add_argument('--archive-shards', type=int, default=DEFAULT_SHARDS,
+                        help=f'Shards of a new archive (default {DEFAULT_SHARDS})')
+    parser.add_argument('--archive-chunk-mb', type=int, default=DEFAULT_CHUNK_BYTES // (1024 * 1024),
+                        help='Size after which an archive shard starts a new chunk file (default '
+                             f'{DEFAULT_CHUNK_BYTES // (1024 * 1024)})')
+    parser.add_argument('--profile', action='store_true', help='Print a per-stage timing breakdown and counters')
+    parser.add_argument('--profile-output', help='Also write cProfile statistics (pstats format) to this file')
+    parser.add_argument('--store', help='Also record the evaluation in this SQLite result store')
+    parser.add_argument('--triples', help='Also add the OSTrails results to this SQLite triple store')
+    parser.add_argument('--json-format', choices=FORMATS, default=_DEFAULT_JSON_FORMAT,
+                        help='JSON output: pretty (indent=2, default), fast (indented, orjson when installed) or compact')
+    parser.add_argument('--network', choices=POLICIES, default=_DEFAULT_NETWORK,
+                        help='online (default), cached-only (no requests, previously fetched data only) or offline '
+                             '(no requests, no cache); checks that need the network are skipped and reported')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a daemon with the mappings preloaded, answering --daemon clients')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'Daemon socket for --serve (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--daemon', nargs='?', const=DEFAULT_SOCKET, metavar='SOCKET',
+                        help='Run the evaluation in a --serve daemon; falls back to a local run if none is listening')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and re-evaluate --input (a file or a directory of maDMPs) whenever a '
+                             'file\'s content changes')
+    parser.add_argument('--debounce', type=float, default=0.1,
+                        help='Seconds a changed file must stay unchanged before --watch re-evaluates it (default 0.1)')
+    return parser
 
-        values = r.get("field_value")
-        if not isinstance(values, list):
-            values = [values]
 
-        comp_list = r.get("compliance_list") or r.get("compliance_status")
-        if not isinstance(comp_list, list):
-            comp_list = [comp_list]
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
 
-        log_val = []
-        status_vals = []
-        for val, comp in zip(values, comp_list):
-            if isinstance(val, (dict, list)):
-                log_val.append(json.dumps(val, ensure_ascii=False))
-            else:
-                log_val.append(str(val))
-            if r.get("compliance_status") == "Not Applicable":
-                status_vals.append("indeterminate")
-                continue
-            if not r.get("allowed_values"):
-                status_vals.append("indeterminate")
+    if args.serve:
+        serve(args.socket)
+        return 0
+
+    missing = [f"--{name}" for name in ("input", "mapping", "output") if not getattr(args, name)]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+
+    if args.watch:
+        set_default_format(args.json_format)
+        return watch(args)
+
+    if args.daemon:
+        exit_code = run_on_daemon(args.daemon, args)
+        if exit_code is not None:
+            return exit_code
+
+    set_default_format(args.json_format)
+
+    profiler = None
+    if args.profile_output:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    with network_policy(args.network):
+        evaluate(args)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_output)
+    if args.profile or args.profile_output:
+        print("\nProfile:")
+        print(format_breakdown())
+    if args.profile_output:
+        print(f"cProfile statistics saved to: {args.profile_output}")
+    return 0
+
+
+def _address(spec):
+    if hasattr(socket, "AF_UNIX") and ":" not in spec:
+        return socket.AF_UNIX, spec
+    host, _, port = spec.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def _forward_argv(args):
+    # Paths are made absolute because the daemon runs in its own directory
+    argv = ["--json-format", args.json_format, "--network", args.network, "--output-layout", args.output_layout,
+            "--archive-shards", str(args.archive_shards), "--archive-chunk-mb", str(args.archive_chunk_mb)]
+    for name in ("input", "mapping", "output", "store", "triples", "profile_output"):
+        value = getattr(args, name)
+        if value:
+            argv += [f"--{name.replace('_', '-')}", os.path.abspath(value)]
+    if args.profile:
+        argv.append("--profile")
+    return argv
+
+
+def run_on_daemon(spec, args):
+    """Run ``args`` on the daemon at ``spec`` and print its output.
+
+    Returns the exit code, or None when no daemon is reachable.
+    """
+    family, address = _address(spec)
+    request = json.dumps({"argv": _forward_argv(args)}).encode("utf-8") + b"\n"
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as conn:
+            conn.connect(address)
+            conn.sendall(request)
+            with conn.makefile("rb") as reader:
+                reply = json.loads(reader.readline())
+    except (OSError, ValueError) as exc:
+        print(f"No evaluation daemon at {spec} ({exc}); evaluating locally.", file=sys.stderr)
+        return None
+    sys.stdout.write(reply["output"])
+    return reply["exit_code"]
+
+
+def run_request(argv):
+    """Run one CLI invocation inside the daemon; returns (exit_code, captured output)."""
+    reset()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            exit_code = main(argv)
+        except SystemExit as exc:  # argparse errors
+            exit_code = exc.code if isinstance(exc.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+    return exit_code, output.getvalue()
+
+
+# Options that would make the daemon serve, forward or run forever
+_NOT_FORWARDED = ("--serve", "--daemon", "--watch")
+
+
+def _not_forwarded(argv):
+    # argparse also accepts unambiguous prefixes such as --wat
+    for arg in argv:
+        name = str(arg).split("=", 1)[0]
+        if name.startswith("--") and len(name) > 2:
+            for flag in _NOT_FORWARDED:
+                if flag.startswith(name):
+                    return flag
+    return None
+
+
+class _EvaluationHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            argv = json.loads(self.rfile.readline())["argv"]
+        except (ValueError, KeyError, TypeError):
+            exit_code, output = 2, "Malformed daemon request\n"
+        else:
+            if _not_forwarded(argv):
+                exit_code, output = 2, f"{', '.join(_NOT_FORWARDED)} cannot be forwarded to a daemon\n"
             else:
-                status_vals.append(
-                    "pass" if r["field_status"] == "Present" and comp == "Compliant" else "fail"
-                )
-
-
-        ftr_ready.append({
-            "metric_id": metric_id,
-            "metric_label": r["FIP_question"],
-            "test_id": f"Test_{metric_id}",
-            "benchmark": benchmark,
-            ###
-            "fair_principle": fair_principle,
-            ###
-            "comment": comment,
-            "log_value": log_val,
-            "subject": r["DCS_field"],
-            "status": status_vals,
-        })
-
-
-    present, compliant, total = summarize_results(evaluation_results)
-    print(f"Evaluation Complete: \n{present}/{total} fields present. \n{compliant}/{total} compliant.")
+                exit_code, output = run_request(argv)
+        reply = {"exit_code": exit_code, "output": output}
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+def preload():
+    """Import the deferred dependencies and compile every bundled mapping."""
+    import requests  # noqa: F401
+    import validators  # noqa: F401
+    import Evaluator.result_store  # noqa: F401
+
+    mappings = sorted(glob.glob(os.path.join(MAPPING_DIR, "*.json")))
+    for path in mappings:
+        load_compiled_mapping(path)
+    return mappings
+
+
+def serve(spec):
+    family, address = _address(spec)
+    mappings = preload()
+    if family == socket.AF_INET:
+        server = socketserver.TCPServer(address, _EvaluationHandler)
+    else:
+        if os.path.exists(address):
+            os.remove(address)  # stale socket from a previous daemon
+        server = socketserver.UnixStreamServer(address, _EvaluationHandler)
+    print(f"Evaluation daemon listening on {spec} ({len(mappings)} mappings preloaded)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if family != socket.AF_INET and os.path.exists(address):
+            os.remove(address)
+
+
+def _watched_files(path):
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.json")))
+    return [path]
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _content_hash(path):
+    with open(path, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def watch(args):
+    """Re-evaluate the --input file(s) whenever their content changes, until interrupted."""
+    load_compiled_mapping(args.mapping)
+    remember_url_statuses(WATCH_URL_STATUS_TTL)
+    signatures = {}
+    evaluated = {}  # path -> content hash of the last evaluation
+    changed = {}  # path -> when its last change was seen
+    mapping_signature = _signature(args.mapping)
+    print(f"Watching {args.input} (mapping {args.mapping}), press Ctrl+C to stop", flush=True)
+    try:
+        while True:
+            now = time.monotonic()
+            signature = _signature(args.mapping)
+            if signature != mapping_signature:
+                # Everything is re-evaluated against the changed mapping
+                mapping_signature = signature
+                evaluated.clear()
+                changed.update((path, now) for path in signatures)
+            paths = _watched_files(args.input)
+            for path in set(signatures) - set(paths):
+                del signatures[path]
+                evaluated.pop(path, None)
+                changed.pop(path, None)
+            for path in paths:
+                signature = _signature(path)
+                if signature is not None and signature != signatures.get(path):
+                    signatures[path] = signature
+                    changed[path] = now
+            for path in [p for p, seen in changed.items() if now - seen >= args.debounce]:
+                del changed[path]
+                try:
+                    digest = _content_hash(path)
+                except OSError:
+                    continue
+                if evaluated.get(path) != digest:
+                    evaluated[path] = digest
+                    _watch_evaluate(args, path)
+            time.sleep(WATCH_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        return 0
+
+
+def _watch_evaluate(args, path):
+    name = os.path.basename(path)
+    run_args = argparse.Namespace(**{**vars(args), "input": path})
+    reset()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), network_policy(args.network) as skipped:
+            done = evaluate(run_args)
+    except Exception as e:
+        print(f"[{time.strftime('%H:%M:%S')}] {name}: failed: {type(e).__name__}: {e}", flush=True)
+        return
+    present, compliant, total = done["views"]["summary"]
+    issues = sum(len(check.get("issues", [])) for check in done["goals"].values())
+    line = (f"[{time.strftime('%H:%M:%S')}] {name}: {present}/{total} present, {compliant}/{total} compliant, "
+            f"{issues} goal issues ({(time.perf_counter() - started) * 1000:.0f} ms)")
+    if skipped:
+        line += f", {sum(skipped.values())} checks skipped under '{args.network}'"
+    print(line, flush=True)
+
+
+def evaluate(args):
+    # With the archive layout the artifacts are collected here and appended as one record
+    archive = None
+    artifacts = {}
+    if args.output_layout == ARCHIVE:
+        archive = ArtifactArchive(args.output, args.archive_shards, args.archive_chunk_mb * 1024 * 1024)
+    else:
+        os.makedirs(args.output, exist_ok=True)
+
+    # Load the maDMP
+    with stage("load"):
+        dmp = load_dmp(args.input)
 
     base_filename = os.path.splitext(os.path.basename(args.input))[0]
     #csv_output = os.path.join(args.output, f"{base_filename}_mapping_report.csv")
     txt_output = os.path.join(args.output, f"{base_filename}_recommendations.txt")
+    compliance_output = os.path.join(args.output, f"{base_filename}_compliance_table.csv")
+    goals_output = os.path.join(args.output, f"{base_filename}_goals_check.json")
+    validation_output = os.path.join(args.output, f"{base_filename}_metadata_validation.json")
 
-    #save_evaluation_results(evaluation_results, csv_output)
-    save_recommendations(evaluation_results, txt_output)
+    def load_mapping():
+        with stage("mapping_transform"):
+            return load_compiled_mapping(args.mapping)
 
-    ###########
-    compliance_output = os.path.join(args.output, f"{base_filename}_compliance_table.csv")
-    save_compliance_table(evaluation_results, compliance_output)
-    print(f"Compliance details saved to: {compliance_output}")
+    def evaluate_fip(compiled):
+        with stage("fip_evaluation"):
+            return evaluate_dmp_against_fip(dmp, compiled["mapping"], compiled["plan"])
 
-    #print(f"Saved evaluation report to: {csv_output}")
-    print(f"Saved recommendations to: {txt_output}")
+    # FTR records, compliance rows, recommendations and counts in one pass
+    def project(evaluation_results):
+        with stage("projection"):
+            return project_results(evaluation_results)
+
+    def write_reports(views):
+        #save_evaluation_results(evaluation_results, csv_output)
+        with stage("reports"):
+            if archive is not None:
+                artifacts[os.path.basename(txt_output)] = recommendations_text(views["recommendations"])
+                artifacts[os.path.basename(compliance_output)] = compliance_table_text(views["compliance"])
+                return
+            write_recommendations(views["recommendations"], txt_output)
+            write_compliance_table(views["compliance"], compliance_output)
+
+    triple_store = None
+    if args.triples:
+        from Evaluator.triple_store import TripleStore
+
+        triple_store = TripleStore(args.triples)
 
     # Export JSON-LD according to OSTrails
-    fip_jsonld = export_fip_results(
-        ftr_ready,
-        dmp_id=base_filename,
-        dmp_title=dmp.get("title", base_filename),
-        output_dir=args.output,
-        metric_version=fip_version,
-    )
-    print(f"OSTrails Format results saved to: {fip_jsonld}")
+    def write_jsonld(compiled, views):
+        return export_fip_results(
+            views["ftr"],
+            dmp_id=base_filename,
+            dmp_title=dmp.get("title", base_filename),
+            output_dir=args.output,
+            metric_version=compiled["fip_version"],
+            static_nodes=compiled["static_nodes"],
+            triple_store=triple_store,
+            mapping=args.mapping,
+            artifacts=artifacts if archive is not None else None,
+        )
 
     # Run goals checks validation
-    goals_results = run_goals_scoring(dmp)
+    def goals_checks():
+        with stage("goals_checks"):
+            goals_results = run_goals_scoring(dmp)
+        with stage("reports"):
+            if archive is not None:
+                artifacts[os.path.basename(goals_output)] = dumps(goals_results)
+            else:
+                dump(goals_results, goals_output)
+        return goals_results
 
-    goals_output = os.path.join(args.output, f"{base_filename}_goals_check.json")
-    with open(goals_output, 'w', encoding='utf-8') as file:
-        json.dump(goals_results, file, indent=2)
+    # Validate metadata
+    def metadata_validation():
+        with stage("metadata_validation"):
+            metadata_issues = validate_metadata_intentions(dmp)
+        with stage("reports"):
+            if archive is not None:
+                artifacts[os.path.basename(validation_output)] = dumps(metadata_issues)
+            else:
+                dump(metadata_issues, validation_output)
 
-    print(f"Goals evaluation results saved to: {goals_output}")
+    # The goals checks wait on the network, so they start right away and run
+    # next to the FIP evaluation; every artifact is written once it is ready
+    pipeline = Pipeline()
+    pipeline.add("goals", goals_checks)
+    pipeline.add("validation", metadata_validation)
+    pipeline.add("mapping", load_mapping)
+    pipeline.add("evaluation", evaluate_fip, after=("mapping",))
+    pipeline.add("views", project, after=("evaluation",))
+    pipeline.add("reports", write_reports, after=("views",))
+    pipeline.add("jsonld", write_jsonld, after=("mapping", "views"))
+    try:
+        done = pipeline.run()
+    finally:
+        if triple_store is not None:
+            triple_store.close()
 
-    # Validate metadata 
-    metadata_issues = validate_metadata_intentions(dmp)
+    present, compliant, total = done["views"]["summary"]
+    print(f"Evaluation Complete: \n{present}/{total} fields present. \n{compliant}/{total} compliant.")
+    skipped = skipped_checks()
+    skipped_output = os.path.join(args.output, f"{base_filename}_skipped_checks.json")
 
-    validation_output = os.path.join(args.output, f"{base_filename}_metadata_validation.json")
-    with open(validation_output, 'w', encoding='utf-8') as file:
-        json.dump(metadata_issues, file, indent=2)
+    if archive is not None:
+        if skipped:
+            artifacts[os.path.basename(skipped_output)] = dumps(
+                {"network_policy": args.network, "skipped_checks": skipped})
+        # In the order of the file layout, whichever stage finished first
+        names = [os.path.basename(p) for p in (txt_output, compliance_output, goals_output,
+                                               validation_output, skipped_output)]
+        names.insert(2, done["jsonld"])
+        with stage("archive_write"):
+            entry = archive.append(base_filename, {name: artifacts[name] for name in names if name in artifacts})
+        print(f"Saved {len(entry['artifacts'])} artifacts to archive: {args.output} "
+              f"({entry['chunk']} at offset {entry['offset']})")
+        if args.triples:
+            print(f"OSTrails results added to triple store: {args.triples}")
+        if skipped:
+            print(f"Checks skipped under network policy '{args.network}' saved to the archive")
+        _store(args, dmp, done, base_filename)
+        return done
 
+    print(f"Compliance details saved to: {compliance_output}")
+
+    #print(f"Saved evaluation report to: {csv_output}")
+    print(f"Saved recommendations to: {txt_output}")
+    print(f"OSTrails Format results saved to: {done['jsonld']}")
+    if args.triples:
+        print(f"OSTrails results added to triple store: {args.triples}")
+    print(f"Goals evaluation results saved to: {goals_output}")
     print(f"Metadata validation results saved to: {validation_output}")    
 
+    # Checks that could not run under the network policy
+    if not skipped:
+        if os.path.exists(skipped_output):
+            os.remove(skipped_output)  # left over from an earlier run
+    else:
+        dump({"network_policy": args.network, "skipped_checks": skipped}, skipped_output)
+        print(f"Checks skipped under network policy '{args.network}' saved to: {skipped_output}")
+
+    _store(args, dmp, done, base_filename)
+    return done
+
+
+def _store(args, dmp, done, base_filename):
+    if args.store:
+        from Evaluator.result_store import ResultStore, make_record
+
+        store = ResultStore(args.store)
+        timings = {name: s["seconds"] for name, s in snapshot()["stages"].items()}
+        evaluation_id = store.save(make_record(
+            dmp, done["evaluation"], args.mapping, done["mapping"]["fip_version"],
+            dmp_id=base_filename, goals=done["goals"], timings=timings,
+        ))
+        store.close()
+        print(f"Evaluation {evaluation_id} recorded in: {args.store}")
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import argparse
+import glob
+import gzip
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+from Evaluator.evaluator import unwrap_dmp
+from Evaluator.serialization import load
+
+# Streaming maDMP -> N-Triples/N-Quads converter for whole corpora. Every
+# field of the RDA DMP Common Standard is converted (and any extra field, by
+# the same rules): nested objects become nodes of class <key in CamelCase>
+# linked with dmp:has<Key>, scalar fields become dmp:<key in camelCase>
+# values, typed where the DCS defines a type and the value conforms. Nodes
+# get stable IRIs from the file name and their JSON path, so files can be
+# converted independently, in parallel, and each DMP is its own named graph
+# in N-Quads. Missing or null fields are skipped. Memory is bounded by the
+# files in flight, not by the corpus.
+
+DMP = "http://example.org/dmp#"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# maDMP nodes are <DMP_NAMESPACE><file name>/<path>, e.g. .../Health_Demo/dataset/0/distribution/1
+DMP_NAMESPACE = "http://localhost/dmp-evaluation/dmp/"
+
+ROOT_CLASS = "DataManagementPlan"
+
+# Files per task sent to a worker process
+BATCH_SIZE = 16
+
+# DCS fields whose values are IRIs when they are well formed
+IRI_FIELDS = {"access_url", "download_url", "url", "license_ref"}
+# DCS fields with a date or date-time value
+DATE_FIELDS = {"created", "modified", "issued", "available_until", "start_date", "start", "end"}
+
+_IRI = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:[^\s<>\"{}|\\^`]*$")
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?$")
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_NEEDS_ESCAPE = re.compile(r'[\\"\n\r\t\x00-\x1f\x7f]')
+_NODE_SAFE = "/:@!$&'()*+,;="
+
+
+def _camel(key, upper=False):
+    parts = [p for p in re.split(r"[_\W]+", str(key)) if p]
+    if not parts:
+        return "field"
+    text = "".join(p[:1].upper() + p[1:] for p in parts)
+    return text if upper else text[:1].lower() + text[1:]
+
+
+def _escape(text):
+    if not _NEEDS_ESCAPE.search(text):
+        return text
+    return _NEEDS_ESCAPE.sub(lambda m: _ESCAPES.get(m.group(), f"\\u{ord(m.group()):04X}"), text)
+
+
+def _literal(value, datatype=None):
+    text = f'"{_escape(value)}"'
+    return f"{text}^^<{datatype}>" if datatype else text
+
+
+def _object(key, value):
+    # N-Triples form of a scalar field value, or None for null
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return _literal("true" if value else "false", XSD + "boolean")
+    if isinstance(value, int):
+        return _literal(str(value), XSD + "integer")
+    if isinstance(value, float):
+        if value != value:
+            return _literal("NaN", XSD + "double")
+        if value in (float("inf"), float("-inf")):
+            return _literal("INF" if value > 0 else "-INF", XSD + "double")
+        text = repr(value)
+        # xsd:decimal has no exponent form (repr gives e.g. 1e+20 and 1.5e-07)
+        return _literal(text, XSD + ("double" if "e" in text else "decimal"))
+    text = str(value)
+    if key in IRI_FIELDS and _IRI.match(text):
+        return f"<{text}>"
+    if key in DATE_FIELDS:
+        if _DATETIME.match(text):
+            return _literal(text, XSD + "dateTime")
+        if _DATE.match(text):
+            return _literal(text, XSD + "date")
+    return _literal(text)
+
+
+def dmp_statements(dmp, name, base=DMP_NAMESPACE):
+    """Yield ``(subject, predicate, object)`` N-Triples terms for one maDMP.
+
+    ``name`` (usually the file name without extension) makes the node IRIs.
+    """
+    root = f"<{base}{quote(name, safe='')}"
+    type_predicate = f"<{RDF_TYPE}>"
+    stack = [(root + ">", ROOT_CLASS, unwrap_dmp(dmp) if isinstance(dmp, dict) else {}, root)]
+    while stack:
+        subject, cls, obj, path = stack.pop()
+        yield subject, type_predicate, f"<{DMP}{cls}>"
+        for key, value in obj.items():
+            values = value if isinstance(value, list) else [value]
+            many = isinstance(value, list)
+            for index, item in enumerate(values):
+                if isinstance(item, dict):
+                    child = f"{path}/{quote(str(key), safe=_NODE_SAFE)}" + (f"/{index}" if many else "")
+                    yield subject, f"<{DMP}has{_camel(key, upper=True)}>", child + ">"
+                    stack.append((child + ">", _camel(key, upper=True), item, child))
+                elif isinstance(item, list):
+                    continue  # nested arrays are not part of the DCS
+                else:
+                    term = _object(key, item)
+                    if term is not None:
+                        yield subject, f"<{DMP}{_camel(key)}>", term
+
+
+def convert_file(path, fmt="nquads", base=DMP_NAMESPACE):
+    """Convert one maDMP file; returns ``(path, text, triples, error)``."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        dmp = load(path)
+    except (OSError, ValueError) as e:
+        return path, "", 0, f"{type(e).__name__}: {e}"
+    graph = f" <{base}{quote(name, safe='')}>" if fmt == "nquads" else ""
+    lines = [f"{s} {p} {o}{graph} .\n" for s, p, o in dmp_statements(dmp, name, base)]
+    return path, "".join(lines), len(lines), None
+
+
+def _convert_batch(paths, fmt, base):
+    return [convert_file(path, fmt, base) for path in paths]
+
+
+def _batches(files, size):
+    batch = []
+    for path in files:
+        batch.append(path)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _input_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "*.json")))
+        else:
+            yield from sorted(glob.glob(path)) or [path]
+
+
+def _open_output(output):
+    if output == "-":
+        return sys.stdout
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    if output.endswith(".gz"):
+        return gzip.open(output, "wt", encoding="utf-8", newline="\n")
+    return open(output, "w", encoding="utf-8", newline="\n")
+
+
+def convert_corpus(paths, output, fmt="nquads", workers=None, base=DMP_NAMESPACE, on_error=None,
+                   batch_size=BATCH_SIZE):
+    """Convert every maDMP under ``paths`` into one N-Quads/N-Triples stream.
+
+    Files are converted in batches of ``batch_size`` on ``workers`` processes
+    (1: in this process) and written in input order; at most ``4 * workers``
+    batches of converted files are held in memory. Files that cannot be read are reported to ``on_error(path,
+    error)`` and skipped. Returns {"files", "failed", "triples", "seconds"}.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    stats = {"files": 0, "failed": 0, "triples": 0}
+    out = _open_output(output)
+
+    def write(result):
+        path, text, triples, error = result
+        if error is not None:
+            stats["failed"] += 1
+            if on_error is not None:
+                on_error(path, error)
+            return
+        out.write(text)
+        stats["files"] += 1
+        stats["triples"] += triples
+
+    try:
+        files = _input_files(paths)
+        if workers == 1:
+            for path in files:
+                write(convert_file(path, fmt, base))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque()
+                for batch in _batches(files, batch_size):
+                    in_flight.append(pool.submit(_convert_batch, batch, fmt, base))
+                    if len(in_flight) >= 4 * workers:
+                        for result in in_flight.popleft().result():
+                            write(result)
+                while in_flight:
+                    for result in in_flight.popleft().result():
+                        write(result)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a corpus of maDMP JSON files to N-Quads or N-Triples")
+    parser.add_argument("inputs", nargs="+", help="maDMP files, globs or directories of *.json files")
+    parser.add_argument("--output", "-o", default="-", help="Output file (.gz is compressed), - for stdout")
+    parser.add_argument("--format", choices=("nquads", "ntriples"), default="nquads",
+                        help="nquads (default) puts each maDMP in its own named graph")
+    parser.add_argument("--workers", type=int, default=None, help="Conversion processes (default: CPU count)")
+    parser.add_argument("--base", default=DMP_NAMESPACE, help="Namespace of the generated node IRIs")
+    args = parser.parse_args()
+
+    def report(path, error):
+        print(f"Skipped {path}: {error}", file=sys.stderr)
+
+    stats = convert_corpus(args.inputs, args.output, args.format, args.workers, args.base, on_error=report)
+    rate = stats["triples"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"Converted {stats['files']} maDMPs ({stats['failed']} skipped): {stats['triples']} triples "
+        f"in {stats['seconds']:.2f} s ({rate:,.0f} triples/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 import argparse
+import contextvars
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urldefrag
 import requests
 from rdflib import Dataset, URIRef
 from rdflib.namespace import RDF, RDFS, DC, Namespace
+from Evaluator import network
+from Evaluator.profiling import incr
 
 # Mapping of FIP question URIs to FAIR principles, maDMP field and question text
 QUESTION_MAP = {
@@ -126,27 +130,56 @@ PLANNED_USE = URIRef("https://w3id.org/fair/fip/terms/declares-planned-use-of")
 CONSIDERATIONS = URIRef("https://w3id.org/fair/fip/terms/considerations")
 SCHEMA = Namespace("https://schema.org/")
 
+# Seconds to wait for a nanopublication server before giving up
+FETCH_TIMEOUT = 30
 
-def fetch_graph(uri: str) -> Dataset:
-    # Retrieve the RDF graph for the given URI.
 
+def _fetch_response(uri: str):
+    # (content type, body) of the nanopub, or None if unavailable under the network policy
+    policy = network.get_policy()
+    if policy == network.CACHED_ONLY:
+        cached = network.cache_get("nanopub", uri)
+        if cached is None:
+            network.skip(network.NANOPUB_FETCH)
+            return None
+        return cached["content_type"], cached["body"]
+    if policy == network.OFFLINE:
+        network.skip(network.NANOPUB_FETCH)
+        return None
+
+    incr("http_requests")
     resp = requests.get(
         uri,
         headers={"Accept": "application/trig, text/turtle;q=0.9, application/ld+json;q=0.8, */*;q=0.1"},
+        timeout=FETCH_TIMEOUT,
     )
     try:
         resp.raise_for_status()
     except Exception:
-        return Dataset(default_union=True)
+        return None
 
     ctype = resp.headers.get("Content-Type", "").split(";")[0]
+    if "html" not in ctype.lower():
+        # Nanopublications are immutable, so a fetched one can be reused as is
+        network.cache_put("nanopub", uri, {"content_type": ctype, "body": resp.text})
+    return ctype, resp.text
+
+
+def fetch_graph(uri: str) -> Dataset:
+    # Retrieve the RDF graph for the given URI.
+
+    response = _fetch_response(uri)
+    if response is None:
+        return Dataset(default_union=True)
+
+    ctype, body = response
     if "html" in ctype.lower():
         return Dataset(default_union=True)
     
     g = Dataset(default_union=True)
     for fmt in ("trig", "turtle", "nquads", "xml", "json-ld"):
         try:
-            g.parse(data=resp.text, format=fmt)
+            g.parse(data=body, format=fmt)
             break
         except Exception:
             g = Dataset(default_union=True)
@@ -167,8 +200,8 @@ def get_label(uri: str) -> str:
         return frag
     return base.rsplit("/", 1)[-1]
 
-def get_fip_label(uri: str) -> str:
-    g = fetch_graph(uri)
+def get_fip_label(uri: str, graph: Dataset = None) -> str:
+    g = graph if graph is not None else fetch_graph(uri)
     fip_type = URIRef("https://w3id.org/fair/fip/terms/FAIR-Implementation-Profile")
     for subj in g.subjects(RDF.type, fip_type):
         label = g.value(subj, RDFS.label) or g.value(subj, DC.title)
@@ -206,18 +239,30 @@ def process_declaration(uri: str):
     return data, (str(version) if version else None)
 
 
-def build_mapping(main_uri: str):
-    g = fetch_graph(main_uri)
+def build_mapping(main_uri: str, workers: int = 1, graph: Dataset = None):
+    """Build the mapping for a FIP nanopublication.
+
+    ``workers`` > 1 fetches the declaration nanopubs concurrently; the merge
+    order (and so the resulting mapping) is the same as a sequential run.
+    """
+    g = graph if graph is not None else fetch_graph(main_uri)
     index_node = next(g.objects(None, HAS_INDEX), None)
     if not index_node:
         raise ValueError("Declaration index not found in main nanopub")
     index_uri = str(index_node)
     idx_graph = fetch_graph(index_uri)
     declarations = [str(u) for u in idx_graph.objects(None, INCLUDES)]
+    if workers > 1:
+        # Workers run in copies of this context so they see the same network policy
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            processed = list(pool.map(lambda uri: context.copy().run(process_declaration, uri), declarations))
+    else:
+        processed = [process_declaration(d) for d in declarations]
+
     mapping_dict = {}
     fip_version = ""
-    for d in declarations:
-        result, version = process_declaration(d)
+    for result, version in processed:
         if not fip_version and version:
             fip_version = version
         q_uri = result["Question_URI"]
@@ -249,12 +294,17 @@ def main():
     parser = argparse.ArgumentParser(description="Generate FIP-maDMP mapping from a FIP nanopublication")
     parser.add_argument("uri", help="URI of the FIP nanopublication")
     parser.add_argument("--output", "-o", default="FIP_Mapping", help="Output directory")
+    parser.add_argument("--workers", type=int, default=1, help="Declaration nanopubs fetched concurrently")
+    parser.add_argument("--network", choices=network.POLICIES, default=network.get_default_policy(),
+                        help="online (default) or cached-only to import from previously fetched nanopubs")
     args = parser.parse_args()
+    network.set_default_policy(args.network)
 
     os.makedirs(args.output, exist_ok=True)
-    mapping = build_mapping(args.uri)
+    main_graph = fetch_graph(args.uri)
+    mapping = build_mapping(args.uri, workers=args.workers, graph=main_graph)
 
-    label = get_fip_label(args.uri)
+    label = get_fip_label(args.uri, graph=main_graph)
     name = f"fip_madmp_{label}.json"
     path = os.path.join(args.output, name)
     with open(path, "w", encoding="utf-8") as f: